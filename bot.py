@@ -12,11 +12,12 @@ from telegram.ext import (
 )
 from telegram import BotCommand
 
-from core.config import load_config
+from core.config import EXIT_CONFIG_ERROR, load_config
 from core.logger import get_logger
+from core.router import Router
 
 from handlers.commands import send_menu
-from handlers.menu_handler import menu_text_handler
+from handlers.menu_handler import menu_router, menu_text_handler
 from handlers.souvenirs import souvenirs_menu, souvenirs_menu_handler
 from handlers.support import (
     ASKING_QUESTION,
@@ -34,8 +35,25 @@ from handlers.events import show_events, event_callback_handler
 from handlers.contacts import contacts_handler, contacts_category_handler, contacts_back_handler
 from handlers.guide import guide_handler, guide_category_handler, guide_back_handler
 from handlers.tours import show_tours, tour_callback_handler
-
-from services.messages import load_message
+from handlers.export import export_orders_command, shutdown_export_executor
+from handlers.history import history_command
+from handlers.broadcast import broadcast_command
+
+from services import storage
+from services.storage import configure_storage
+from services.tickets import configure_ticket_store
+from services.registrations import configure_registration_store, WriteBehindRegistrationStore
+from services.broadcast import configure_broadcasts
+from services.capacity import configure_capacity_engine
+from services.file_ids import configure_file_id_registry, preupload_files
+from services.http_client import configure_http_client
+from services.rate_limit import configure_rate_limiter
+from services.update_processor import configure_update_processor
+from services.orders import configure_order_repository
+from services.persistence import configure_persistence
+from services.users import configure_activity_log
+from services.webapp_server import WebAppServer
+from services.webhook import UpdateSource, run_application
 
 from warnings import filterwarnings
 from telegram.warnings import PTBUserWarning
@@ -98,7 +116,7 @@ def main():
     - Загружает конфигурацию и логгер.
     - Проверяет необходимые директории.
     - Регистрирует обработчики команд и сообщений.
-    - Запускает polling для обработки обновлений.
+    - Запускает получение обновлений через webhook или polling (update_mode).
     """
     print("Загрузка конфигурации...")
     config = load_config()
@@ -112,14 +130,100 @@ def main():
     token = config.get("telegram_token")
     if not token:
         logger.error("telegram_token не указан в config.yaml. Завершение работы.")
-        exit(1)
+        exit(EXIT_CONFIG_ERROR)
     logger.info("Токен Telegram загружен успешно")
 
-    application = ApplicationBuilder().token(token).build()
+    ensure_dirs(config, logger)
+    storage_pool = configure_storage(config, logger)
+    registration_store = configure_registration_store(config, logger)
+    configure_capacity_engine(registration_store, logger)
+    order_repository = configure_order_repository(config, logger)
+    activity_log = configure_activity_log(config, logger)
+    http_client = configure_http_client(config, logger)
+    file_id_registry = configure_file_id_registry(config, logger)
+    broadcasts = configure_broadcasts(config, logger)
+    ticket_store = configure_ticket_store(config, logger)
+    persistence = configure_persistence(config, logger)
+    background_tasks = []
+
+    webapp_server = None
+    if config.get("webapp_embedded"):
+        webapp_server = WebAppServer(
+            config["orders_dir"],
+            webapp_dir=config.get("webapp_dir", "webapp"),
+            port=config.get("webapp_port", 8080),
+            logger=logger,
+        )
+
+    async def post_init(application):
+        """
+        Запускает фоновые задачи после инициализации приложения.
+        """
+        if isinstance(registration_store, WriteBehindRegistrationStore):
+            registration_store.start()
+        activity_log.start()
+        if webapp_server:
+            await webapp_server.start()
+        await broadcasts.resume(application.bot)
+        if config.get("storage_chat_id"):
+            background_tasks.append(
+                asyncio.create_task(
+                    preupload_files(application.bot, config["materials_dir"], config["storage_chat_id"], logger)
+                )
+            )
+
+    async def post_stop(application):
+        """
+        Останавливает фоновые отправки, пока бот ещё может обращаться к Telegram.
+        """
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await broadcasts.stop()
+
+    async def post_shutdown(application):
+        """
+        Сохраняет отложенные данные и освобождает ресурсы при остановке бота.
+        """
+        broadcasts.store.close()
+        logger.info(f"Кэш обращений в поддержку: {ticket_store.stats()}")
+        ticket_store.close()
+        logger.info(f"Кэш проверок URL: {http_client.stats()}")
+        await http_client.close()
+        if webapp_server:
+            await webapp_server.stop()
+        if isinstance(registration_store, WriteBehindRegistrationStore):
+            await registration_store.stop()
+        registration_store.close()
+        order_repository.close()
+        logger.info(f"Реестр file_id: {file_id_registry.stats()}")
+        file_id_registry.close()
+        if persistence:
+            persistence.close()
+        await activity_log.stop()
+        logger.info(f"Метрики хранилища: {storage_pool.metrics()}")
+        storage_pool.shutdown()
+        shutdown_export_executor()
+
+    builder = (
+        ApplicationBuilder()
+        .token(token)
+        .post_init(post_init)
+        .post_stop(post_stop)
+        .post_shutdown(post_shutdown)
+    )
+    rate_limiter = configure_rate_limiter(config, logger)
+    if rate_limiter:
+        builder = builder.rate_limiter(rate_limiter)
+    if persistence:
+        builder = builder.persistence(persistence)
+    update_processor = configure_update_processor(config, logger)
+    if update_processor:
+        builder = builder.concurrent_updates(update_processor)
+    application = builder.build()
     application.bot_data["config"] = config
     application.bot_data["logger"] = logger
-
-    ensure_dirs(config, logger)
+    update_source = UpdateSource(application, config, webapp_server, logger)
 
     logger.info("Регистрация обработчиков...")
 
@@ -130,7 +234,7 @@ def main():
         Обрабатывает команду /start — приветствует пользователя и показывает главное меню.
         """
         config = context.application.bot_data.get("config", {})
-        welcome_text = load_message("welcome.txt") or config.get(
+        welcome_text = await storage.load_message("welcome.txt") or config.get(
             "welcome_text", "Добро пожаловать!"
         )
 
@@ -158,7 +262,7 @@ def main():
     support_conversation_handler = ConversationHandler(
         entry_points=[
             MessageHandler(
-                filters.Regex("^👨💻 Связаться с оператором$"), start_support_conversation
+                filters.Text(["👨💻 Связаться с оператором"]), start_support_conversation
             )
         ],
         states={
@@ -169,6 +273,9 @@ def main():
         },
         fallbacks=[CallbackQueryHandler(cancel_support, pattern=f"^{CANCEL_CALLBACK}$")],
         allow_reentry=True,
+        # Состояние разговора сохраняется, чтобы вопрос после перезапуска бота дошёл до операторов
+        name="support",
+        persistent=persistence is not None,
     )
     application.add_handler(support_conversation_handler)
 
@@ -185,55 +292,57 @@ def main():
     # --- Обработчики меню и кнопок ---
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, menu_text_handler))
 
-    # Обработчики callback_query для туров
-    application.add_handler(
-        CallbackQueryHandler(
-            tour_callback_handler, pattern=r"^(date|register|unregister|back_to_dates)\|?"
-        )
-    )
-
     # Дополнительные команды и обработчики для материалов и сувениров
     application.add_handler(CommandHandler("material", materials_menu))
     application.add_handler(CommandHandler("myorder", souvenirs_menu_handler))
     application.add_handler(CommandHandler("cancelorder", souvenirs_menu_handler))
 
-    application.add_handler(MessageHandler(filters.Regex("^🛍 Сувениры$"), souvenirs_menu))
-    application.add_handler(
-        MessageHandler(
-            filters.Regex("^(Посмотреть заказ|Отменить заказ|Назад)$"), souvenirs_menu_handler
-        )
-    )
+    # Административные команды
+    application.add_handler(CommandHandler("export_orders", export_orders_command))
+    application.add_handler(CommandHandler("history", history_command))
+    application.add_handler(CommandHandler("broadcast", broadcast_command))
 
-    application.add_handler(MessageHandler(filters.Regex("^📚 Материалы$"), materials_menu))
-    application.add_handler(CallbackQueryHandler(material_button_handler, pattern=r"^material_"))
+    # Обработчик данных веб-приложения
+    application.add_handler(MessageHandler(filters.StatusUpdate.WEB_APP_DATA, webapp_data_handler))
 
-    # Обработчики мероприятий
-    application.add_handler(MessageHandler(filters.Regex("^📅 Мероприятия$"), show_events))
-    application.add_handler(CallbackQueryHandler(event_callback_handler, pattern=r"^event_date\|"))
+    # --- Маршруты callback_query: один обработчик и таблица вместо цепочки регулярных выражений ---
+    # Неизвестные данные и кнопки заказа обрабатывает универсальный обработчик кнопок
+    callback_router = Router("callback_query", default=button_handler)
 
-    # Обработчики путеводителя
-    application.add_handler(CallbackQueryHandler(guide_category_handler, pattern=r"^guide_cat\|"))
-    application.add_handler(CallbackQueryHandler(guide_back_handler, pattern=r"^guide_back$"))
+    # Экскурсии
+    callback_router.add_prefix("date|", tour_callback_handler)
+    callback_router.add_prefix("register|", tour_callback_handler)
+    callback_router.add_prefix("unregister|", tour_callback_handler)
+    callback_router.add("back_to_dates", tour_callback_handler)
 
-    # Обработчики контактов
-    application.add_handler(MessageHandler(filters.Regex("^📞 Контакты$"), contacts_handler))
-    application.add_handler(CallbackQueryHandler(contacts_category_handler, pattern=r"^contacts_cat\|"))
-    application.add_handler(CallbackQueryHandler(contacts_back_handler, pattern=r"^contacts_back$"))
+    # Материалы (material_<имя> — кнопки, отправленные до перехода на короткие id)
+    callback_router.add_prefix("material|", material_button_handler)
+    callback_router.add_prefix("material_", material_button_handler)
+    callback_router.add_prefix("materials_page|", material_button_handler)
 
-    # Обработчик данных веб-приложения
-    application.add_handler(MessageHandler(filters.StatusUpdate.WEB_APP_DATA, webapp_data_handler))
+    # Мероприятия
+    callback_router.add_prefix("event_date|", event_callback_handler)
+
+    # Путеводитель
+    callback_router.add_prefix("guide_cat|", guide_category_handler)
+    callback_router.add("guide_back", guide_back_handler)
+
+    # Контакты
+    callback_router.add_prefix("contacts_cat|", contacts_category_handler)
+    callback_router.add("contacts_back", contacts_back_handler)
 
-    # Универсальный обработчик кнопок
-    application.add_handler(CallbackQueryHandler(button_handler))
+    application.add_handler(CallbackQueryHandler(callback_router.dispatch_callback))
+    menu_router.log_routes(logger)
+    callback_router.log_routes(logger)
 
     # Глобальный обработчик ошибок
     application.add_error_handler(error_handler)
 
-    logger.info("Инициализация завершена, запуск polling...")
+    logger.info("Инициализация завершена, запуск получения обновлений...")
 
     loop = asyncio.get_event_loop()
     loop.run_until_complete(set_bot_commands(application, logger))
-    loop.run_until_complete(application.run_polling())
+    loop.run_until_complete(run_application(application, update_source, logger))
 
     logger.info("Бот остановлен")
 
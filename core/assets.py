@@ -0,0 +1,283 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, без него отдаём только gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+@dataclass
+class Asset:
+    """
+    Статический файл веб-приложения с заранее подготовленными вариантами.
+
+    Attributes:
+        rel_path (str): Путь относительно корня (через "/").
+        path (str): Путь к файлу на диске.
+        content_type (str): MIME-тип.
+        etag (str): Сильный ETag исходного содержимого (в кавычках).
+        size (int): Размер файла.
+        mtime_ns (int): Время изменения файла.
+        cache_control (str): Значение заголовка Cache-Control.
+        body (bytes | None): Содержимое в памяти (None — отдавать через sendfile).
+        variants (dict): Сжатые варианты: кодировка -> байты.
+    """
+
+    rel_path: str
+    path: str
+    content_type: str
+    etag: str
+    size: int
+    mtime_ns: int
+    cache_control: str
+    body: bytes | None = None
+    variants: dict = field(default_factory=dict)
+
+    def select(self, accept_encoding: str | None) -> tuple[str | None, bytes | None, str]:
+        """
+        Выбирает представление по заголовку Accept-Encoding.
+
+        Args:
+            accept_encoding (str | None): Значение заголовка клиента.
+
+        Returns:
+            tuple: (кодировка или None, тело в памяти или None для sendfile, ETag варианта).
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                return encoding, self.variants[encoding], f'{self.etag[:-1]}-{encoding}"'
+        return None, self.body, self.etag
+
+
+def parse_accept_encoding(header: str | None) -> set:
+    """
+    Разбирает Accept-Encoding, отбрасывая кодировки с q=0.
+
+    Args:
+        header (str | None): Значение заголовка.
+
+    Returns:
+        set: Допустимые кодировки в нижнем регистре.
+    """
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match (слабое сравнение, как требует RFC 9110).
+
+    Args:
+        if_none_match (str | None): Значение заголовка клиента.
+        etag (str): ETag отдаваемого представления.
+
+    Returns:
+        bool: True, если можно ответить 304 Not Modified.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+class AssetStore:
+    """
+    Каталог статических файлов веб-приложения.
+
+    При запуске файлы сканируются, для текстовых форматов заранее строятся
+    gzip- (и brotli-, если модуль установлен) варианты, считаются сильные
+    ETag. Небольшие файлы и сжатые варианты держатся в памяти, крупные
+    файлы без сжатия отдаются через socket.sendfile.
+    Изменение файла замечается по stat не чаще раза в check_interval секунд.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        memory_limit: int = 256 * 1024,
+        compress_limit: int = 8 * 1024 * 1024,
+        check_interval: float = 1.0,
+    ):
+        """
+        Args:
+            root (str): Корневая директория статики.
+            memory_limit (int): Максимальный размер файла, хранимого в памяти без сжатия.
+            compress_limit (int): Максимальный размер текстового файла для предварительного сжатия.
+            check_interval (float): Минимальный интервал между проверками файлов, секунды.
+        """
+        self.root = os.path.abspath(root)
+        self.memory_limit = memory_limit
+        self.compress_limit = compress_limit
+        self.check_interval = check_interval
+        self._assets = {}
+        self._checked_at = {}
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        self.scan()
+
+    def _build(self, rel_path: str, path: str, st: os.stat_result) -> Asset:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES) and st.st_size <= self.compress_limit
+        digest = hashlib.sha256()
+        data = None
+        with open(path, "rb") as f:
+            if st.st_size <= self.memory_limit or compressible:
+                data = f.read()
+                digest.update(data)
+            else:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+
+        asset = Asset(
+            rel_path=rel_path,
+            path=path,
+            content_type=content_type,
+            etag=f'"{digest.hexdigest()[:32]}"',
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            cache_control=IMMUTABLE_CACHE if HASHED_NAME_RE.search(rel_path) else REVALIDATE_CACHE,
+            body=data if st.st_size <= self.memory_limit else None,
+        )
+        if data and compressible:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                asset.variants["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    asset.variants["br"] = compressed
+        return asset
+
+    def scan(self) -> None:
+        """
+        Заново сканирует корневую директорию и перестраивает изменившиеся файлы.
+        """
+        assets = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if filename.startswith("."):
+                    continue
+                st = os.stat(path)
+                current = self._assets.get(rel_path)
+                if current and current.mtime_ns == st.st_mtime_ns and current.size == st.st_size:
+                    assets[rel_path] = current
+                else:
+                    assets[rel_path] = self._build(rel_path, path, st)
+        with self._lock:
+            self._assets = assets
+            self._scanned_at = time.monotonic()
+
+    @staticmethod
+    def _rel_path(url_path: str) -> str:
+        rel_path = url_path.lstrip("/") or "index.html"
+        if rel_path.endswith("/"):
+            rel_path += "index.html"
+        return rel_path
+
+    def peek(self, url_path: str) -> tuple[bool, Asset | None]:
+        """
+        Находит файл без обращения к диску, если проверка ещё не нужна.
+
+        Для цикла событий: если файл проверялся (или каталог сканировался)
+        меньше check_interval назад, ответ берётся из памяти, иначе вызовите
+        lookup в пуле потоков.
+
+        Args:
+            url_path (str): Путь из URL (уже без query-строки).
+
+        Returns:
+            tuple[bool, Asset | None]: (готов ли ответ, найденный файл или None).
+        """
+        rel_path = self._rel_path(url_path)
+        asset = self._assets.get(rel_path)
+        now = time.monotonic()
+        if asset is None:
+            return now - self._scanned_at < self.check_interval, None
+        if now - self._checked_at.get(rel_path, 0.0) < self.check_interval:
+            return True, asset
+        return False, None
+
+    def lookup(self, url_path: str) -> Asset | None:
+        """
+        Находит файл по пути из URL.
+
+        Отдаются только файлы, найденные при сканировании, поэтому выход
+        за пределы корня через ".." невозможен.
+
+        Args:
+            url_path (str): Путь из URL (уже без query-строки).
+
+        Returns:
+            Asset | None: Найденный файл или None.
+        """
+        rel_path = self._rel_path(url_path)
+        asset = self._assets.get(rel_path)
+        now = time.monotonic()
+        if asset is None:
+            # Новые файлы подхватываем повторным сканированием (не чаще check_interval)
+            if now - self._scanned_at >= self.check_interval:
+                self.scan()
+                return self._assets.get(rel_path)
+            return None
+
+        if now - self._checked_at.get(rel_path, 0.0) >= self.check_interval:
+            self._checked_at[rel_path] = now
+            try:
+                st = os.stat(asset.path)
+            except OSError:
+                with self._lock:
+                    self._assets.pop(rel_path, None)
+                return None
+            if st.st_mtime_ns != asset.mtime_ns or st.st_size != asset.size:
+                asset = self._build(rel_path, asset.path, st)
+                with self._lock:
+                    self._assets[rel_path] = asset
+        return asset
+
+    def stats(self) -> dict:
+        """
+        Возвращает сводку по каталогу.
+
+        Returns:
+            dict: Количество файлов, файлов в памяти и байт в памяти (с вариантами).
+        """
+        assets = list(self._assets.values())
+        return {
+            "files": len(assets),
+            "in_memory": sum(1 for a in assets if a.body is not None),
+            "memory_bytes": sum(len(a.body or b"") + sum(map(len, a.variants.values())) for a in assets),
+            "brotli": brotli is not None,
+        }
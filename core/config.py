@@ -1,5 +1,8 @@
 import yaml
 
+# Код завершения бота при ошибке конфигурации (EX_CONFIG): перезапуск не поможет
+EXIT_CONFIG_ERROR = 78
+
 
 def load_config(path: str = "config.yaml") -> dict:
     """
@@ -0,0 +1,292 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable
+
+logger = logging.getLogger("telegram_bot")
+
+
+def freeze(value: Any) -> Any:
+    """
+    Рекурсивно превращает результат json.load в неизменяемую структуру.
+
+    Словари заменяются на MappingProxyType, списки — на кортежи,
+    поэтому обработчики не могут случайно испортить общий снимок.
+
+    Args:
+        value (Any): Значение, полученное из JSON.
+
+    Returns:
+        Any: Неизменяемая копия значения.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def parse_json(content: str) -> Any:
+    """
+    Разбирает JSON и замораживает результат.
+
+    Args:
+        content (str): Содержимое файла.
+
+    Returns:
+        Any: Неизменяемые данные файла.
+    """
+    return freeze(json.loads(content))
+
+
+def parse_text(content: str) -> str:
+    """
+    Возвращает текст файла без начальных и конечных пробелов.
+
+    Args:
+        content (str): Содержимое файла.
+
+    Returns:
+        str: Очищенный текст.
+    """
+    return content.strip()
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Неизменяемый снимок содержимого файла.
+
+    Attributes:
+        path (str): Путь к файлу.
+        version (int): Глобально уникальный номер снимка, растёт при каждой перезагрузке
+            (в том числе между запусками бота).
+        data (Any): Разобранное содержимое файла.
+        mtime_ns (int): Время изменения файла на момент чтения (0, если файла нет).
+        size (int): Размер файла на момент чтения (-1, если файла нет).
+    """
+
+    path: str
+    version: int
+    data: Any
+    mtime_ns: int
+    size: int
+
+
+class DataCache:
+    """
+    Кэш содержимого файлов из каталога data с проверкой по mtime и размеру.
+
+    Каждый файл разбирается один раз. При обращении кэш делает дешёвый os.stat
+    (не чаще, чем раз в check_interval секунд) и, если файл изменился,
+    перечитывает его и атомарно подменяет снимок. Если новый файл не удалось
+    разобрать (например, редактор ещё не дописал его), остаётся прежний снимок.
+    Последние keep_versions снимков каждого файла сохраняются, поэтому
+    пользователю достаточно помнить номер версии, а не копию данных.
+    """
+
+    def __init__(self, check_interval: float = 1.0, keep_versions: int = 3):
+        """
+        Args:
+            check_interval (float): Минимальный интервал между проверками файла, секунды.
+            keep_versions (int): Сколько последних снимков файла хранить.
+        """
+        self.check_interval = check_interval
+        self.keep_versions = keep_versions
+        self._history = {}
+        self._snapshots = {}
+        self._checked_at = {}
+        self._lock = threading.Lock()
+        # Номера версий продолжают расти и после перезапуска процесса, поэтому
+        # номер, сохранённый у пользователя до перезапуска, не совпадёт с новым снимком
+        self._version = time.time_ns() // 1_000_000
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.errors = 0
+
+    def get(self, path: str, parser: Callable[[str], Any] = parse_json, default: Any = None) -> Snapshot:
+        """
+        Возвращает актуальный снимок файла.
+
+        Args:
+            path (str): Путь к файлу.
+            parser (Callable[[str], Any]): Функция разбора содержимого файла.
+            default (Any): Значение data, если файла нет или он не разбирается.
+
+        Returns:
+            Snapshot: Снимок содержимого файла.
+        """
+        key = (path, parser)
+        snapshot = self._snapshots.get(key)
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at.get(key, 0.0) < self.check_interval:
+            self.hits += 1
+            return snapshot
+
+        try:
+            st = os.stat(path)
+            mtime_ns, size = st.st_mtime_ns, st.st_size
+        except OSError:
+            mtime_ns, size = 0, -1
+
+        if snapshot is not None and snapshot.mtime_ns == mtime_ns and snapshot.size == size:
+            self._checked_at[key] = now
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            # Другой поток мог уже перечитать файл, пока мы ждали блокировку
+            current = self._snapshots.get(key)
+            if current is not None and current.mtime_ns == mtime_ns and current.size == size:
+                self._checked_at[key] = now
+                self.hits += 1
+                return current
+
+            self.misses += 1
+            data = self._read(path, parser, size, default, current)
+            self._version += 1
+            snapshot = Snapshot(path, self._version, data, mtime_ns, size)
+            self._snapshots[key] = snapshot
+            history = self._history.setdefault(key, deque(maxlen=self.keep_versions))
+            history.append(snapshot)
+            self._checked_at[key] = now
+            if current is not None:
+                self.reloads += 1
+                logger.info(f"Файл {path} изменён, загружен снимок v{snapshot.version}")
+            return snapshot
+
+    def peek(self, path: str, parser: Callable[[str], Any] = parse_json) -> Snapshot | None:
+        """
+        Возвращает снимок без обращения к диску, если файл проверялся недавно.
+
+        Args:
+            path (str): Путь к файлу.
+            parser (Callable[[str], Any]): Функция разбора содержимого файла.
+
+        Returns:
+            Snapshot | None: Снимок или None, если нужна проверка файла (вызовите get).
+        """
+        key = (path, parser)
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None and time.monotonic() - self._checked_at.get(key, 0.0) < self.check_interval:
+            self.hits += 1
+            return snapshot
+        return None
+
+    def get_version(self, path: str, parser: Callable[[str], Any], version: int) -> Snapshot | None:
+        """
+        Возвращает сохранённый снимок файла с указанной версией.
+
+        Args:
+            path (str): Путь к файлу.
+            parser (Callable[[str], Any]): Функция разбора содержимого файла.
+            version (int): Номер снимка.
+
+        Returns:
+            Snapshot | None: Снимок или None, если версия уже вытеснена более новыми.
+        """
+        # История дополняется из потоков пула хранилища
+        with self._lock:
+            history = tuple(self._history.get((path, parser), ()))
+        for snapshot in history:
+            if snapshot.version == version:
+                return snapshot
+        return None
+
+    def _read(self, path, parser, size, default, current):
+        """
+        Читает и разбирает файл, при ошибке возвращает предыдущие данные или default.
+        """
+        if size < 0:
+            return freeze(default)
+        try:
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+            if not content.strip():
+                logger.warning(f"Файл {path} пуст")
+                return freeze(default)
+            return parser(content)
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            logger.error(f"Ошибка чтения файла {path}: {e}")
+            return current.data if current is not None else freeze(default)
+
+    def invalidate(self, path: str | None = None) -> None:
+        """
+        Сбрасывает снимки, чтобы следующий вызов перечитал файл.
+
+        Args:
+            path (str | None): Путь к файлу или None для сброса всего кэша.
+        """
+        with self._lock:
+            for key in list(self._snapshots):
+                if path is None or key[0] == path:
+                    del self._snapshots[key]
+                    self._checked_at.pop(key, None)
+                    self._history.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики работы кэша.
+
+        Returns:
+            dict: Количество попаданий, промахов, перезагрузок, ошибок и файлов в кэше.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "files": len(self._snapshots),
+        }
+
+
+data_cache = DataCache()
+
+
+def get_json_snapshot(path: str, default: Any = None) -> Snapshot:
+    """
+    Возвращает снимок JSON-файла из общего кэша.
+
+    Args:
+        path (str): Путь к JSON-файлу.
+        default (Any): Значение, если файла нет или он пуст.
+
+    Returns:
+        Snapshot: Снимок с неизменяемыми данными.
+    """
+    return data_cache.get(path, parse_json, default)
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    """
+    Возвращает неизменяемое содержимое JSON-файла из общего кэша.
+
+    Args:
+        path (str): Путь к JSON-файлу.
+        default (Any): Значение, если файла нет или он пуст.
+
+    Returns:
+        Any: Данные файла.
+    """
+    return data_cache.get(path, parse_json, default).data
+
+
+def load_text(path: str, default: str = "") -> str:
+    """
+    Возвращает содержимое текстового файла из общего кэша.
+
+    Args:
+        path (str): Путь к файлу.
+        default (str): Значение, если файла нет.
+
+    Returns:
+        str: Текст файла без начальных и конечных пробелов.
+    """
+    return data_cache.get(path, parse_text, default).data
@@ -0,0 +1,107 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+
+@dataclass(frozen=True)
+class Rendered:
+    """
+    Готовое к отправке сообщение: текст, режим разметки и клавиатура.
+
+    Attributes:
+        text (str): Текст сообщения.
+        parse_mode (str | None): Режим разметки ("Markdown" или None).
+        reply_markup (Any): Клавиатура сообщения или None.
+        disable_web_page_preview (bool | None): Отключить предпросмотр ссылок.
+    """
+
+    text: str
+    parse_mode: str | None = None
+    reply_markup: Any = None
+    disable_web_page_preview: bool | None = None
+
+    def as_kwargs(self) -> dict:
+        """
+        Возвращает параметры для reply_text / edit_message_text.
+
+        Returns:
+            dict: Именованные аргументы без пустых значений.
+        """
+        kwargs = {"text": self.text}
+        if self.parse_mode:
+            kwargs["parse_mode"] = self.parse_mode
+        if self.reply_markup is not None:
+            kwargs["reply_markup"] = self.reply_markup
+        if self.disable_web_page_preview is not None:
+            kwargs["disable_web_page_preview"] = self.disable_web_page_preview
+        return kwargs
+
+
+class RenderCache:
+    """
+    Кэш отрисованных экранов, ключ — (экран, категория/дата) и версия снимка данных.
+
+    Если версия снимка изменилась, экран отрисовывается заново, а все записи
+    экрана со старой версией удаляются, поэтому кэш не растёт после правок JSON.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        screen: str,
+        key: Hashable,
+        version: int,
+        render: Callable[[], Rendered | None],
+    ) -> Rendered | None:
+        """
+        Возвращает отрисованный экран из кэша или отрисовывает его.
+
+        Args:
+            screen (str): Имя экрана (например, "events_date").
+            key (Hashable): Категория, дата или другой параметр экрана.
+            version (int): Версия снимка данных, из которых строится экран.
+            render (Callable[[], Rendered | None]): Функция отрисовки.
+
+        Returns:
+            Rendered | None: Готовое сообщение или None, если экран пуст.
+        """
+        entry = self._entries.get((screen, key))
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+
+        rendered = render()
+        with self._lock:
+            self.misses += 1
+            if self._versions.get(screen) != version:
+                self._versions[screen] = version
+                for cached in [k for k, v in self._entries.items() if k[0] == screen and v[0] != version]:
+                    del self._entries[cached]
+            self._entries[(screen, key)] = (version, rendered)
+        return rendered
+
+    def clear(self) -> None:
+        """
+        Полностью очищает кэш.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики работы кэша.
+
+        Returns:
+            dict: Количество попаданий, промахов и записей в кэше.
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+render_cache = RenderCache()
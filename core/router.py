@@ -0,0 +1,123 @@
+from typing import Awaitable, Callable
+
+Callback = Callable[..., Awaitable]
+
+
+class Router:
+    """
+    Таблица маршрутов для текстов меню и callback_data.
+
+    Маршрут выбирается по точному совпадению (словарь) или по самому длинному
+    подходящему префиксу (префиксное дерево по символам, например "event_date|"
+    для данных вида "event_date|2025-06-01"). Стоимость выбора не зависит от
+    количества маршрутов: один поиск в словаре и проход по дереву не глубже
+    самого длинного префикса — вместо проверки регулярных выражений
+    обработчиков по очереди.
+    """
+
+    def __init__(self, name: str, default: Callback | None = None):
+        """
+        Args:
+            name (str): Название таблицы (для лога).
+            default (Callable | None): Обработчик, если ни один маршрут не подошёл.
+        """
+        self.name = name
+        self.default = default
+        self._exact = {}
+        self._trie = {}
+        self._prefixes = {}
+
+    def add(self, key: str, callback: Callback) -> None:
+        """
+        Добавляет маршрут с точным совпадением.
+
+        Args:
+            key (str): Текст или callback_data целиком.
+            callback (Callable): Обработчик (update, context).
+
+        Raises:
+            ValueError: Если маршрут уже зарегистрирован.
+        """
+        if key in self._exact:
+            raise ValueError(f"Маршрут {key!r} уже зарегистрирован в {self.name}")
+        self._exact[key] = callback
+
+    def add_prefix(self, prefix: str, callback: Callback) -> None:
+        """
+        Добавляет маршрут по префиксу.
+
+        Args:
+            prefix (str): Префикс данных, обычно вместе с разделителем ("date|").
+            callback (Callable): Обработчик (update, context).
+
+        Raises:
+            ValueError: Если префикс пустой или уже зарегистрирован.
+        """
+        if not prefix or prefix in self._prefixes:
+            raise ValueError(f"Некорректный или повторный префикс {prefix!r} в {self.name}")
+        node = self._trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        # Ключ None не пересекается с символами и хранит обработчик узла
+        node[None] = callback
+        self._prefixes[prefix] = callback
+
+    def match(self, data: str) -> Callback | None:
+        """
+        Возвращает обработчик для данных.
+
+        Args:
+            data (str): Текст сообщения или callback_data.
+
+        Returns:
+            Callable | None: Обработчик маршрута, default или None.
+        """
+        callback = self._exact.get(data)
+        if callback is not None:
+            return callback
+        found = self.default
+        node = self._trie
+        for char in data:
+            node = node.get(char)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+    async def dispatch_callback(self, update, context) -> None:
+        """
+        Обработчик CallbackQueryHandler: передаёт callback_query обработчику маршрута.
+
+        Args:
+            update (telegram.Update): Объект обновления Telegram.
+            context (telegram.ext.CallbackContext): Контекст обработчика.
+        """
+        callback = self.match(update.callback_query.data or "")
+        if callback is not None:
+            await callback(update, context)
+
+    def routes(self) -> list:
+        """
+        Возвращает таблицу маршрутов.
+
+        Returns:
+            list: Кортежи (вид, ключ, имя обработчика) — сначала точные, затем префиксы.
+        """
+        table = [("exact", key, callback) for key, callback in self._exact.items()]
+        table += [("prefix", prefix, callback) for prefix, callback in sorted(self._prefixes.items())]
+        return [(kind, key, getattr(callback, "__name__", repr(callback))) for kind, key, callback in table]
+
+    def log_routes(self, logger) -> None:
+        """
+        Записывает таблицу маршрутов в лог.
+
+        Args:
+            logger (logging.Logger): Логгер для записи информации.
+        """
+        default = getattr(self.default, "__name__", None)
+        logger.info(
+            f"Маршруты {self.name}: точных {len(self._exact)}, префиксов {len(self._prefixes)}, "
+            f"по умолчанию {default}"
+        )
+        for kind, key, name in self.routes():
+            logger.info(f"  {kind:<6} {key!r} -> {name}")
@@ -0,0 +1,82 @@
+# handlers/broadcast.py
+
+from telegram import Update
+from telegram.ext import ContextTypes
+from handlers.export import is_admin
+from services import storage
+from services.broadcast import format_progress, get_broadcast_manager, resolve_audience
+
+USAGE = (
+    "Использование:\n"
+    "/broadcast all <текст> — всем пользователям\n"
+    "/broadcast orders <текст> — пользователям с открытым заказом\n"
+    "/broadcast tour:<id> <текст> — записанным на экскурсию\n"
+    "/broadcast status — состояние рассылок\n"
+    "/broadcast cancel <номер> — отменить рассылку"
+)
+
+
+async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обрабатывает команду /broadcast — рассылку сообщения выбранной аудитории.
+
+    Рассылка выполняется в фоне с ограничением частоты; отчёт о ходе
+    рассылки обновляется в чате, где была дана команда.
+
+    Args:
+        update (telegram.Update): Объект обновления Telegram.
+        context (telegram.ext.CallbackContext): Контекст обработчика.
+    """
+    config = context.application.bot_data["config"]
+    logger = context.application.bot_data["logger"]
+    user = update.effective_user
+    manager = get_broadcast_manager()
+
+    if not is_admin(update, config):
+        logger.warning(f"Пользователь {user.id} попытался сделать рассылку без прав")
+        return
+
+    # Текст берём из сообщения целиком, чтобы сохранить переводы строк
+    parts = (update.message.text or "").split(maxsplit=2)
+    action = parts[1] if len(parts) > 1 else ""
+
+    if action == "status":
+        lines = []
+        for broadcast_id in await storage.get_storage_pool().run("broadcast.latest", manager.store.latest):
+            progress = manager.progress(broadcast_id)
+            if progress:
+                lines.append(format_progress(progress))
+            else:
+                info = await storage.get_storage_pool().run("broadcast.get", manager.store.get, broadcast_id)
+                counts = await storage.get_storage_pool().run("broadcast.counts", manager.store.counts, broadcast_id)
+                lines.append(f"📣 Рассылка #{broadcast_id} ({info['target']}): {info['status']}, {counts}")
+        await update.message.reply_text("\n\n".join(lines) or "Рассылок пока не было.")
+        return
+
+    if action == "cancel":
+        if len(parts) < 3 or not parts[2].isdigit():
+            await update.message.reply_text(USAGE)
+            return
+        broadcast_id = int(parts[2])
+        cancelled = await manager.cancel(broadcast_id)
+        await update.message.reply_text(
+            f"Рассылка #{broadcast_id} отменена." if cancelled else f"Рассылка #{broadcast_id} не выполняется."
+        )
+        logger.info(f"Пользователь {user.id} отменил рассылку #{broadcast_id}")
+        return
+
+    if len(parts) < 3:
+        await update.message.reply_text(USAGE)
+        return
+
+    try:
+        user_ids = await storage.get_storage_pool().run("broadcast.audience", resolve_audience, action, config)
+    except ValueError:
+        await update.message.reply_text(USAGE)
+        return
+    if not user_ids:
+        await update.message.reply_text("Получателей для рассылки нет.")
+        return
+
+    broadcast_id = await manager.create(action, parts[2], user_ids, update.effective_chat.id)
+    logger.info(f"Пользователь {user.id} запустил рассылку #{broadcast_id} ({action}) на {len(user_ids)} получателей")
@@ -1,8 +1,8 @@
-from services.orders import read_order, remove_order
+from services import storage
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
-# Импортируем функцию построения клавиатуры (укажите свой путь)
-from handlers.events import build_dates_keyboard
+# Экран выбора даты мероприятий берётся из кэша отрисовки
+from handlers.events import get_dates_screen
 
 
 async def button_handler(update, context):
@@ -29,7 +29,7 @@ async def button_handler(update, context):
     logger.debug(f"Обработка callback {data} от пользователя {user.id} (@{user.username})")
 
     if data == "myorder":
-        order = read_order(user.id, config["orders_dir"])
+        order = await storage.read_order(user.id, config["orders_dir"])
         if not order:
             await query.edit_message_text("У вас нет текущих заказов.")
             logger.info(f"Пользователь {user.id} запросил заказ, но файл не найден")
@@ -40,7 +40,7 @@ async def button_handler(update, context):
         logger.info(f"Пользователь {user.id} просмотрел заказ через кнопку")
 
     elif data == "cancelorder":
-        if remove_order(user.id, config["orders_dir"], logger):
+        if await storage.remove_order(user.id, config["orders_dir"], logger):
             await query.edit_message_text("Ваш заказ успешно удалён.")
             logger.info(f"Пользователь {user.id} удалил заказ через кнопку")
         else:
@@ -48,13 +48,12 @@ async def button_handler(update, context):
             logger.info(f"Пользователь {user.id} попытался удалить несуществующий заказ")
 
     elif data == "event_back":
-        dates = context.user_data.get("events_dates")
-        if not dates:
+        screen = await get_dates_screen()
+        if not screen:
             await query.edit_message_text("Пожалуйста, заново вызовите команду /events")
             logger.warning(f"Пользователь {user.id} вызвал event_back, но даты не найдены")
             return
-        keyboard = build_dates_keyboard(dates)
-        await query.edit_message_text("Выберите дату мероприятия:", reply_markup=keyboard)
+        await query.edit_message_text(**screen.as_kwargs())
         logger.info(f"Пользователь {user.id} вернулся к выбору даты")
 
     else:
@@ -24,7 +24,7 @@ async def send_menu(update, context: ContextTypes.DEFAULT_TYPE):
     logger = context.application.bot_data["logger"]
     config = context.application.bot_data["config"]
 
-    log_user_message(user.id, user.username, "/start (menu)", config["logs_dir"], logger)
+    await log_user_message(user.id, user.username, "/start (menu)", config["logs_dir"], logger)
 
     keyboard = ReplyKeyboardMarkup(MENU_BUTTONS, resize_keyboard=True)
     await update.message.reply_text("Главное меню:", reply_markup=keyboard)
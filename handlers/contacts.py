@@ -1,7 +1,8 @@
-import json
-import os
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+from core.data_cache import load_json
+from core.render_cache import Rendered, render_cache
+from services import storage
 
 CONTACTS_FILE = "data/contacts.json"
 
@@ -14,68 +15,43 @@ def load_contacts() -> dict:
         dict: Словарь с категориями контактов.
               Пустой словарь, если файл не найден.
     """
-    if not os.path.exists(CONTACTS_FILE):
-        return {}
-    with open(CONTACTS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_json(CONTACTS_FILE, {})
 
 
-async def contacts_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+def render_categories_screen(contacts_data) -> Rendered | None:
     """
-    Обрабатывает команду показа контактов.
-
-    Отправляет пользователю список категорий контактов с кнопками.
+    Отрисовывает экран выбора категории контактов.
 
     Args:
-        update (telegram.Update): Объект обновления Telegram.
-        context (telegram.ext.CallbackContext): Контекст обработчика.
+        contacts_data (Mapping): Словарь с категориями контактов.
+
+    Returns:
+        Rendered | None: Готовое сообщение или None, если контактов нет.
     """
-    contacts_data = load_contacts()
     if not contacts_data:
-        if update.callback_query:
-            await update.callback_query.message.edit_text("Контакты временно недоступны.")
-        else:
-            await update.message.reply_text("Контакты временно недоступны.")
-        return
-
+        return None
     keyboard = [
         [InlineKeyboardButton(cat, callback_data=f"contacts_cat|{cat}")]
         for cat in contacts_data.keys()
     ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    if update.callback_query:
-        await update.callback_query.message.edit_text(
-            "Выберите категорию контактов:", reply_markup=reply_markup
-        )
-    else:
-        await update.message.reply_text(
-            "Выберите категорию контактов:", reply_markup=reply_markup
-        )
+    return Rendered("Выберите категорию контактов:", reply_markup=InlineKeyboardMarkup(keyboard))
 
 
-async def contacts_category_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+def render_category_screen(contacts_data, category: str) -> Rendered:
     """
-    Обрабатывает выбор категории контактов.
-
-    Отправляет список контактов в выбранной категории с кликабельными номерами.
+    Отрисовывает список контактов категории с кликабельными номерами.
 
     Args:
-        update (telegram.Update): Объект обновления Telegram.
-        context (telegram.ext.CallbackContext): Контекст обработчика.
-    """
-    contacts_data = load_contacts()
-    query = update.callback_query
-    await query.answer()
+        contacts_data (Mapping): Словарь с категориями контактов.
+        category (str): Название категории.
 
-    _, category = query.data.split("|", 1)
+    Returns:
+        Rendered: Готовое сообщение.
+    """
     contacts = contacts_data.get(category, [])
 
     if not contacts:
-        await query.edit_message_text(
-            f"В категории *{category}* контакты не найдены.", parse_mode="Markdown"
-        )
-        return
+        return Rendered(f"В категории *{category}* контакты не найдены.", parse_mode="Markdown")
 
     lines = [f"📂 *{category}*:\n"]
     for c in contacts:
@@ -99,8 +75,58 @@ async def contacts_category_handler(update: Update, context: ContextTypes.DEFAUL
         [[InlineKeyboardButton("⬅️ Назад", callback_data="contacts_back")]]
     )
 
-    text = "\n".join(lines)
-    await query.edit_message_text(text, parse_mode="Markdown", reply_markup=keyboard)
+    return Rendered("\n".join(lines), parse_mode="Markdown", reply_markup=keyboard)
+
+
+async def contacts_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обрабатывает команду показа контактов.
+
+    Отправляет пользователю список категорий контактов с кнопками.
+
+    Args:
+        update (telegram.Update): Объект обновления Telegram.
+        context (telegram.ext.CallbackContext): Контекст обработчика.
+    """
+    snapshot = await storage.json_snapshot(CONTACTS_FILE, {})
+    screen = render_cache.get(
+        "contacts", None, snapshot.version, lambda: render_categories_screen(snapshot.data)
+    )
+    if not screen:
+        if update.callback_query:
+            await update.callback_query.message.edit_text("Контакты временно недоступны.")
+        else:
+            await update.message.reply_text("Контакты временно недоступны.")
+        return
+
+    if update.callback_query:
+        await update.callback_query.message.edit_text(**screen.as_kwargs())
+    else:
+        await update.message.reply_text(**screen.as_kwargs())
+
+
+async def contacts_category_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обрабатывает выбор категории контактов.
+
+    Отправляет список контактов в выбранной категории с кликабельными номерами.
+
+    Args:
+        update (telegram.Update): Объект обновления Telegram.
+        context (telegram.ext.CallbackContext): Контекст обработчика.
+    """
+    query = update.callback_query
+    await query.answer()
+
+    _, category = query.data.split("|", 1)
+    snapshot = await storage.json_snapshot(CONTACTS_FILE, {})
+    screen = render_cache.get(
+        "contacts_cat",
+        category,
+        snapshot.version,
+        lambda: render_category_screen(snapshot.data, category),
+    )
+    await query.edit_message_text(**screen.as_kwargs())
 
 
 async def contacts_back_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1,10 +1,14 @@
-import json
-import os
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
+from core.data_cache import data_cache, load_json, parse_json
+from core.render_cache import Rendered, render_cache
+from services import storage
 from collections import defaultdict
 
 EVENTS_FILE = "data/events.json"
+# В user_data хранится только номер версии расписания, которое видел пользователь
+VERSION_KEY = "events_version"
+SCHEDULE_CHANGED = "ℹ️ Расписание обновилось"
 
 
 def load_events() -> dict:
@@ -15,10 +19,7 @@ def load_events() -> dict:
         dict: Словарь с мероприятиями по датам.
               Пустой словарь, если файл не найден.
     """
-    if not os.path.exists(EVENTS_FILE):
-        return {}
-    with open(EVENTS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_json(EVENTS_FILE, {})
 
 
 def group_events_by_date(events_data: dict) -> dict:
@@ -79,6 +80,106 @@ def format_events_text(events: list, date: str) -> str:
     return "\n".join(lines)
 
 
+def render_dates_screen(events_data) -> Rendered | None:
+    """
+    Отрисовывает экран выбора даты мероприятий.
+
+    Args:
+        events_data (Mapping): Словарь с мероприятиями по датам.
+
+    Returns:
+        Rendered | None: Готовое сообщение или None, если мероприятий нет.
+    """
+    if not events_data:
+        return None
+    dates = list(group_events_by_date(events_data).keys())
+    return Rendered("Выберите дату мероприятия:", reply_markup=build_dates_keyboard(dates))
+
+
+def render_date_screen(events_data, date: str) -> Rendered | None:
+    """
+    Отрисовывает экран мероприятий на выбранную дату.
+
+    Args:
+        events_data (Mapping): Словарь с мероприятиями по датам.
+        date (str): Дата мероприятий.
+
+    Returns:
+        Rendered | None: Готовое сообщение или None, если мероприятий на дату нет.
+    """
+    events = events_data.get(date)
+    if not events:
+        return None
+    keyboard = InlineKeyboardMarkup(
+        [[InlineKeyboardButton("⬅️ Назад к датам", callback_data="event_back")]]
+    )
+    return Rendered(format_events_text(events, date), parse_mode="Markdown", reply_markup=keyboard)
+
+
+async def get_dates_screen(snapshot=None) -> Rendered | None:
+    """
+    Возвращает экран выбора даты из кэша отрисовки.
+
+    Args:
+        snapshot (Snapshot | None): Уже полученный снимок events.json.
+
+    Returns:
+        Rendered | None: Готовое сообщение или None, если мероприятий нет.
+    """
+    snapshot = snapshot or await storage.json_snapshot(EVENTS_FILE, {})
+    return render_cache.get(
+        "events_dates", None, snapshot.version, lambda: render_dates_screen(snapshot.data)
+    )
+
+
+async def get_date_screen(date: str, snapshot=None) -> Rendered | None:
+    """
+    Возвращает экран мероприятий на дату из кэша отрисовки.
+
+    Args:
+        date (str): Дата мероприятий.
+        snapshot (Snapshot | None): Уже полученный снимок events.json.
+
+    Returns:
+        Rendered | None: Готовое сообщение или None, если мероприятий на дату нет.
+    """
+    snapshot = snapshot or await storage.json_snapshot(EVENTS_FILE, {})
+    return render_cache.get(
+        "events_date", date, snapshot.version, lambda: render_date_screen(snapshot.data, date)
+    )
+
+
+def schedule_changed(user_data: dict, snapshot, date: str | None = None) -> bool:
+    """
+    Запоминает версию расписания, которую видит пользователь, и проверяет,
+    изменилось ли оно с прошлого показа.
+
+    Старая версия берётся из общего кэша снимков, поэтому у пользователя
+    хранится только её номер.
+
+    Args:
+        user_data (dict): context.user_data.
+        snapshot (Snapshot): Актуальный снимок events.json.
+        date (str | None): Дата, изменения которой важны (None — всё расписание).
+
+    Returns:
+        bool: True, если пользователь видел другую версию и она отличается
+              (или её уже нельзя сравнить).
+    """
+    previous = user_data.get(VERSION_KEY)
+    user_data[VERSION_KEY] = snapshot.version
+    if previous is None or previous == snapshot.version:
+        return False
+    old = data_cache.get_version(EVENTS_FILE, parse_json, previous)
+    if old is None:
+        # Версия вытеснена (изменений было несколько) или осталась от прошлого запуска
+        # бота, а файл могли изменить, пока бот не работал: сравнить не с чем
+        return True
+    if date is None:
+        return old.data != snapshot.data
+    return old.data.get(date) != snapshot.data.get(date)
+
+
 async def show_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обработчик команды /events — показывает список дат с мероприятиями.
@@ -87,19 +188,14 @@ async def show_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
         update (telegram.Update): Объект обновления Telegram.
         context (telegram.ext.CallbackContext): Контекст обработчика.
     """
-    events_data = load_events()
-    if not events_data:
+    snapshot = await storage.json_snapshot(EVENTS_FILE, {})
+    screen = await get_dates_screen(snapshot)
+    if not screen:
         await update.message.reply_text("Мероприятия пока не запланированы.")
         return
 
-    grouped_events = group_events_by_date(events_data)
-    dates = list(grouped_events.keys())
-
-    context.user_data["events_grouped"] = grouped_events
-    context.user_data["events_dates"] = dates
-
-    keyboard = build_dates_keyboard(dates)
-    await update.message.reply_text("Выберите дату мероприятия:", reply_markup=keyboard)
+    context.user_data[VERSION_KEY] = snapshot.version
+    await update.message.reply_text(**screen.as_kwargs())
 
 
 async def event_callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -113,33 +209,28 @@ async def event_callback_handler(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     data = query.data
 
-    grouped_events = context.user_data.get("events_grouped")
-    dates = context.user_data.get("events_dates")
-
-    if not grouped_events or not dates:
-        await query.answer("Пожалуйста, заново вызовите команду /events")
-        return
-
     if data.startswith("event_date|"):
         date = data.split("|", 1)[1]
-        events = grouped_events.get(date, [])
+        snapshot = await storage.json_snapshot(EVENTS_FILE, {})
+        changed = schedule_changed(context.user_data, snapshot, date)
+        screen = await get_date_screen(date, snapshot)
 
-        if not events:
+        if not screen:
             await query.answer("Мероприятий на эту дату нет.")
             return
 
-        text = format_events_text(events, date)
-        keyboard = InlineKeyboardMarkup(
-            [[InlineKeyboardButton("⬅️ Назад к датам", callback_data="event_back")]]
-        )
-
-        await query.edit_message_text(text=text, parse_mode="Markdown", reply_markup=keyboard)
-        await query.answer()
+        await query.edit_message_text(**screen.as_kwargs())
+        await query.answer(SCHEDULE_CHANGED if changed else None)
 
     elif data == "event_back":
-        keyboard = build_dates_keyboard(dates)
-        await query.edit_message_text("Выберите дату мероприятия:", reply_markup=keyboard)
-        await query.answer()
+        snapshot = await storage.json_snapshot(EVENTS_FILE, {})
+        changed = schedule_changed(context.user_data, snapshot)
+        screen = await get_dates_screen(snapshot)
+        if not screen:
+            await query.answer("Пожалуйста, заново вызовите команду /events")
+            return
+        await query.edit_message_text(**screen.as_kwargs())
+        await query.answer(SCHEDULE_CHANGED if changed else None)
 
     else:
         await query.answer()
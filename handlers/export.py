@@ -0,0 +1,103 @@
+# handlers/export.py
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from telegram import Update
+from telegram.ext import ContextTypes
+from services.export import export_orders
+
+_executor = None
+
+
+def get_export_executor() -> ProcessPoolExecutor:
+    """
+    Возвращает пул процессов для тяжёлых выгрузок (создаётся при первом вызове).
+
+    Процесс запускается методом spawn, чтобы не наследовать потоки и соединения бота.
+
+    Returns:
+        ProcessPoolExecutor: Пул из одного процесса.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown_export_executor() -> None:
+    """
+    Останавливает пул процессов выгрузки.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def is_admin(update: Update, config: dict) -> bool:
+    """
+    Проверяет, может ли отправитель выполнять административные команды.
+
+    Администраторы перечислены в admin_ids; команды также разрешены в чате операторов.
+
+    Args:
+        update (telegram.Update): Объект обновления Telegram.
+        config (dict): Конфигурация бота.
+
+    Returns:
+        bool: True, если команда разрешена.
+    """
+    user = update.effective_user
+    chat = update.effective_chat
+    if user and user.id in (config.get("admin_ids") or []):
+        return True
+    return bool(chat and chat.id == config.get("operators_chat_id"))
+
+
+async def export_orders_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обрабатывает команду /export_orders — выгружает все заказы в XLSX
+    и отправляет файл в чат операторов.
+
+    Тяжёлая обработка выполняется в отдельном процессе, чтобы не блокировать бота.
+
+    Args:
+        update (telegram.Update): Объект обновления Telegram.
+        context (telegram.ext.CallbackContext): Контекст обработчика.
+    """
+    config = context.application.bot_data["config"]
+    logger = context.application.bot_data["logger"]
+    user = update.effective_user
+
+    if not is_admin(update, config):
+        logger.warning(f"Пользователь {user.id} попытался выгрузить заказы без прав")
+        return
+
+    fmt = "csv" if context.args and context.args[0].lower() == "csv" else "xlsx"
+    await update.message.reply_text("⏳ Формирую выгрузку заказов...")
+
+    loop = asyncio.get_running_loop()
+    try:
+        summary = await loop.run_in_executor(get_export_executor(), export_orders, config, None, fmt)
+    except Exception as e:
+        logger.error(f"Ошибка выгрузки заказов: {e}")
+        await update.message.reply_text("Не удалось сформировать выгрузку заказов.")
+        return
+
+    chat_id = config.get("operators_chat_id") or update.effective_chat.id
+    caption = (
+        f"📦 Заказы сувениров: {summary['orders']}, позиций: {summary['rows']}, "
+        f"сумма: {summary['total']:.2f} ₽"
+    )
+    with open(summary["path"], "rb") as f:
+        await context.bot.send_document(
+            chat_id=chat_id,
+            document=f,
+            filename=os.path.basename(summary["path"]),
+            caption=caption,
+        )
+    if chat_id != update.effective_chat.id:
+        await update.message.reply_text("✅ Выгрузка отправлена в чат операторов.")
+    logger.info(f"Пользователь {user.id} выгрузил заказы: {summary}")
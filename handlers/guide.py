@@ -1,7 +1,8 @@
-import json
-import os
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+from core.data_cache import load_json
+from core.render_cache import Rendered, render_cache
+from services import storage
 
 GUIDE_FILE = "data/guide.json"
 
@@ -14,10 +15,7 @@ def load_guide() -> dict:
         dict: Словарь с категориями и списками мест.
               Пустой словарь, если файл не найден.
     """
-    if not os.path.exists(GUIDE_FILE):
-        return {}
-    with open(GUIDE_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return load_json(GUIDE_FILE, {})
 
 
 def format_phone_number(phone: str) -> str:
@@ -41,64 +39,40 @@ def format_phone_number(phone: str) -> str:
     return digits
 
 
-async def guide_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+def render_categories_screen(guide_data) -> Rendered | None:
     """
-    Обрабатывает команду /guide или вызов меню путеводителя.
-
-    Отправляет пользователю список категорий путеводителя с кнопками.
+    Отрисовывает экран выбора категории путеводителя.
 
     Args:
-        update (telegram.Update): Объект обновления Telegram.
-        context (telegram.ext.CallbackContext): Контекст обработчика.
+        guide_data (Mapping): Словарь с категориями и списками мест.
+
+    Returns:
+        Rendered | None: Готовое сообщение или None, если путеводитель пуст.
     """
-    guide_data = load_guide()
     if not guide_data:
-        if update.callback_query:
-            await update.callback_query.message.edit_text("Путеводитель временно недоступен.")
-        else:
-            await update.message.reply_text("Путеводитель временно недоступен.")
-        return
-
+        return None
     keyboard = [
         [InlineKeyboardButton(cat, callback_data=f"guide_cat|{cat}")]
         for cat in guide_data.keys()
     ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    if update.callback_query:
-        await update.callback_query.message.edit_text(
-            "Выберите категорию путеводителя:",
-            reply_markup=reply_markup,
-        )
-    else:
-        await update.message.reply_text(
-            "Выберите категорию путеводителя:",
-            reply_markup=reply_markup,
-        )
+    return Rendered("Выберите категорию путеводителя:", reply_markup=InlineKeyboardMarkup(keyboard))
 
 
-async def guide_category_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+def render_category_screen(guide_data, category: str) -> Rendered:
     """
-    Обрабатывает выбор категории путеводителя.
-
-    Отправляет список мест в категории с контактами и ссылками.
+    Отрисовывает список мест категории с контактами и ссылками.
 
     Args:
-        update (telegram.Update): Объект обновления Telegram.
-        context (telegram.ext.CallbackContext): Контекст обработчика.
-    """
-    guide_data = load_guide()
-    query = update.callback_query
-    await query.answer()
+        guide_data (Mapping): Словарь с категориями и списками мест.
+        category (str): Название категории.
 
-    _, category = query.data.split("|", 1)
+    Returns:
+        Rendered: Готовое сообщение.
+    """
     places = guide_data.get(category, [])
 
     if not places:
-        await query.edit_message_text(
-            f"В категории *{category}* ничего не найдено.", parse_mode="Markdown"
-        )
-        return
+        return Rendered(f"В категории *{category}* ничего не найдено.", parse_mode="Markdown")
 
     lines = [f"📂 *{category}*:\n"]
     for place in places:
@@ -136,10 +110,63 @@ async def guide_category_handler(update: Update, context: ContextTypes.DEFAULT_T
         [[InlineKeyboardButton("⬅️ Назад", callback_data="guide_back")]]
     )
 
-    text = "\n".join(lines)
-    await query.edit_message_text(
-        text, parse_mode="Markdown", disable_web_page_preview=True, reply_markup=keyboard
+    return Rendered(
+        "\n".join(lines),
+        parse_mode="Markdown",
+        reply_markup=keyboard,
+        disable_web_page_preview=True,
+    )
+
+
+async def guide_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обрабатывает команду /guide или вызов меню путеводителя.
+
+    Отправляет пользователю список категорий путеводителя с кнопками.
+
+    Args:
+        update (telegram.Update): Объект обновления Telegram.
+        context (telegram.ext.CallbackContext): Контекст обработчика.
+    """
+    snapshot = await storage.json_snapshot(GUIDE_FILE, {})
+    screen = render_cache.get(
+        "guide", None, snapshot.version, lambda: render_categories_screen(snapshot.data)
+    )
+    if not screen:
+        if update.callback_query:
+            await update.callback_query.message.edit_text("Путеводитель временно недоступен.")
+        else:
+            await update.message.reply_text("Путеводитель временно недоступен.")
+        return
+
+    if update.callback_query:
+        await update.callback_query.message.edit_text(**screen.as_kwargs())
+    else:
+        await update.message.reply_text(**screen.as_kwargs())
+
+
+async def guide_category_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обрабатывает выбор категории путеводителя.
+
+    Отправляет список мест в категории с контактами и ссылками.
+
+    Args:
+        update (telegram.Update): Объект обновления Telegram.
+        context (telegram.ext.CallbackContext): Контекст обработчика.
+    """
+    query = update.callback_query
+    await query.answer()
+
+    _, category = query.data.split("|", 1)
+    snapshot = await storage.json_snapshot(GUIDE_FILE, {})
+    screen = render_cache.get(
+        "guide_cat",
+        category,
+        snapshot.version,
+        lambda: render_category_screen(snapshot.data, category),
     )
+    await query.edit_message_text(**screen.as_kwargs())
 
 
 async def guide_back_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
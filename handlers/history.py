@@ -0,0 +1,58 @@
+# handlers/history.py
+
+import asyncio
+from telegram import Update
+from telegram.ext import ContextTypes
+from handlers.export import is_admin
+from services.users import read_user_history
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+MESSAGE_LIMIT = 4000
+
+
+async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обрабатывает команду /history <user_id> [N] — показывает последние N записей
+    лога активности пользователя (по умолчанию 20).
+
+    Записи находятся по индексу журнала, без просмотра логов целиком.
+
+    Args:
+        update (telegram.Update): Объект обновления Telegram.
+        context (telegram.ext.CallbackContext): Контекст обработчика.
+    """
+    config = context.application.bot_data["config"]
+    logger = context.application.bot_data["logger"]
+    user = update.effective_user
+
+    if not is_admin(update, config):
+        logger.warning(f"Пользователь {user.id} запросил историю без прав")
+        return
+
+    args = context.args or []
+    if not args or not args[0].lstrip("-").isdigit():
+        await update.message.reply_text("Использование: /history <user_id> [количество]")
+        return
+    target_id = int(args[0])
+    limit = DEFAULT_LIMIT
+    if len(args) > 1 and args[1].isdigit():
+        limit = min(max(int(args[1]), 1), MAX_LIMIT)
+
+    loop = asyncio.get_running_loop()
+    entries = await loop.run_in_executor(None, read_user_history, target_id, config["logs_dir"], limit)
+    if not entries:
+        await update.message.reply_text(f"Записей для пользователя {target_id} нет.")
+        return
+
+    # Telegram ограничивает длину сообщения: при переполнении оставляем самые свежие записи
+    lines = []
+    size = 0
+    for entry in reversed(entries):
+        size += len(entry) + 1
+        if size > MESSAGE_LIMIT:
+            break
+        lines.append(entry)
+    header = f"🕑 Последние записи пользователя {target_id} ({len(lines)} из {len(entries)}):\n\n"
+    await update.message.reply_text(header + "\n".join(reversed(lines)))
+    logger.info(f"Пользователь {user.id} запросил историю пользователя {target_id}")
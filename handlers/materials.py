@@ -1,12 +1,64 @@
-import os
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
+from core.render_cache import Rendered, render_cache
+from services import storage
+from services.file_ids import DOCUMENT, send_file
+from services.materials import format_size
+
+
+def build_materials_keyboard(catalog, page: int) -> InlineKeyboardMarkup:
+    """
+    Формирует клавиатуру страницы меню материалов.
+
+    Args:
+        catalog (MaterialsCatalog): Каталог материалов.
+        page (int): Номер страницы (с нуля).
+
+    Returns:
+        InlineKeyboardMarkup: Кнопки файлов страницы и навигация по страницам.
+    """
+    keyboard = [
+        [InlineKeyboardButton(f"{m.name} ({format_size(m.size)})", callback_data=f"material|{m.id}")]
+        for m in catalog.page(page)
+    ]
+    if catalog.pages > 1:
+        nav = []
+        if page > 0:
+            nav.append(InlineKeyboardButton("⬅️", callback_data=f"materials_page|{page - 1}"))
+        nav.append(InlineKeyboardButton(f"{page + 1}/{catalog.pages}", callback_data=f"materials_page|{page}"))
+        if page < catalog.pages - 1:
+            nav.append(InlineKeyboardButton("➡️", callback_data=f"materials_page|{page + 1}"))
+        keyboard.append(nav)
+    return InlineKeyboardMarkup(keyboard)
+
+
+def get_materials_screen(catalog, page: int) -> Rendered:
+    """
+    Возвращает страницу меню материалов из кэша отрисовки.
+
+    Args:
+        catalog (MaterialsCatalog): Каталог материалов.
+        page (int): Номер страницы (с нуля).
+
+    Returns:
+        Rendered: Готовое сообщение.
+    """
+    page = min(max(page, 0), catalog.pages - 1)
+    return render_cache.get(
+        "materials_page",
+        page,
+        catalog.version,
+        lambda: Rendered(
+            "Вы можете скачать следующие материалы:",
+            reply_markup=build_materials_keyboard(catalog, page),
+        ),
+    )
 
 
 async def materials_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обрабатывает команду показа меню материалов.
-    Отправляет пользователю список доступных файлов для скачивания в виде кнопок.
+    Отправляет пользователю первую страницу списка файлов в виде кнопок.
 
     Args:
         update (telegram.Update): Объект обновления Telegram.
@@ -14,36 +66,21 @@ async def materials_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     config = context.application.bot_data["config"]
     materials_dir = config.get("materials_dir", "data/materials")
-    logger = context.application.bot_data["logger"]
-
-    try:
-        files = os.listdir(materials_dir)
-        files = [f for f in files if os.path.isfile(os.path.join(materials_dir, f))]
-    except Exception as e:
-        logger.error(f"Ошибка при чтении папки материалов: {e}")
-        await update.message.reply_text("Ошибка при загрузке списка материалов.")
-        return
 
-    if not files:
+    catalog = await storage.materials_catalog(materials_dir)
+    if not catalog:
         await update.message.reply_text("Материалы пока отсутствуют.")
         return
 
-    keyboard = [
-        [InlineKeyboardButton(text=filename, callback_data=f"material_{filename}")]
-        for filename in files
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    await update.message.reply_text(
-        "Вы можете скачать следующие материалы:",
-        reply_markup=reply_markup,
-    )
+    await update.message.reply_text(**get_materials_screen(catalog, 0).as_kwargs())
 
 
 async def material_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    Обрабатывает нажатие кнопки с материалом.
-    Отправляет файл пользователю, если он существует.
+    Обрабатывает нажатие кнопки меню материалов: переключение страницы
+    или выбор файла.
+    Отправляет файл пользователю, если он существует. Файл загружается
+    в Telegram один раз, дальше отправляется по сохранённому file_id.
 
     Args:
         update (telegram.Update): Объект обновления Telegram.
@@ -53,25 +90,40 @@ async def material_button_handler(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
 
     data = query.data
-    if not data.startswith("material_"):
-        return
-
-    filename = data[len("material_") :]
     config = context.application.bot_data["config"]
     materials_dir = config.get("materials_dir", "data/materials")
     logger = context.application.bot_data["logger"]
+    catalog = await storage.materials_catalog(materials_dir)
 
-    file_path = os.path.join(materials_dir, filename)
+    if data.startswith("materials_page|"):
+        page = data.split("|", 1)[1]
+        if not catalog or not page.isdigit():
+            return
+        screen = get_materials_screen(catalog, int(page))
+        if query.message and query.message.reply_markup == screen.reply_markup:
+            return  # нажата кнопка текущей страницы
+        await query.edit_message_text(**screen.as_kwargs())
+        return
+
+    if data.startswith("material|"):
+        material = catalog.get(data.split("|", 1)[1])
+    elif data.startswith("material_"):
+        # Кнопки из сообщений, отправленных до перехода на короткие идентификаторы
+        material = catalog.by_name.get(data[len("material_") :])
+    else:
+        return
 
-    if not os.path.isfile(file_path):
+    if material is None:
         await query.edit_message_text("Файл не найден.")
-        logger.warning(f"Пользователь {query.from_user.id} запросил несуществующий файл: {filename}")
+        logger.warning(f"Пользователь {query.from_user.id} запросил несуществующий файл: {data}")
         return
 
     try:
-        with open(file_path, "rb") as f:
-            await context.bot.send_document(chat_id=query.from_user.id, document=f, filename=filename)
-        logger.info(f"Пользователь {query.from_user.id} скачал материал: {filename}")
+        await send_file(context.bot, query.from_user.id, material.path, DOCUMENT, filename=material.name)
+        logger.info(f"Пользователь {query.from_user.id} скачал материал: {material.name}")
+    except FileNotFoundError:
+        await query.edit_message_text("Файл не найден.")
+        logger.warning(f"Пользователь {query.from_user.id} запросил удалённый файл: {material.name}")
     except Exception as e:
-        logger.error(f"Ошибка при отправке файла {filename} пользователю {query.from_user.id}: {e}")
+        logger.error(f"Ошибка при отправке файла {material.name} пользователю {query.from_user.id}: {e}")
         await query.edit_message_text("Не удалось отправить файл. Попробуйте позже.")
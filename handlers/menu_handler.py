@@ -1,6 +1,7 @@
 # handlers/menu_handler.py
 
 from telegram.ext import ContextTypes
+from core.router import Router
 from handlers.events import show_events
 from handlers.tours import show_tours
 from handlers.commands import send_menu
@@ -21,6 +22,10 @@ MENU_ACTIONS = {
     "📞 Контакты": contacts_handler,
 }
 
+menu_router = Router("меню")
+for menu_text, menu_action in MENU_ACTIONS.items():
+    menu_router.add(menu_text, menu_action)
+
 
 async def menu_text_handler(update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -49,7 +54,7 @@ async def menu_text_handler(update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data["current_menu"] = "souvenirs"
         return
 
-    handler = MENU_ACTIONS.get(text)
+    handler = menu_router.match(text)
     if handler:
         await handler(update, context)
         context.user_data.pop("current_menu", None)
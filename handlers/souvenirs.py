@@ -2,8 +2,8 @@
 
 from telegram import ReplyKeyboardMarkup, KeyboardButton, WebAppInfo
 from telegram.ext import ContextTypes
-from services.messages import load_message
-from services.orders import read_order
+from services import storage
+from services.orders import has_open_order
 
 
 def get_souvenirs_menu(webapp_url: str, has_order: bool) -> ReplyKeyboardMarkup:
@@ -38,20 +38,13 @@ async def souvenirs_menu(update, context: ContextTypes.DEFAULT_TYPE):
     """
     user = update.effective_user
     config = context.application.bot_data["config"]
-    logger = context.application.bot_data["logger"]
 
-    info_text = load_message("souvenirs.txt")
+    info_text = await storage.load_message("souvenirs.txt")
     if not info_text:
         info_text = "Информация о сувенирах временно недоступна."
     await update.message.reply_text(info_text)
 
-    try:
-        order = read_order(user.id, config["orders_dir"])
-        has_order = bool(order)
-    except Exception as e:
-        logger.error(f"Ошибка при проверке заказа пользователя {user.id}: {e}")
-        has_order = False
-
+    has_order = has_open_order(user.id, config["orders_dir"])
     keyboard = get_souvenirs_menu(config["webapp_url"], has_order)
     await update.message.reply_text("Меню сувениров:", reply_markup=keyboard)
 
@@ -72,19 +65,13 @@ async def souvenirs_menu_handler(update, context: ContextTypes.DEFAULT_TYPE):
     logger = context.application.bot_data["logger"]
 
     async def update_keyboard():
-        try:
-            order = read_order(user.id, config["orders_dir"])
-            has_order = bool(order)
-        except Exception as e:
-            logger.error(f"Ошибка при проверке заказа пользователя {user.id}: {e}")
-            has_order = False
-
+        has_order = has_open_order(user.id, config["orders_dir"])
         keyboard = get_souvenirs_menu(config["webapp_url"], has_order)
         await update.message.reply_text("Меню сувениров:", reply_markup=keyboard)
 
     if text == "Посмотреть заказ":
         try:
-            order = read_order(user.id, config["orders_dir"])
+            order = await storage.read_order(user.id, config["orders_dir"])
             if not order:
                 await update.message.reply_text("У вас нет текущих заказов.")
                 await update_keyboard()
@@ -115,9 +102,7 @@ async def souvenirs_menu_handler(update, context: ContextTypes.DEFAULT_TYPE):
             await update_keyboard()
 
     elif text == "Отменить заказ":
-        from services.orders import remove_order
-
-        if remove_order(user.id, config["orders_dir"], logger):
+        if await storage.remove_order(user.id, config["orders_dir"], logger):
             await update.message.reply_text("Ваш заказ успешно удалён.")
         else:
             await update.message.reply_text("У вас нет заказов для удаления.")
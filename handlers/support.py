@@ -10,6 +10,7 @@ from telegram.ext import (
     filters,
 )
 from handlers.commands import send_menu  # Импорт функции показа главного меню
+from services import storage
 
 ASKING_QUESTION = 1
 CANCEL_CALLBACK = "cancel_support"
@@ -43,7 +44,8 @@ async def receive_support_question(update: Update, context: ContextTypes.DEFAULT
     """
     Обрабатывает полученный вопрос пользователя и пересылает его в чат операторов.
 
-    Сохраняет связь между ID сообщения оператора и пользователем для ответа.
+    Сохраняет связь между ID сообщения оператора и пользователем для ответа
+    в хранилище обращений (переживает перезапуск бота).
 
     Args:
         update (telegram.Update): Объект обновления Telegram.
@@ -68,8 +70,7 @@ async def receive_support_question(update: Update, context: ContextTypes.DEFAULT
         sent_message = await context.bot.send_message(chat_id=chat_id, text=message)
 
         # Сохраняем соответствие operator_message_id -> (user_id, вопрос)
-        operator_msg_map = context.application.bot_data.setdefault("operator_msg_map", {})
-        operator_msg_map[sent_message.message_id] = {"user_id": user.id, "question": question}
+        await storage.save_ticket(chat_id, sent_message.message_id, user.id, question)
 
         await update.message.reply_text("✅ Ваш запрос отправлен оператору. Возвращаемся в главное меню.")
         if logger:
@@ -120,8 +121,7 @@ async def operator_reply_handler(update: Update, context: ContextTypes.DEFAULT_T
         return  # Игнорируем, если это не ответ на сообщение
 
     operator_msg_id = message.reply_to_message.message_id
-    operator_msg_map = context.application.bot_data.get("operator_msg_map", {})
-    data = operator_msg_map.get(operator_msg_id)
+    data = await storage.find_ticket(message.chat.id, operator_msg_id)
 
     if not data:
         if logger:
@@ -139,6 +139,7 @@ async def operator_reply_handler(update: Update, context: ContextTypes.DEFAULT_T
             f"*Ответ:* {answer}"
         )
         await context.bot.send_message(chat_id=user_id, text=text, parse_mode="Markdown")
+        await storage.mark_ticket_answered(message.chat.id, operator_msg_id)
         if logger:
             logger.info(f"Переслан ответ оператора пользователю {user_id}")
     except Exception as e:
@@ -1,29 +1,18 @@
 # handlers/tours.py
 
-import os
 import re
-import aiohttp
-from collections import defaultdict
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from services.tours import load_tours
-from services.registrations import get_user_registrations, save_user_registrations
+from core.render_cache import Rendered, render_cache
+from services import storage
+from services.capacity import FULL, REGISTERED, get_capacity_engine
+from services.file_ids import PHOTO, send_file
+from services.http_client import get_http_client
+from services.tours import get_tour_catalog_version
 
-
-def group_tours_by_date(tours):
-    """
-    Группирует список туров по дате.
-
-    Args:
-        tours (list): Список туров (словарей).
-
-    Returns:
-        dict: Отсортированный словарь с ключами — датами и значениями — списками туров.
-    """
-    grouped = defaultdict(list)
-    for tour in tours:
-        grouped[tour["date"]].append(tour)
-    return dict(sorted(grouped.items()))
+# В user_data хранится только номер версии каталога, который видел пользователь
+VERSION_KEY = "tours_version"
+SCHEDULE_CHANGED = "ℹ️ Расписание обновилось"
 
 
 def is_valid_image_url(url: str) -> bool:
@@ -45,18 +34,16 @@ async def url_exists(url: str) -> bool:
     """
     Асинхронно проверяет доступность URL (HEAD запрос).
 
+    Использует общий HTTP-клиент: результат кэшируется, повторная проверка
+    того же URL в пределах срока жизни кэша не обращается к сети.
+
     Args:
         url (str): Проверяемый URL.
 
     Returns:
         bool: True, если статус ответа 200, иначе False.
     """
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.head(url, timeout=5) as resp:
-                return resp.status == 200
-    except Exception:
-        return False
+    return await get_http_client().url_exists(url)
 
 
 async def send_tour_message(
@@ -69,6 +56,10 @@ async def send_tour_message(
     """
     Отправляет сообщение с описанием тура и изображением (если доступно).
 
+    Доступность URL берётся из кэша проверок; новый URL проверяется не
+    дольше секунды, иначе сообщение уходит без изображения, а проверка
+    продолжается в фоне и пригодится при следующем показе.
+
     Args:
         update (telegram.Update): Объект обновления Telegram.
         context (telegram.ext.CallbackContext): Контекст обработчика.
@@ -78,21 +69,25 @@ async def send_tour_message(
     """
     logger = context.application.bot_data["logger"]
 
-    if image_url and os.path.isfile(image_url):
+    if image_url and not image_url.startswith(("http://", "https://")) and await storage.is_file(image_url):
         try:
-            with open(image_url, "rb") as photo_file:
-                await update.message.reply_photo(
-                    photo=photo_file,
-                    caption=text,
-                    parse_mode="Markdown",
-                    reply_markup=keyboard,
-                )
+            await send_file(
+                context.bot,
+                update.effective_chat.id,
+                image_url,
+                PHOTO,
+                caption=text,
+                parse_mode="Markdown",
+                reply_markup=keyboard,
+            )
             return
         except Exception as e:
             logger.error(f"Ошибка отправки локального изображения: {e}")
 
     if image_url and is_valid_image_url(image_url):
-        if await url_exists(image_url):
+        client = get_http_client()
+        # Новый URL проверяется с коротким ожиданием, известный — из кэша
+        if await client.url_status(image_url):
             try:
                 await update.message.reply_photo(
                     photo=image_url,
@@ -121,25 +116,31 @@ def build_dates_keyboard(dates):
     return InlineKeyboardMarkup(keyboard)
 
 
-def build_tours_keyboard(user_regs, tours):
+def build_tours_keyboard(user_regs, tours, engine=None):
     """
     Формирует клавиатуру с кнопками туров на выбранную дату,
-    учитывая статус регистрации пользователя.
+    учитывая статус регистрации пользователя и свободные места.
 
     Args:
         user_regs (set): Множество ID туров, на которые пользователь записан.
         tours (list): Список туров на дату.
+        engine (TourCapacityEngine | None): Движок записи для подсчёта свободных мест.
 
     Returns:
         InlineKeyboardMarkup: Клавиатура с кнопками туров и кнопкой назад.
     """
     keyboard = []
     for tour in tours:
+        remaining = engine.remaining(tour) if engine else None
+        seats = ""
+        if remaining is not None:
+            seats = f" (мест: {remaining})" if remaining else " (мест нет)"
+
         if tour["id"] in user_regs:
-            text = f"✅ {tour['time']} - {tour['name']}"
+            text = f"✅ {tour['time']} - {tour['name']}{seats}"
             callback_data = f"unregister|{tour['id']}"
         else:
-            text = f"❌ {tour['time']} - {tour['name']}"
+            text = f"❌ {tour['time']} - {tour['name']}{seats}"
             callback_data = f"register|{tour['id']}"
         keyboard.append([InlineKeyboardButton(text, callback_data=callback_data)])
 
@@ -147,6 +148,81 @@ def build_tours_keyboard(user_regs, tours):
     return InlineKeyboardMarkup(keyboard)
 
 
+def format_tours_text(catalog, date: str) -> str:
+    """
+    Форматирует описание туров на выбранную дату.
+
+    Args:
+        catalog (TourCatalog): Каталог экскурсий.
+        date (str): Дата туров.
+
+    Returns:
+        str: Текст сообщения в разметке Markdown.
+    """
+    text = f"Туры на {date}:\n"
+    for tr in catalog.tours_on(date):
+        text += (
+            f"\n🕒 {catalog.time_ranges[tr['id']]}\n*{tr['name']}*\n_{tr['description']}_\n"
+            f"💰 Цена: {tr['price']} ₽"
+        )
+        if tr.get("link"):
+            text += f"\n🔗 [Подробнее]({tr['link']})"
+        text += "\n"
+    return text
+
+
+def get_dates_screen(catalog) -> Rendered:
+    """
+    Возвращает экран выбора даты туров из кэша отрисовки.
+
+    Args:
+        catalog (TourCatalog): Каталог экскурсий.
+
+    Returns:
+        Rendered: Готовое сообщение.
+    """
+    return render_cache.get(
+        "tours_dates",
+        None,
+        catalog.version,
+        lambda: Rendered("Выберите дату тура:", reply_markup=build_dates_keyboard(catalog.dates)),
+    )
+
+
+def catalog_changed(user_data: dict, catalog, date: str | None = None, tour_id: str | None = None) -> bool:
+    """
+    Запоминает версию каталога, которую видит пользователь, и проверяет,
+    изменились ли с прошлого показа туры на дату или конкретный тур.
+
+    Старая версия берётся из общего хранилища последних каталогов, поэтому
+    у пользователя хранится только её номер.
+
+    Args:
+        user_data (dict): context.user_data.
+        catalog (TourCatalog): Актуальный каталог.
+        date (str | None): Дата, изменения которой важны.
+        tour_id (str | None): Тур, изменения которого важны.
+
+    Returns:
+        bool: True, если пользователь видел другую версию и она отличается
+              (или её уже нельзя сравнить).
+    """
+    previous = user_data.get(VERSION_KEY)
+    user_data[VERSION_KEY] = catalog.version
+    if previous is None or previous == catalog.version:
+        return False
+    old = get_tour_catalog_version(previous)
+    if old is None:
+        # Версия вытеснена (изменений было несколько) или осталась от прошлого запуска
+        # бота, а файл могли изменить, пока бот не работал: сравнить не с чем
+        return True
+    if tour_id is not None:
+        return old.get(tour_id) != catalog.get(tour_id)
+    if date is not None:
+        return old.tours_on(date) != catalog.tours_on(date)
+    return old.dates != catalog.dates
+
+
 async def show_tours(update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обработчик команды /tours — показывает список дат с турами.
@@ -155,20 +231,13 @@ async def show_tours(update, context: ContextTypes.DEFAULT_TYPE):
         update (telegram.Update): Объект обновления Telegram.
         context (telegram.ext.CallbackContext): Контекст обработчика.
     """
-    tours = load_tours()
-    if not tours:
+    catalog = await storage.tour_catalog()
+    if not catalog:
         await update.message.reply_text("Туры пока не запланированы.")
         return
 
-    grouped = group_tours_by_date(tours)
-    dates = list(grouped.keys())
-
-    # Сохраняем в user_data для навигации
-    context.user_data["tours_grouped"] = grouped
-    context.user_data["tours_dates"] = dates
-
-    keyboard = build_dates_keyboard(dates)
-    await update.message.reply_text("Выберите дату тура:", reply_markup=keyboard)
+    context.user_data[VERSION_KEY] = catalog.version
+    await update.message.reply_text(**get_dates_screen(catalog).as_kwargs())
 
 
 async def tour_callback_handler(update, context: ContextTypes.DEFAULT_TYPE):
@@ -182,68 +251,72 @@ async def tour_callback_handler(update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     user_id = query.from_user.id
     data = query.data
-
-    user_regs = get_user_registrations(user_id)
-    grouped = context.user_data.get("tours_grouped", {})
-    dates = context.user_data.get("tours_dates", [])
+    catalog = await storage.tour_catalog()
 
     if data.startswith("date|"):
         selected_date = data.split("|", 1)[1]
-        tours_on_date = grouped.get(selected_date, [])
+        changed = catalog_changed(context.user_data, catalog, date=selected_date)
+        tours_on_date = catalog.tours_on(selected_date)
 
         if not tours_on_date:
             await query.answer("Туров на эту дату нет.")
             return
 
-        text = f"Туры на {selected_date}:\n"
-        for tr in tours_on_date:
-            start = tr.get("time", "")
-            end = tr.get("end_time", "")
-            time_period = f"{start} - {end}" if end else start
-            text += (
-                f"\n🕒 {time_period}\n*{tr['name']}*\n_{tr['description']}_\n"
-                f"💰 Цена: {tr['price']} ₽"
-            )
-            if tr.get("link"):
-                text += f"\n🔗 [Подробнее]({tr['link']})"
-            text += "\n"
-
-        kb = build_tours_keyboard(user_regs, tours_on_date)
+        text = render_cache.get(
+            "tours_date",
+            selected_date,
+            catalog.version,
+            lambda: format_tours_text(catalog, selected_date),
+        )
+        kb = build_tours_keyboard(
+            await storage.get_user_registrations(user_id), tours_on_date, get_capacity_engine()
+        )
 
         await query.edit_message_text(text=text, parse_mode="Markdown", reply_markup=kb)
-        await query.answer()
+        await query.answer(SCHEDULE_CHANGED if changed else None)
 
     elif data == "back_to_dates":
-        keyboard = build_dates_keyboard(dates)
-        await query.edit_message_text("Выберите дату тура:", reply_markup=keyboard)
-        await query.answer()
+        changed = catalog_changed(context.user_data, catalog)
+        await query.edit_message_text(**get_dates_screen(catalog).as_kwargs())
+        await query.answer(SCHEDULE_CHANGED if changed else None)
 
     elif data.startswith("register|") or data.startswith("unregister|"):
         action, tour_id = data.split("|", 1)
+        engine = get_capacity_engine()
+        tour = catalog.get(tour_id)
+
+        if not tour:
+            await query.answer("Тур не найден")
+            await query.edit_message_reply_markup(reply_markup=get_dates_screen(catalog).reply_markup)
+            return
+
+        if action == "register" and catalog_changed(context.user_data, catalog, tour_id=tour_id):
+            # Пользователь видел старые время или цену: показываем актуальные перед записью
+            await query.answer(f"{SCHEDULE_CHANGED}, проверьте детали тура", show_alert=True)
+            await query.edit_message_text(
+                text=render_cache.get(
+                    "tours_date", tour["date"], catalog.version, lambda: format_tours_text(catalog, tour["date"])
+                ),
+                parse_mode="Markdown",
+                reply_markup=build_tours_keyboard(
+                    await storage.get_user_registrations(user_id), catalog.tours_on(tour["date"]), engine
+                ),
+            )
+            return
 
         if action == "register":
-            user_regs.add(tour_id)
-            await query.answer("Вы записаны на тур")
+            result, user_regs = await engine.register(user_id, tour)
+            if result == FULL:
+                await query.answer("К сожалению, свободных мест нет", show_alert=True)
+            elif result == REGISTERED:
+                await query.answer("Вы записаны на тур")
+            else:
+                await query.answer("Вы уже записаны на тур")
         else:
-            user_regs.discard(tour_id)
+            _, user_regs = await engine.unregister(user_id, tour_id)
             await query.answer("Вы отписались от тура")
 
-        save_user_registrations(user_id, user_regs)
-
-        # Находим дату тура по ID
-        tour_date = None
-        for date_key, tours_list in grouped.items():
-            if any(t["id"] == tour_id for t in tours_list):
-                tour_date = date_key
-                break
-
-        if not tour_date:
-            keyboard = build_dates_keyboard(dates)
-            await query.edit_message_reply_markup(reply_markup=keyboard)
-            return
-
-        tours_on_date = grouped.get(tour_date, [])
-        kb = build_tours_keyboard(user_regs, tours_on_date)
+        kb = build_tours_keyboard(user_regs, catalog.tours_on(tour["date"]), engine)
         await query.edit_message_reply_markup(reply_markup=kb)
 
     else:
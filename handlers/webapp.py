@@ -3,7 +3,7 @@
 import json
 from telegram.ext import ContextTypes
 from telegram import ReplyKeyboardRemove
-from services.orders import save_order
+from services import storage
 from services.users import log_user_message
 from handlers.souvenirs import get_souvenirs_menu  # Для обновления клавиатуры
 
@@ -18,17 +18,10 @@ async def send_updated_souvenirs_menu(update, context):
     """
     user = update.effective_user
     config = context.application.bot_data["config"]
-    logger = context.application.bot_data["logger"]
-
-    from services.orders import read_order
 
-    try:
-        order = read_order(user.id, config["orders_dir"])
-        has_order = bool(order)
-    except Exception as e:
-        logger.error(f"Ошибка при проверке заказа пользователя {user.id}: {e}")
-        has_order = False
+    from services.orders import has_open_order
 
+    has_order = has_open_order(user.id, config["orders_dir"])
     keyboard = get_souvenirs_menu(config["webapp_url"], has_order)
     await update.message.reply_text("Меню сувениров:", reply_markup=keyboard)
 
@@ -49,7 +42,7 @@ async def webapp_data_handler(update, context: ContextTypes.DEFAULT_TYPE):
     logger = context.application.bot_data["logger"]
 
     data_str = update.message.web_app_data.data
-    log_user_message(user.id, user.username, f"WebApp data: {data_str}", config["logs_dir"], logger)
+    await log_user_message(user.id, user.username, f"WebApp data: {data_str}", config["logs_dir"], logger)
 
     try:
         data = json.loads(data_str)
@@ -58,9 +51,7 @@ async def webapp_data_handler(update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     if data.get("cancelOrder"):
-        from services.orders import remove_order
-
-        if remove_order(user.id, config["orders_dir"], logger):
+        if await storage.remove_order(user.id, config["orders_dir"], logger):
             await update.message.reply_text("✅ Заказ успешно отменён.")
             await context.bot.send_message(
                 chat_id=user.id,
@@ -79,7 +70,7 @@ async def webapp_data_handler(update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Корзина пуста. Заказ не оформлен.")
         return
 
-    save_order(user.id, user.username, fio, "", items, config["orders_dir"], logger)
+    await storage.save_order(user.id, user.username, fio, "", items, config["orders_dir"], logger)
 
     text = f"Спасибо, {fio}!\nВаш заказ обновлён:\n"
     for item in items:
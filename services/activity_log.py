@@ -0,0 +1,328 @@
+# services/activity_log.py
+
+import bisect
+import gzip
+import os
+import re
+import struct
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+
+SEGMENT_SIZE = 4 * 1024 * 1024
+BLOCK_SIZE = 64 * 1024
+# Столько последних записей пользователя держится в памяти (MAX_LIMIT команды /history)
+KEEP_PER_USER = 200
+INDEX_FILE = "index.bin"
+# user_id, номер сегмента, смещение в несжатом сегменте, длина записи
+INDEX_RECORD = struct.Struct("<qIQI")
+# смещение блока в несжатом сегменте, смещение и длина gzip-блока в файле
+BLOCK_RECORD = struct.Struct("<QQI")
+SEGMENT_RE = re.compile(r"^seg-(\d{6})\.(log|log\.gz)$")
+UNESCAPE_RE = re.compile(r"\\(.)")
+
+
+def _segment_name(segment: int) -> str:
+    return f"seg-{segment:06d}.log"
+
+
+class SegmentedActivityLog:
+    """
+    Общий журнал активности пользователей из сегментов с индексом по user_id.
+
+    Записи дописываются в активный сегмент seg-NNNNNN.log строками
+    "<user_id>\\t<строка лога>". Когда сегмент превышает segment_size, он
+    закрывается и сжимается в seg-NNNNNN.log.gz независимыми gzip-блоками
+    (файл остаётся обычным gzip, его можно читать zcat), а таблица блоков
+    сохраняется в seg-NNNNNN.blocks. Индекс index.bin — записи фиксированной
+    длины (user_id, сегмент, смещение, длина), поэтому история пользователя
+    читается точечно: без просмотра журнала и с распаковкой только нужных
+    блоков. В памяти держатся позиции только последних keep_per_user записей
+    каждого пользователя, поэтому её расход не растёт с длиной журнала.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = SEGMENT_SIZE,
+        block_size: int = BLOCK_SIZE,
+        keep_per_user: int = KEEP_PER_USER,
+    ):
+        """
+        Args:
+            directory (str): Директория журнала.
+            segment_size (int): Размер сегмента, после которого начинается новый, байты.
+            block_size (int): Размер несжатого блока внутри закрытого сегмента, байты.
+            keep_per_user (int): Сколько последних записей пользователя доступно через tail().
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.block_size = block_size
+        self.keep_per_user = keep_per_user
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._counts = {}
+        self._blocks = {}
+        self._block_cache = OrderedDict()
+        self._compressed = set()
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    # --- Открытие и восстановление ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open(self) -> None:
+        plain, compressed = set(), set()
+        for name in os.listdir(self.directory):
+            match = SEGMENT_RE.match(name)
+            if match:
+                (compressed if match.group(2) == "log.gz" else plain).add(int(match.group(1)))
+
+        # Несжатый сегмент, у которого уже есть .gz, не успел удалиться после сжатия
+        for segment in plain & compressed:
+            os.remove(self._path(_segment_name(segment)))
+        plain -= compressed
+        self._compressed = compressed
+
+        self._active = max(plain | compressed | {0})
+        if self._active in compressed or self._active == 0:
+            self._active += 1
+        # Все несжатые сегменты, кроме активного, остались от аварийной остановки
+        for segment in sorted(plain - {self._active}):
+            self._compress(segment)
+
+        self._load_index()
+        self._recover_tail()
+        self._segment = open(self._path(_segment_name(self._active)), "ab")
+        self._index = open(self._path(INDEX_FILE), "ab")
+
+    def _remember(self, user_id: int, segment: int, offset: int, length: int) -> None:
+        # Две 64-битные ячейки на запись: (сегмент << 32 | длина) и смещение
+        positions = self._positions.get(user_id)
+        if positions is None:
+            positions = self._positions[user_id] = array("Q")
+        positions.append(segment << 32 | length)
+        positions.append(offset)
+        self._counts[user_id] = self._counts.get(user_id, 0) + 1
+        # Старые позиции отбрасываются пачкой, когда их набирается вдвое больше нужного
+        if len(positions) >= 4 * self.keep_per_user:
+            del positions[: len(positions) - 2 * self.keep_per_user]
+
+    def _load_index(self) -> None:
+        path = self._path(INDEX_FILE)
+        active_size = self._active_size()
+        valid = 0
+        self._indexed_end = 0
+        if not os.path.exists(path):
+            return
+        with open(path, "r+b") as f:
+            # Индекс читается частями: целиком в памяти он не нужен
+            while chunk := f.read(INDEX_RECORD.size * 65536):
+                broken = False
+                for user_id, segment, offset, length in INDEX_RECORD.iter_unpack(
+                    chunk[: len(chunk) - len(chunk) % INDEX_RECORD.size]
+                ):
+                    if segment == self._active:
+                        if offset + length > active_size:
+                            broken = True  # запись индекса пережила запись данных (обрыв при сбое)
+                            break
+                        self._indexed_end = max(self._indexed_end, offset + length)
+                    self._remember(user_id, segment, offset, length)
+                    valid += INDEX_RECORD.size
+                if broken or len(chunk) % INDEX_RECORD.size:
+                    break
+            if valid != os.fstat(f.fileno()).st_size:
+                f.truncate(valid)
+
+    def _active_size(self) -> int:
+        try:
+            return os.path.getsize(self._path(_segment_name(self._active)))
+        except FileNotFoundError:
+            return 0
+
+    def _recover_tail(self) -> None:
+        """
+        Дописывает в индекс строки активного сегмента, не попавшие в него при
+        сбое, и отрезает недописанную последнюю строку.
+        """
+        offset = self._indexed_end
+        size = self._active_size()
+        if offset >= size:
+            return
+        records = []
+        with open(self._path(_segment_name(self._active)), "r+b") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                user_id = line.split(b"\t", 1)[0]
+                if user_id.lstrip(b"-").isdigit():
+                    records.append((int(user_id), self._active, offset, len(line)))
+                offset += len(line)
+            if offset < size:
+                f.truncate(offset)
+        with open(self._path(INDEX_FILE), "ab") as index:
+            for record in records:
+                index.write(INDEX_RECORD.pack(*record))
+                self._remember(*record)
+
+    # --- Запись ---
+
+    def append_many(self, entries: list) -> None:
+        """
+        Дописывает записи в журнал и индекс.
+
+        Args:
+            entries (list[tuple[int, str]]): Пары (user_id, строка лога с переводом строки).
+        """
+        with self._lock:
+            offset = self._segment.tell()
+            data, index = [], []
+            for user_id, entry in entries:
+                # Переводы строк внутри сообщения экранируем: одна запись — одна строка
+                text = entry.rstrip("\n").replace("\\", "\\\\").replace("\n", "\\n")
+                line = f"{user_id}\t{text}\n".encode()
+                data.append(line)
+                index.append((int(user_id), self._active, offset, len(line)))
+                offset += len(line)
+
+            # Сначала данные, затем индекс: при сбое между ними индекс
+            # восстанавливается просмотром хвоста активного сегмента
+            self._segment.write(b"".join(data))
+            self._segment.flush()
+            self._index.write(b"".join(INDEX_RECORD.pack(*record) for record in index))
+            self._index.flush()
+            for record in index:
+                self._remember(*record)
+
+            rolled = offset >= self.segment_size
+            if rolled:
+                closed = self._active
+                self._segment.close()
+                self._active += 1
+                self._segment = open(self._path(_segment_name(self._active)), "ab")
+
+        if rolled:
+            self._compress(closed)
+
+    def close(self) -> None:
+        """
+        Закрывает файлы журнала.
+        """
+        with self._lock:
+            self._segment.close()
+            self._index.close()
+
+    # --- Сжатие закрытых сегментов ---
+
+    def _compress(self, segment: int) -> None:
+        source = self._path(_segment_name(segment))
+        target = source + ".gz"
+        blocks = []
+        with open(source, "rb") as src, open(target + ".tmp", "wb") as dst:
+            raw_offset = 0
+            while True:
+                chunk = src.read(self.block_size)
+                if not chunk:
+                    break
+                # Блок заканчивается на границе строки, чтобы запись не делилась между блоками
+                if not chunk.endswith(b"\n"):
+                    chunk += src.readline()
+                member = gzip.compress(chunk, compresslevel=6, mtime=0)
+                blocks.append((raw_offset, dst.tell(), len(member)))
+                dst.write(member)
+                raw_offset += len(chunk)
+            dst.flush()
+            os.fsync(dst.fileno())
+
+        with open(self._path(f"seg-{segment:06d}.blocks"), "wb") as f:
+            f.write(b"".join(BLOCK_RECORD.pack(*block) for block in blocks))
+        os.replace(target + ".tmp", target)
+        with self._lock:
+            self._compressed.add(segment)
+            self._blocks.pop(segment, None)
+        os.remove(source)
+
+    def _block_table(self, segment: int) -> list:
+        table = self._blocks.get(segment)
+        if table is None:
+            with open(self._path(f"seg-{segment:06d}.blocks"), "rb") as f:
+                table = list(BLOCK_RECORD.iter_unpack(f.read()))
+            self._blocks[segment] = table
+        return table
+
+    def _read_block(self, segment: int, block: tuple) -> bytes:
+        key = (segment, block[0])
+        data = self._block_cache.get(key)
+        if data is None:
+            with open(self._path(_segment_name(segment) + ".gz"), "rb") as f:
+                f.seek(block[1])
+                data = zlib.decompress(f.read(block[2]), wbits=31)
+            self._block_cache[key] = data
+            if len(self._block_cache) > 16:
+                self._block_cache.popitem(last=False)
+        return data
+
+    # --- Чтение ---
+
+    def _read(self, segment: int, offset: int, length: int) -> bytes:
+        if segment in self._compressed:
+            table = self._block_table(segment)
+            block = table[bisect.bisect_right(table, (offset, float("inf"))) - 1]
+            start = offset - block[0]
+            return self._read_block(segment, block)[start : start + length]
+        with open(self._path(_segment_name(segment)), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def tail(self, user_id: int, limit: int = 20) -> list:
+        """
+        Возвращает последние записи пользователя по индексу.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            limit (int): Максимальное количество записей (не больше keep_per_user).
+
+        Returns:
+            list[str]: Строки лога в хронологическом порядке.
+        """
+        with self._lock:
+            limit = min(limit, self.keep_per_user)
+            positions = self._positions.get(int(user_id), array("Q"))[-2 * limit :] if limit > 0 else []
+            result = []
+            for i in range(0, len(positions), 2):
+                segment, length = positions[i] >> 32, positions[i] & 0xFFFFFFFF
+                line = self._read(segment, positions[i + 1], length).decode("utf-8", errors="replace")
+                text = line.rstrip("\n").split("\t", 1)[-1]
+                result.append(UNESCAPE_RE.sub(lambda m: "\n" if m.group(1) == "n" else m.group(1), text))
+        return result
+
+    def users(self) -> list:
+        """
+        Возвращает идентификаторы пользователей, у которых есть записи.
+        """
+        with self._lock:
+            return list(self._positions)
+
+    def count(self, user_id: int) -> int:
+        """
+        Возвращает количество записей пользователя.
+        """
+        return self._counts.get(int(user_id), 0)
+
+    def stats(self) -> dict:
+        """
+        Возвращает сводку по журналу.
+
+        Returns:
+            dict: Активный сегмент, количество сжатых сегментов, пользователей и записей.
+        """
+        return {
+            "active_segment": self._active,
+            "compressed_segments": len(self._compressed),
+            "users": len(self._positions),
+            "entries": sum(self._counts.values()),
+        }
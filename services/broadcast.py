@@ -0,0 +1,559 @@
+# services/broadcast.py
+
+import os
+import time
+import random
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+from services import storage
+from services.orders import get_order_repository
+from services.rate_limit import BULK, TokenBucket
+from services.registrations import get_registration_store
+from services.tours import load_tours
+from services.users import known_users
+
+BROADCAST_DB = os.path.join("data", "broadcasts.db")
+GLOBAL_RATE = 25
+CHAT_RATE = 1
+CONCURRENCY = 8
+MAX_ATTEMPTS = 5
+RETRY_BASE = 1.0
+RETRY_CAP = 60.0
+REPORT_INTERVAL = 5.0
+
+ALL = "all"
+ORDERS = "orders"
+TOUR_PREFIX = "tour:"
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+
+
+def resolve_audience(target: str, config: dict) -> list:
+    """
+    Возвращает получателей рассылки.
+
+    Args:
+        target (str): "all" — все известные пользователи, "orders" — пользователи
+            с открытым заказом, "tour:<id>" — записанные на экскурсию.
+        config (dict): Конфигурация бота.
+
+    Returns:
+        list[int]: Отсортированные идентификаторы пользователей.
+
+    Raises:
+        ValueError: Если target не распознан.
+    """
+    orders = get_order_repository(config["orders_dir"])
+    registrations = get_registration_store()
+    if target == ORDERS:
+        users = orders.users_with_orders()
+    elif target.startswith(TOUR_PREFIX):
+        users = set(registrations.users_for_tour(target[len(TOUR_PREFIX) :]))
+    elif target == ALL:
+        users = known_users(config["logs_dir"]) | orders.users_with_orders()
+        for tour in load_tours():
+            users.update(registrations.users_for_tour(tour["id"]))
+    else:
+        raise ValueError(f"Неизвестная аудитория рассылки: {target}")
+    # Рассылка только в личные чаты
+    return sorted(int(user_id) for user_id in users if int(user_id) > 0)
+
+
+class BroadcastStore:
+    """
+    Состояние рассылок в SQLite: текст, аудитория и статус каждого получателя.
+
+    Статус получателя сохраняется сразу после отправки, поэтому после сбоя
+    рассылка продолжается с неотправленных получателей.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target TEXT NOT NULL,
+            text TEXT NOT NULL,
+            status TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            report_chat_id INTEGER,
+            report_message_id INTEGER,
+            created_at TEXT NOT NULL,
+            finished_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            broadcast_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            PRIMARY KEY (broadcast_id, user_id)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str = BROADCAST_DB):
+        """
+        Args:
+            db_path (str): Путь к файлу базы данных.
+        """
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def create(self, target: str, text: str, user_ids: list, report_chat_id: int = None) -> int:
+        """
+        Создаёт рассылку со статусом running и всеми получателями в pending.
+
+        Returns:
+            int: Номер рассылки.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO broadcasts (target, text, status, total, report_chat_id, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (target, text, RUNNING, len(user_ids), report_chat_id, datetime.now().isoformat()),
+                )
+                broadcast_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO broadcast_recipients (broadcast_id, user_id, status) VALUES (?, ?, ?)",
+                    [(broadcast_id, user_id, PENDING) for user_id in user_ids],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return broadcast_id
+
+    def get(self, broadcast_id: int) -> dict | None:
+        """
+        Возвращает параметры рассылки.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, target, text, status, total, report_chat_id, report_message_id, created_at "
+                "FROM broadcasts WHERE id = ?",
+                (broadcast_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "target", "text", "status", "total", "report_chat_id", "report_message_id", "created_at")
+        return dict(zip(keys, row))
+
+    def running(self) -> list:
+        """
+        Возвращает номера незавершённых рассылок.
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM broadcasts WHERE status = ?", (RUNNING,))]
+
+    def latest(self, limit: int = 5) -> list:
+        """
+        Возвращает номера последних рассылок (новые первыми).
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM broadcasts ORDER BY id DESC LIMIT ?", (limit,))
+            return [row[0] for row in rows]
+
+    def pending(self, broadcast_id: int) -> list:
+        """
+        Возвращает неотправленных получателей.
+
+        Returns:
+            list[tuple[int, int]]: Пары (user_id, попыток).
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT user_id, attempts FROM broadcast_recipients WHERE broadcast_id = ? AND status = ? "
+                "ORDER BY user_id",
+                (broadcast_id, PENDING),
+            ).fetchall()
+
+    def mark(self, broadcast_id: int, user_id: int, status: str, attempts: int, error: str = None) -> None:
+        """
+        Сохраняет результат отправки получателю.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE broadcast_recipients SET status = ?, attempts = ?, error = ? "
+                "WHERE broadcast_id = ? AND user_id = ?",
+                (status, attempts, error, broadcast_id, user_id),
+            )
+
+    def counts(self, broadcast_id: int) -> dict:
+        """
+        Возвращает количество получателей по статусам.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM broadcast_recipients WHERE broadcast_id = ? GROUP BY status",
+                (broadcast_id,),
+            ).fetchall()
+        return dict(rows)
+
+    def set_report_message(self, broadcast_id: int, message_id: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE broadcasts SET report_message_id = ? WHERE id = ?", (message_id, broadcast_id)
+            )
+
+    def finish(self, broadcast_id: int, status: str) -> None:
+        """
+        Отмечает рассылку завершённой (done) или отменённой (cancelled).
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE broadcasts SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (status, datetime.now().isoformat(), broadcast_id, RUNNING),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class BroadcastProgress:
+    """
+    Счётчики выполняющейся рассылки.
+    """
+
+    def __init__(self, broadcast_id: int, total: int, done: int):
+        self.broadcast_id = broadcast_id
+        self.total = total
+        self.done_before = done
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retries = 0
+        self.flood_waits = 0
+        self.started = time.monotonic()
+
+    @property
+    def processed(self) -> int:
+        return self.done_before + self.sent + self.failed + self.blocked
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return (self.sent + self.failed + self.blocked) / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.broadcast_id,
+            "total": self.total,
+            "processed": self.processed,
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "retries": self.retries,
+            "flood_waits": self.flood_waits,
+            "rate": self.rate,
+        }
+
+
+def format_progress(progress: dict, finished: bool = False) -> str:
+    """
+    Форматирует отчёт о рассылке для администратора.
+
+    Args:
+        progress (dict): Счётчики (BroadcastProgress.as_dict()).
+        finished (bool): Рассылка завершена.
+
+    Returns:
+        str: Текст отчёта.
+    """
+    title = "завершена" if finished else "идёт"
+    return (
+        f"📣 Рассылка #{progress['id']} {title}: {progress['processed']}/{progress['total']}\n"
+        f"Отправлено: {progress['sent']}, ошибок: {progress['failed']}, "
+        f"заблокировали бота: {progress['blocked']}\n"
+        f"Повторов: {progress['retries']}, пауз 429: {progress['flood_waits']}, "
+        f"скорость: {progress['rate']:.1f} сообщ./с"
+    )
+
+
+class BroadcastManager:
+    """
+    Выполняет рассылки с ограничением частоты.
+
+    Отправка идёт несколькими воркерами через общее ведро токенов (global_rate
+    сообщений в секунду) и ведро на каждый чат. Ответ 429 (RetryAfter)
+    приостанавливает общее ведро на указанное Telegram время со случайной
+    добавкой, сетевые ошибки повторяются с экспоненциальной задержкой и
+    jitter, пользователи, заблокировавшие бота, не повторяются. Незавершённые
+    рассылки продолжаются при следующем запуске (resume()).
+    """
+
+    def __init__(
+        self,
+        store: BroadcastStore,
+        global_rate: float = GLOBAL_RATE,
+        chat_rate: float = CHAT_RATE,
+        concurrency: int = CONCURRENCY,
+        report_interval: float = REPORT_INTERVAL,
+        logger=None,
+    ):
+        """
+        Args:
+            store (BroadcastStore): Хранилище состояния рассылок.
+            global_rate (float): Общий лимит, сообщений в секунду.
+            chat_rate (float): Лимит на один чат, сообщений в секунду.
+            concurrency (int): Количество одновременных отправок.
+            report_interval (float): Интервал обновления отчёта, секунды.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.store = store
+        self.chat_rate = chat_rate
+        self.concurrency = concurrency
+        self.report_interval = report_interval
+        self.logger = logger
+        # Без запаса на всплеск: в любом окне в секунду уходит не больше global_rate + 1 сообщений
+        self.bucket = TokenBucket(global_rate, capacity=1)
+        self.bot = None
+        self._send_kwargs = {}
+        self._chat_buckets = {}
+        self._tasks = {}
+        self._progress = {}
+        self._deliveries = set()
+
+    async def resume(self, bot) -> list:
+        """
+        Запоминает бота и продолжает незавершённые рассылки.
+
+        Args:
+            bot (telegram.Bot): Экземпляр бота.
+
+        Returns:
+            list[int]: Номера продолженных рассылок.
+        """
+        self.bot = bot
+        # С планировщиком исходящих запросов рассылка идёт с низким приоритетом
+        self._send_kwargs = {"rate_limit_args": BULK} if getattr(bot, "rate_limiter", None) else {}
+        running = await storage.get_storage_pool().run("broadcast.running", self.store.running)
+        for broadcast_id in running:
+            if self.logger:
+                self.logger.info(f"Продолжение рассылки #{broadcast_id}")
+            self._launch(broadcast_id)
+        return running
+
+    async def create(self, target: str, text: str, user_ids: list, report_chat_id: int = None) -> int:
+        """
+        Создаёт и запускает рассылку.
+
+        Returns:
+            int: Номер рассылки.
+        """
+        broadcast_id = await storage.get_storage_pool().run(
+            "broadcast.create", self.store.create, target, text, user_ids, report_chat_id
+        )
+        if self.logger:
+            self.logger.info(f"Создана рассылка #{broadcast_id} ({target}): {len(user_ids)} получателей")
+        self._launch(broadcast_id)
+        return broadcast_id
+
+    async def cancel(self, broadcast_id: int) -> bool:
+        """
+        Отменяет рассылку.
+
+        Returns:
+            bool: True, если рассылка выполнялась.
+        """
+        task = self._tasks.pop(broadcast_id, None)
+        await storage.get_storage_pool().run("broadcast.finish", self.store.finish, broadcast_id, CANCELLED)
+        if task is None:
+            return False
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return True
+
+    async def stop(self) -> None:
+        """
+        Останавливает рассылки, оставляя их незавершёнными для продолжения после запуска.
+
+        Воркеры больше не берут получателей из очереди, а уже начатые отправки
+        дожидаются ответа Telegram и записи статуса.
+        """
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    def progress(self, broadcast_id: int) -> dict | None:
+        """
+        Возвращает счётчики выполняющейся рассылки.
+        """
+        progress = self._progress.get(broadcast_id)
+        return progress.as_dict() if progress else None
+
+    def _launch(self, broadcast_id: int) -> None:
+        task = asyncio.create_task(self._run(broadcast_id))
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+
+    async def _run(self, broadcast_id: int) -> None:
+        pool = storage.get_storage_pool()
+        info = await pool.run("broadcast.get", self.store.get, broadcast_id)
+        pending = await pool.run("broadcast.pending", self.store.pending, broadcast_id)
+        progress = BroadcastProgress(broadcast_id, info["total"], info["total"] - len(pending))
+        self._progress[broadcast_id] = progress
+
+        queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        workers = [
+            asyncio.create_task(self._worker(info, queue, progress)) for _ in range(min(self.concurrency, len(pending)))
+        ]
+        reporter = asyncio.create_task(self._report(info, progress))
+        try:
+            await queue.join()
+        finally:
+            for task in workers + [reporter]:
+                task.cancel()
+            await asyncio.gather(*workers, reporter, return_exceptions=True)
+            self._progress.pop(broadcast_id, None)
+
+        await pool.run("broadcast.finish", self.store.finish, broadcast_id, DONE)
+        await self._send_report(info, format_progress(progress.as_dict(), finished=True))
+        if self.logger:
+            self.logger.info(f"Рассылка #{broadcast_id} завершена: {progress.as_dict()}")
+
+    async def _worker(self, info: dict, queue: asyncio.Queue, progress: BroadcastProgress) -> None:
+        while True:
+            user_id, attempts = await queue.get()
+            try:
+                await self._deliver(info, user_id, attempts, queue, progress)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Непредвиденная ошибка одного получателя не должна останавливать рассылку
+                await self._mark(info["id"], user_id, FAILED, attempts + 1, progress, str(e))
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, info, user_id, attempts, queue, progress) -> None:
+        chat_bucket = self._chat_buckets.get(user_id)
+        if chat_bucket is None:
+            chat_bucket = self._chat_buckets[user_id] = TokenBucket(self.chat_rate, capacity=1)
+        await chat_bucket.acquire()
+        await self.bucket.acquire()
+        attempts += 1
+        delivery = asyncio.ensure_future(self._send(info, user_id, attempts, progress))
+        self._deliveries.add(delivery)
+        delivery.add_done_callback(self._deliveries.discard)
+        # Отмена воркера не прерывает начатую отправку: иначе сообщение уйдёт,
+        # а получатель останется в очереди и получит его повторно после запуска
+        error = await asyncio.shield(delivery)
+        if isinstance(error, RetryAfter):
+            # Одна общая пауза для всех воркеров; добавка разводит их повторные запросы
+            progress.flood_waits += 1
+            progress.retries += 1
+            self.bucket.block(float(error.retry_after) * (1 + random.uniform(0, 0.1)))
+            queue.put_nowait((user_id, attempts - 1))
+        elif error is not None:
+            progress.retries += 1
+            delay = min(RETRY_CAP, RETRY_BASE * 2 ** (attempts - 1))
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+            queue.put_nowait((user_id, attempts))
+
+    async def _send(self, info, user_id, attempts, progress) -> TelegramError | None:
+        # Возвращает ошибку, после которой получателя нужно повторить, иначе записывает статус
+        try:
+            await self.bot.send_message(chat_id=user_id, text=info["text"], **self._send_kwargs)
+        except RetryAfter as e:
+            return e
+        except Forbidden as e:
+            await self._mark(info["id"], user_id, BLOCKED, attempts, progress, str(e))
+            return None
+        except BadRequest as e:
+            await self._mark(info["id"], user_id, FAILED, attempts, progress, str(e))
+            return None
+        except NetworkError as e:
+            if attempts >= MAX_ATTEMPTS:
+                await self._mark(info["id"], user_id, FAILED, attempts, progress, str(e))
+                return None
+            return e
+        await self._mark(info["id"], user_id, SENT, attempts, progress)
+        return None
+
+    async def _mark(self, broadcast_id, user_id, status, attempts, progress, error=None) -> None:
+        self._chat_buckets.pop(user_id, None)
+        await storage.get_storage_pool().run(
+            "broadcast.mark", self.store.mark, broadcast_id, user_id, status, attempts, error
+        )
+        if status == SENT:
+            progress.sent += 1
+        elif status == BLOCKED:
+            progress.blocked += 1
+        else:
+            progress.failed += 1
+
+    async def _report(self, info: dict, progress: BroadcastProgress) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            await self._send_report(info, format_progress(progress.as_dict()))
+
+    async def _send_report(self, info: dict, text: str) -> None:
+        chat_id = info.get("report_chat_id")
+        if not chat_id or self.bot is None:
+            return
+        try:
+            if info.get("report_message_id"):
+                await self.bot.edit_message_text(text, chat_id=chat_id, message_id=info["report_message_id"])
+            else:
+                message = await self.bot.send_message(chat_id=chat_id, text=text)
+                info["report_message_id"] = message.message_id
+                await storage.get_storage_pool().run(
+                    "broadcast.report", self.store.set_report_message, info["id"], message.message_id
+                )
+        except BadRequest:
+            pass  # текст отчёта не изменился
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(f"Не удалось обновить отчёт рассылки #{info['id']}: {e}")
+
+
+_manager = None
+
+
+def configure_broadcasts(config: dict, logger=None) -> BroadcastManager:
+    """
+    Создаёт менеджер рассылок по настройкам из config.yaml.
+
+    Args:
+        config (dict): Конфигурация (broadcast_db, broadcast_rate).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        BroadcastManager: Активный менеджер рассылок.
+    """
+    global _manager
+    _manager = BroadcastManager(
+        BroadcastStore(config.get("broadcast_db", BROADCAST_DB)),
+        global_rate=config.get("broadcast_rate", GLOBAL_RATE),
+        logger=logger,
+    )
+    return _manager
+
+
+def get_broadcast_manager() -> BroadcastManager | None:
+    """
+    Возвращает активный менеджер рассылок.
+    """
+    return _manager
@@ -0,0 +1,162 @@
+# services/capacity.py
+
+import asyncio
+import zlib
+
+from services.registrations import RegistrationStore, get_registration_store
+from services.storage import get_storage_pool
+
+REGISTERED = "registered"
+ALREADY_REGISTERED = "already_registered"
+UNREGISTERED = "unregistered"
+FULL = "full"
+
+
+class TourCapacityEngine:
+    """
+    Запись на экскурсии с ограничением количества мест.
+
+    Решение «записать или отказать» принимается атомарно под блокировкой тура.
+    Блокировки разбиты на полосы (lock striping) по хэшу tour_id, поэтому
+    записи на разные туры не ждут друг друга. Дополнительная блокировка по
+    пользователю защищает его множество записей от одновременных изменений.
+    Счётчики занятых мест хранятся в памяти и восстанавливаются из хранилища
+    при запуске.
+    """
+
+    def __init__(self, store: RegistrationStore, stripes: int = 64):
+        """
+        Args:
+            store (RegistrationStore): Хранилище записей.
+            stripes (int): Количество полос блокировок для туров и пользователей.
+        """
+        self.store = store
+        self._tour_locks = [asyncio.Lock() for _ in range(stripes)]
+        self._user_locks = [asyncio.Lock() for _ in range(stripes)]
+        self._taken = {}
+
+    def rebuild(self) -> None:
+        """
+        Восстанавливает счётчики занятых мест из хранилища.
+        """
+        self._taken = dict(self.store.counts())
+
+    def _tour_lock(self, tour_id: str) -> asyncio.Lock:
+        return self._tour_locks[zlib.crc32(tour_id.encode()) % len(self._tour_locks)]
+
+    def _user_lock(self, user_id: int) -> asyncio.Lock:
+        return self._user_locks[hash(user_id) % len(self._user_locks)]
+
+    def taken(self, tour_id: str) -> int:
+        """
+        Возвращает количество занятых мест на тур.
+
+        Args:
+            tour_id (str): Идентификатор тура.
+
+        Returns:
+            int: Количество записанных пользователей.
+        """
+        return self._taken.get(tour_id, 0)
+
+    def remaining(self, tour: dict) -> int | None:
+        """
+        Возвращает количество свободных мест на тур.
+
+        Args:
+            tour (dict): Тур из каталога (поле capacity необязательно).
+
+        Returns:
+            int | None: Свободные места или None, если количество мест не ограничено.
+        """
+        capacity = tour.get("capacity")
+        if capacity is None:
+            return None
+        return max(capacity - self.taken(tour["id"]), 0)
+
+    async def _load(self, user_id: int) -> set:
+        return await get_storage_pool().run("registrations.get", self.store.get, user_id)
+
+    async def _save(self, user_id: int, registrations: set) -> None:
+        await get_storage_pool().run("registrations.save", self.store.save, user_id, registrations)
+
+    async def register(self, user_id: int, tour: dict) -> tuple[str, set]:
+        """
+        Записывает пользователя на тур, если остались места.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            tour (dict): Тур из каталога.
+
+        Returns:
+            tuple[str, set]: Результат (REGISTERED, ALREADY_REGISTERED или FULL)
+                и актуальное множество записей пользователя.
+        """
+        tour_id = tour["id"]
+        capacity = tour.get("capacity")
+        async with self._user_lock(user_id), self._tour_lock(tour_id):
+            registrations = await self._load(user_id)
+            if tour_id in registrations:
+                return ALREADY_REGISTERED, registrations
+            if capacity is not None and self.taken(tour_id) >= capacity:
+                return FULL, registrations
+
+            registrations.add(tour_id)
+            await self._save(user_id, registrations)
+            self._taken[tour_id] = self.taken(tour_id) + 1
+            return REGISTERED, registrations
+
+    async def unregister(self, user_id: int, tour_id: str) -> tuple[str, set]:
+        """
+        Отменяет запись пользователя на тур и освобождает место.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            tour_id (str): Идентификатор тура.
+
+        Returns:
+            tuple[str, set]: Результат UNREGISTERED и актуальное множество записей.
+        """
+        async with self._user_lock(user_id), self._tour_lock(tour_id):
+            registrations = await self._load(user_id)
+            if tour_id in registrations:
+                registrations.discard(tour_id)
+                await self._save(user_id, registrations)
+                self._taken[tour_id] = max(self.taken(tour_id) - 1, 0)
+            return UNREGISTERED, registrations
+
+
+_engine = None
+
+
+def configure_capacity_engine(store: RegistrationStore, logger=None) -> TourCapacityEngine:
+    """
+    Создаёт движок записи и восстанавливает счётчики мест из хранилища.
+
+    Args:
+        store (RegistrationStore): Хранилище записей.
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        TourCapacityEngine: Активный движок записи.
+    """
+    global _engine
+    _engine = TourCapacityEngine(store)
+    _engine.rebuild()
+    if logger:
+        logger.info(f"Счётчики мест восстановлены для {len(_engine._taken)} экскурсий")
+    return _engine
+
+
+def get_capacity_engine() -> TourCapacityEngine:
+    """
+    Возвращает активный движок записи (создаёт его при первом обращении).
+
+    Returns:
+        TourCapacityEngine: Движок записи на экскурсии.
+    """
+    global _engine
+    if _engine is None:
+        _engine = TourCapacityEngine(get_registration_store())
+        _engine.rebuild()
+    return _engine
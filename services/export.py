@@ -0,0 +1,166 @@
+# services/export.py
+
+import csv
+import glob
+import math
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from services.orders import ORDER_FIELDS, ORDERS_DB, SqliteOrderRepository
+
+EXPORT_DIR = "exports"
+
+
+def load_orders_frame(config: dict) -> pd.DataFrame:
+    """
+    Загружает все заказы одним проходом в DataFrame.
+
+    Для SQLite выполняется один SQL-запрос, для CSV-файлов — чтение и
+    объединение всех orders/*.csv. Количество и цена приводятся к числам,
+    сумма строки считается векторно.
+
+    Args:
+        config (dict): Конфигурация (orders_backend, orders_dir, orders_db).
+
+    Returns:
+        pd.DataFrame: Строки заказов с колонками ORDER_FIELDS и amount.
+    """
+    if config.get("orders_backend", "csv") == "sqlite":
+        db_path = config.get("orders_db", ORDERS_DB)
+        if os.path.exists(db_path):
+            with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+                df = pd.read_sql_query(SqliteOrderRepository.SELECT_ROWS, conn)
+        else:
+            df = pd.DataFrame(columns=ORDER_FIELDS)
+    else:
+        files = sorted(glob.glob(os.path.join(config.get("orders_dir", "orders"), "*.csv")))
+        frames = [pd.read_csv(path, dtype=str, keep_default_na=False) for path in files]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ORDER_FIELDS)
+
+    df = df.reindex(columns=ORDER_FIELDS)
+    df["user_id"] = pd.to_numeric(df["user_id"], errors="coerce").astype("Int64")
+    df["qty"] = pd.to_numeric(df["qty"], errors="coerce").fillna(0).astype(np.int64)
+    df["price"] = pd.to_numeric(df["price"], errors="coerce").fillna(0.0)
+    for column in ("username", "fio", "packaging", "item_id", "name", "unit"):
+        df[column] = df[column].fillna("").astype(str)
+    df["packaging"] = df["packaging"].replace("", "Без упаковки")
+    df["amount"] = df["qty"].to_numpy() * df["price"].to_numpy()
+    return df.sort_values(["user_id", "name"], kind="stable", ignore_index=True)
+
+
+def aggregate_orders(df: pd.DataFrame) -> dict:
+    """
+    Считает сводные таблицы по заказам.
+
+    Args:
+        df (pd.DataFrame): Результат load_orders_frame.
+
+    Returns:
+        dict: Таблицы "Товары" (итоги по товарам), "Пользователи" (суммы по
+              пользователям) и "Упаковка" (разбивка по типу упаковки).
+    """
+    items = (
+        df.groupby(["item_id", "name", "unit"], dropna=False, sort=False)
+        .agg(qty=("qty", "sum"), amount=("amount", "sum"), users=("user_id", "nunique"))
+        .reset_index()
+        .sort_values("name", kind="stable")
+    )
+    users = (
+        df.groupby("user_id", sort=True)
+        .agg(
+            username=("username", "first"),
+            fio=("fio", "first"),
+            packaging=("packaging", "first"),
+            positions=("name", "size"),
+            qty=("qty", "sum"),
+            amount=("amount", "sum"),
+        )
+        .reset_index()
+    )
+    packaging = (
+        df.groupby(["packaging", "name", "unit"], sort=True)
+        .agg(qty=("qty", "sum"), users=("user_id", "nunique"), amount=("amount", "sum"))
+        .reset_index()
+    )
+    return {"Товары": items, "Пользователи": users, "Упаковка": packaging}
+
+
+def _cell(value):
+    """
+    Приводит значение pandas/numpy к типу, который понимает openpyxl.
+    """
+    if value is None or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def write_orders_xlsx(df: pd.DataFrame, tables: dict, path: str) -> None:
+    """
+    Потоково записывает заказы и сводные таблицы в XLSX (openpyxl write-only).
+
+    Args:
+        df (pd.DataFrame): Строки заказов.
+        tables (dict): Сводные таблицы из aggregate_orders.
+        path (str): Путь к файлу XLSX.
+    """
+    workbook = Workbook(write_only=True)
+    for title, frame in [("Заказы", df), *tables.items()]:
+        sheet = workbook.create_sheet(title)
+        sheet.append(list(frame.columns))
+        for row in frame.itertuples(index=False, name=None):
+            sheet.append([_cell(value) for value in row])
+    workbook.save(path)
+
+
+def write_orders_csv(df: pd.DataFrame, path: str) -> None:
+    """
+    Записывает все строки заказов в один CSV-файл.
+
+    Args:
+        df (pd.DataFrame): Строки заказов.
+        path (str): Путь к файлу CSV.
+    """
+    df.to_csv(path, index=False, encoding="utf-8-sig", quoting=csv.QUOTE_MINIMAL, chunksize=10_000)
+
+
+def export_orders(config: dict, path: str | None = None, fmt: str = "xlsx") -> dict:
+    """
+    Выгружает все заказы сувениров в файл.
+
+    Функция самодостаточна и может выполняться в отдельном процессе.
+
+    Args:
+        config (dict): Конфигурация (orders_backend, orders_dir, orders_db, export_dir).
+        path (str | None): Путь к файлу; по умолчанию exports/orders_<дата>.<fmt>.
+        fmt (str): Формат файла: "xlsx" или "csv".
+
+    Returns:
+        dict: Путь к файлу, количество заказов, позиций и общая сумма.
+    """
+    if path is None:
+        export_dir = config.get("export_dir", EXPORT_DIR)
+        os.makedirs(export_dir, exist_ok=True)
+        path = os.path.join(export_dir, f"orders_{datetime.now():%Y%m%d_%H%M%S}.{fmt}")
+
+    df = load_orders_frame(config)
+    if fmt == "csv":
+        write_orders_csv(df, path)
+    else:
+        write_orders_xlsx(df, aggregate_orders(df), path)
+
+    return {
+        "path": path,
+        "orders": int(df["user_id"].nunique()),
+        "rows": len(df),
+        "total": float(df["amount"].sum()),
+    }
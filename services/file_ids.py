@@ -0,0 +1,265 @@
+# services/file_ids.py
+
+import os
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+from telegram.error import BadRequest, RetryAfter
+from services import storage
+from services.rate_limit import BULK
+
+FILE_IDS_DB = os.path.join("data", "file_ids.db")
+DOCUMENT = "document"
+PHOTO = "photo"
+STALE_FILE_ID_ERRORS = ("wrong file identifier", "wrong remote file identifier", "file reference")
+
+
+class FileIdRegistry:
+    """
+    Реестр file_id файлов, уже загруженных в Telegram.
+
+    После первой отправки файла Telegram возвращает file_id, по которому этот
+    файл можно отправлять повторно без загрузки содержимого. Запись привязана
+    к пути, размеру и времени изменения файла: если файл заменили, file_id
+    считается устаревшим и файл загружается заново. Реестр хранится в SQLite
+    и целиком держится в памяти, поэтому поиск стоит одного stat.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS file_ids (
+            path TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            file_id TEXT NOT NULL,
+            uploaded_at TEXT NOT NULL,
+            PRIMARY KEY (path, kind)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str = FILE_IDS_DB):
+        """
+        Args:
+            db_path (str): Путь к файлу базы данных.
+        """
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._entries = {
+            (path, kind): (size, mtime_ns, file_id)
+            for path, kind, size, mtime_ns, file_id in self._conn.execute(
+                "SELECT path, kind, size, mtime_ns, file_id FROM file_ids"
+            )
+        }
+        self.hits = 0
+        self.uploads = 0
+
+    def lookup(self, path: str, kind: str = DOCUMENT) -> str | None:
+        """
+        Возвращает file_id файла, если он загружался и с тех пор не менялся.
+
+        Args:
+            path (str): Путь к файлу.
+            kind (str): Тип отправки (DOCUMENT или PHOTO).
+
+        Returns:
+            str | None: file_id или None.
+        """
+        entry = self._entries.get((os.path.normpath(path), kind))
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if (stat.st_size, stat.st_mtime_ns) != entry[:2]:
+            return None
+        return entry[2]
+
+    def remember(self, path: str, kind: str, file_id: str, size: int, mtime_ns: int) -> None:
+        """
+        Сохраняет file_id для версии файла с указанными размером и временем изменения.
+        """
+        key = (os.path.normpath(path), kind)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_ids (path, kind, size, mtime_ns, file_id, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, size, mtime_ns, file_id, datetime.now().isoformat()),
+            )
+            self._entries[key] = (size, mtime_ns, file_id)
+
+    def forget(self, path: str, kind: str) -> None:
+        """
+        Удаляет file_id, который Telegram перестал принимать.
+        """
+        key = (os.path.normpath(path), kind)
+        with self._lock:
+            self._conn.execute("DELETE FROM file_ids WHERE path = ? AND kind = ?", key)
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики реестра.
+
+        Returns:
+            dict: Количество файлов, повторных отправок по file_id и загрузок.
+        """
+        return {"files": len(self._entries), "hits": self.hits, "uploads": self.uploads}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_registry = None
+_upload_locks = {}
+
+
+def configure_file_id_registry(config: dict, logger=None) -> FileIdRegistry:
+    """
+    Создаёт реестр file_id по настройкам из config.yaml.
+
+    Args:
+        config (dict): Конфигурация (file_ids_db).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        FileIdRegistry: Активный реестр.
+    """
+    global _registry
+    _registry = FileIdRegistry(config.get("file_ids_db", FILE_IDS_DB))
+    if logger:
+        logger.info(f"Реестр file_id: {len(_registry._entries)} файлов")
+    return _registry
+
+
+def get_file_id_registry() -> FileIdRegistry:
+    """
+    Возвращает активный реестр file_id (создаёт его при первом обращении).
+
+    Returns:
+        FileIdRegistry: Реестр file_id.
+    """
+    global _registry
+    if _registry is None:
+        _registry = FileIdRegistry()
+    return _registry
+
+
+def _read_file(path: str) -> tuple:
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        return f.read(), stat.st_size, stat.st_mtime_ns
+
+
+def _stale_file_id(error: BadRequest) -> bool:
+    # Ответы Telegram для чужого или удалённого file_id; остальные ошибки
+    # (подпись, разметка, чат) повторная загрузка не исправит
+    message = error.message.lower().replace("_", " ")
+    return any(marker in message for marker in STALE_FILE_ID_ERRORS)
+
+
+def _message_file_id(message, kind: str) -> str | None:
+    if kind == PHOTO:
+        return message.photo[-1].file_id if message.photo else None
+    attachment = message.effective_attachment
+    return getattr(attachment, "file_id", None)
+
+
+async def send_file(bot, chat_id, path: str, kind: str = DOCUMENT, filename: str = None, **kwargs):
+    """
+    Отправляет локальный файл, загружая его в Telegram только один раз.
+
+    Если для текущей версии файла известен file_id, отправляется он. Иначе
+    файл читается в пуле хранилища, загружается, и полученный file_id
+    сохраняется в реестре. Одновременные первые отправки одного файла ждут
+    одну загрузку.
+
+    Args:
+        bot (telegram.Bot): Экземпляр бота.
+        chat_id (int | str): Получатель.
+        path (str): Путь к файлу.
+        kind (str): DOCUMENT (send_document) или PHOTO (send_photo).
+        filename (str | None): Имя файла для получателя (по умолчанию имя файла на диске).
+        **kwargs: Дополнительные параметры send_document/send_photo (caption, reply_markup, ...).
+
+    Returns:
+        telegram.Message: Отправленное сообщение.
+    """
+    registry = get_file_id_registry()
+    pool = storage.get_storage_pool()
+    send = bot.send_photo if kind == PHOTO else bot.send_document
+    key = (os.path.normpath(path), kind)
+
+    file_id = await pool.run("file_ids.lookup", registry.lookup, path, kind)
+    if file_id:
+        try:
+            message = await send(chat_id, file_id, **kwargs)
+            registry.hits += 1
+            return message
+        except BadRequest as e:
+            if not _stale_file_id(e):
+                raise
+            # file_id принадлежит другому боту или удалён Telegram — загружаем заново
+            await pool.run("file_ids.forget", registry.forget, path, kind)
+
+    async with _upload_locks.setdefault(key, asyncio.Lock()):
+        # Пока ждали блокировку, файл мог загрузить другой обработчик
+        file_id = await pool.run("file_ids.lookup", registry.lookup, path, kind)
+        if file_id:
+            message = await send(chat_id, file_id, **kwargs)
+            registry.hits += 1
+            return message
+
+        data, size, mtime_ns = await pool.run("files.read", _read_file, path)
+        message = await send(chat_id, data, filename=filename or os.path.basename(path), **kwargs)
+        registry.uploads += 1
+        file_id = _message_file_id(message, kind)
+        if file_id:
+            await pool.run("file_ids.remember", registry.remember, path, kind, file_id, size, mtime_ns)
+        return message
+
+
+async def preupload_files(bot, directory: str, chat_id, logger=None) -> int:
+    """
+    Загружает в служебный чат файлы директории, для которых ещё нет file_id,
+    чтобы первый пользователь не ждал загрузки.
+
+    Args:
+        bot (telegram.Bot): Экземпляр бота.
+        directory (str): Директория с файлами.
+        chat_id (int | str): Служебный чат (storage_chat_id).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        int: Количество загруженных файлов.
+    """
+    registry = get_file_id_registry()
+    bulk = {"rate_limit_args": BULK} if getattr(bot, "rate_limiter", None) else {}
+    uploaded = 0
+    for name in await storage.list_files(directory):
+        path = os.path.join(directory, name)
+        if await storage.get_storage_pool().run("file_ids.lookup", registry.lookup, path, DOCUMENT):
+            continue
+        for _ in range(3):
+            try:
+                await send_file(bot, chat_id, path, DOCUMENT, disable_notification=True, **bulk)
+                uploaded += 1
+                break
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                if logger:
+                    logger.error(f"Не удалось предзагрузить {path}: {e}")
+                break
+    if logger:
+        logger.info(f"Предзагрузка материалов: загружено {uploaded}, в реестре {registry.stats()['files']}")
+    return uploaded
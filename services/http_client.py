@@ -0,0 +1,228 @@
+# services/http_client.py
+
+import asyncio
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+TIMEOUT = 5
+POSITIVE_TTL = 3600
+NEGATIVE_TTL = 300
+MAX_ENTRIES = 1024
+CONNECTION_LIMIT = 32
+FIRST_CHECK_WAIT = 1.0
+
+
+class HttpClient:
+    """
+    HTTP-клиент на всё время работы бота.
+
+    Одна aiohttp.ClientSession с общим пулом соединений и кэшем DNS, поэтому
+    повторные запросы к одному хосту не платят за новое соединение и TLS.
+    Результаты проверки URL кэшируются с разным сроком жизни для доступных
+    (positive_ttl) и недоступных (negative_ttl) адресов; одновременные
+    проверки одного URL объединяются в один запрос. Устаревший результат не
+    удаляется: он возвращается до завершения повторной проверки в фоне.
+    """
+
+    def __init__(
+        self,
+        timeout: float = TIMEOUT,
+        positive_ttl: float = POSITIVE_TTL,
+        negative_ttl: float = NEGATIVE_TTL,
+        max_entries: int = MAX_ENTRIES,
+        logger=None,
+    ):
+        """
+        Args:
+            timeout (float): Таймаут запроса, секунды.
+            positive_ttl (float): Срок жизни результата «URL доступен», секунды.
+            negative_ttl (float): Срок жизни результата «URL недоступен», секунды.
+            max_entries (int): Максимальное количество URL в кэше.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.timeout = timeout
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.logger = logger
+        self._session = None
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._background = set()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Общая сессия (создаётся при первом обращении внутри цикла событий).
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=CONNECTION_LIMIT, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Отменяет фоновые проверки и закрывает сессию.
+        """
+        for task in list(self._background):
+            task.cancel()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def cached_url_status(self, url: str) -> bool | None:
+        """
+        Возвращает результат проверки URL из кэша, не ожидая сети.
+
+        Если результат устарел, он всё равно возвращается, а повторная
+        проверка запускается в фоне (при запущенном цикле событий).
+
+        Args:
+            url (str): Проверяемый URL.
+
+        Returns:
+            bool | None: Последний результат проверки или None, если проверки ещё не было.
+        """
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        ok, expires = entry
+        self._cache.move_to_end(url)
+        if time.monotonic() >= expires and url not in self._inflight:
+            try:
+                self._spawn(url)
+            except RuntimeError:
+                pass  # вне цикла событий обновить не получится
+        return ok
+
+    def _spawn(self, url: str) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(self._check(url))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def _remember(self, url: str, ok: bool) -> None:
+        ttl = self.positive_ttl if ok else self.negative_ttl
+        self._cache[url] = (ok, time.monotonic() + ttl)
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _probe(self, url: str) -> bool:
+        try:
+            async with self.session.head(url, allow_redirects=True) as resp:
+                if resp.status == 405:
+                    # Сервер не поддерживает HEAD: проверяем GET без чтения тела
+                    async with self.session.get(url) as get_resp:
+                        return get_resp.status == 200
+                return resp.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return False
+
+    async def url_exists(self, url: str) -> bool:
+        """
+        Проверяет доступность URL с учётом кэша.
+
+        Args:
+            url (str): Проверяемый URL.
+
+        Returns:
+            bool: True, если URL отвечает статусом 200.
+        """
+        cached = self.cached_url_status(url)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        return await self._check(url)
+
+    async def _check(self, url: str) -> bool:
+        future = self._inflight.get(url)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(self._probe(url))
+            self._inflight[url] = future
+            try:
+                ok = await future
+            finally:
+                self._inflight.pop(url, None)
+            self._remember(url, ok)
+            return ok
+        return await asyncio.shield(future)
+
+    async def url_status(self, url: str, wait: float = FIRST_CHECK_WAIT) -> bool | None:
+        """
+        Возвращает результат проверки URL, ожидая первую проверку не дольше wait.
+
+        Известный URL отвечает сразу из кэша (устаревший обновляется в фоне).
+        Для нового URL запускается проверка; если она не уложилась в wait,
+        возвращается None, а проверка продолжается в фоне.
+
+        Args:
+            url (str): Проверяемый URL.
+            wait (float): Максимальное ожидание первой проверки, секунды.
+
+        Returns:
+            bool | None: Результат проверки или None, если он ещё не готов.
+        """
+        cached = self.cached_url_status(url)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        pending = self._inflight.get(url) or self._spawn(url)
+        try:
+            return await asyncio.wait_for(asyncio.shield(pending), wait)
+        except asyncio.TimeoutError:
+            return None
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики кэша проверок.
+
+        Returns:
+            dict: Попадания, промахи и количество URL в кэше.
+        """
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self._cache)}
+
+
+_client = None
+
+
+def configure_http_client(config: dict, logger=None) -> HttpClient:
+    """
+    Создаёт общий HTTP-клиент по настройкам из config.yaml.
+
+    Args:
+        config (dict): Конфигурация (url_check_ttl, url_check_negative_ttl).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        HttpClient: Активный HTTP-клиент.
+    """
+    global _client
+    _client = HttpClient(
+        positive_ttl=config.get("url_check_ttl", POSITIVE_TTL),
+        negative_ttl=config.get("url_check_negative_ttl", NEGATIVE_TTL),
+        logger=logger,
+    )
+    return _client
+
+
+def get_http_client() -> HttpClient:
+    """
+    Возвращает общий HTTP-клиент (создаёт его при первом обращении).
+
+    Returns:
+        HttpClient: HTTP-клиент.
+    """
+    global _client
+    if _client is None:
+        _client = HttpClient()
+    return _client
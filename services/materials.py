@@ -0,0 +1,243 @@
+# services/materials.py
+
+import os
+import time
+import hashlib
+import itertools
+import mimetypes
+import threading
+from dataclasses import dataclass
+
+PAGE_SIZE = 8
+CHECK_INTERVAL = 1.0
+ID_LENGTH = 8
+
+_versions = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class Material:
+    """
+    Файл из каталога материалов.
+
+    Attributes:
+        id (str): Короткий стабильный идентификатор (для callback_data).
+        name (str): Имя файла.
+        path (str): Путь к файлу.
+        size (int): Размер файла, байты.
+        mime_type (str): MIME-тип по расширению.
+        mtime_ns (int): Время изменения файла на момент сканирования.
+    """
+
+    id: str
+    name: str
+    path: str
+    size: int
+    mime_type: str
+    mtime_ns: int = 0
+
+
+def material_id(name: str, length: int = ID_LENGTH) -> str:
+    """
+    Возвращает короткий идентификатор файла.
+
+    Идентификатор вычисляется из имени файла, поэтому не меняется между
+    перезапусками и пересканированиями, и кнопки в старых сообщениях
+    продолжают работать.
+
+    Args:
+        name (str): Имя файла.
+        length (int): Длина идентификатора.
+
+    Returns:
+        str: Шестнадцатеричный префикс SHA-1 имени.
+    """
+    return hashlib.sha1(name.encode("utf-8")).hexdigest()[:length]
+
+
+def format_size(size: int) -> str:
+    """
+    Форматирует размер файла для подписи кнопки.
+
+    Args:
+        size (int): Размер, байты.
+
+    Returns:
+        str: Размер в Б, КБ или МБ.
+    """
+    if size < 1024:
+        return f"{size} Б"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.0f} КБ"
+    return f"{size / (1024 * 1024):.1f} МБ"
+
+
+class MaterialsCatalog:
+    """
+    Снимок директории материалов: файлы, отсортированные по имени, с индексом
+    по идентификатору и имени.
+
+    Attributes:
+        directory (str): Директория материалов.
+        version (int): Глобально уникальный номер снимка.
+        mtime_ns (int): Время изменения директории на момент сканирования.
+        items (tuple[Material]): Файлы в порядке показа.
+        by_id (dict): Идентификатор -> Material.
+        by_name (dict): Имя файла -> Material.
+    """
+
+    def __init__(self, directory: str, materials, version: int = 0, mtime_ns: int = 0, page_size: int = PAGE_SIZE):
+        """
+        Args:
+            directory (str): Директория материалов.
+            materials (Iterable[Material]): Файлы директории.
+            version (int): Номер снимка.
+            mtime_ns (int): Время изменения директории.
+            page_size (int): Количество файлов на странице меню.
+        """
+        self.directory = directory
+        self.version = version
+        self.mtime_ns = mtime_ns
+        self.page_size = page_size
+        self.items = tuple(sorted(materials, key=lambda m: m.name))
+        self.by_id = {m.id: m for m in self.items}
+        self.by_name = {m.name: m for m in self.items}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def pages(self) -> int:
+        """
+        Количество страниц меню.
+        """
+        return max(1, -(-len(self.items) // self.page_size))
+
+    def page(self, number: int) -> tuple:
+        """
+        Возвращает файлы страницы (нумерация с нуля).
+
+        Args:
+            number (int): Номер страницы.
+
+        Returns:
+            tuple[Material]: Файлы страницы.
+        """
+        start = number * self.page_size
+        return self.items[start : start + self.page_size]
+
+    def get(self, item_id: str) -> Material | None:
+        """
+        Возвращает файл по идентификатору.
+        """
+        return self.by_id.get(item_id)
+
+
+def scan_materials(directory: str, version: int = 0, mtime_ns: int = 0, page_size: int = PAGE_SIZE) -> MaterialsCatalog:
+    """
+    Сканирует директорию и строит каталог материалов.
+
+    Args:
+        directory (str): Директория материалов.
+        version (int): Номер снимка.
+        mtime_ns (int): Время изменения директории.
+        page_size (int): Количество файлов на странице меню.
+
+    Returns:
+        MaterialsCatalog: Каталог (пустой, если директории нет).
+    """
+    materials = []
+    ids = set()
+    try:
+        entries = sorted(os.scandir(directory), key=lambda e: e.name)
+    except OSError:
+        entries = []
+    for entry in entries:
+        if not entry.is_file():
+            continue
+        item_id = material_id(entry.name)
+        length = ID_LENGTH
+        # При совпадении префиксов удлиняем идентификатор
+        while item_id in ids:
+            length += 2
+            item_id = material_id(entry.name, length)
+        ids.add(item_id)
+        mime_type = mimetypes.guess_type(entry.name)[0] or "application/octet-stream"
+        st = entry.stat()
+        materials.append(Material(item_id, entry.name, entry.path, st.st_size, mime_type, st.st_mtime_ns))
+    return MaterialsCatalog(directory, materials, version, mtime_ns, page_size)
+
+
+def _files_changed(catalog: MaterialsCatalog) -> bool:
+    # Перезапись файла на месте не меняет время изменения директории
+    for material in catalog.items:
+        try:
+            st = os.stat(material.path)
+        except OSError:
+            return True
+        if st.st_size != material.size or st.st_mtime_ns != material.mtime_ns:
+            return True
+    return False
+
+
+class MaterialsIndex:
+    """
+    Кэш каталогов материалов по директориям.
+
+    Директория сканируется один раз; при обращении (не чаще, чем раз в
+    check_interval секунд) проверяются время её изменения и stat файлов
+    каталога, и при добавлении, удалении, переименовании или перезаписи
+    файлов каталог строится заново.
+    """
+
+    def __init__(self, check_interval: float = CHECK_INTERVAL, page_size: int = PAGE_SIZE):
+        """
+        Args:
+            check_interval (float): Минимальный интервал между проверками директории, секунды.
+            page_size (int): Количество файлов на странице меню.
+        """
+        self.check_interval = check_interval
+        self.page_size = page_size
+        self._catalogs = {}
+        self._checked_at = {}
+        self._lock = threading.Lock()
+        self.rescans = 0
+
+    def peek(self, directory: str) -> MaterialsCatalog | None:
+        """
+        Возвращает каталог без обращения к диску, если директория недавно проверялась.
+
+        Returns:
+            MaterialsCatalog | None: Каталог или None, если нужна проверка.
+        """
+        catalog = self._catalogs.get(directory)
+        if catalog is not None and time.monotonic() - self._checked_at.get(directory, 0.0) < self.check_interval:
+            return catalog
+        return None
+
+    def get(self, directory: str) -> MaterialsCatalog:
+        """
+        Возвращает актуальный каталог директории.
+
+        Args:
+            directory (str): Директория материалов.
+
+        Returns:
+            MaterialsCatalog: Каталог материалов.
+        """
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            mtime_ns = 0
+
+        with self._lock:
+            catalog = self._catalogs.get(directory)
+            if catalog is None or catalog.mtime_ns != mtime_ns or _files_changed(catalog):
+                catalog = scan_materials(directory, next(_versions), mtime_ns, self.page_size)
+                self._catalogs[directory] = catalog
+                self.rescans += 1
+            self._checked_at[directory] = time.monotonic()
+        return catalog
+
+
+materials_index = MaterialsIndex()
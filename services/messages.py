@@ -1,10 +1,14 @@
 import os
 
+from core.data_cache import load_text
+
 
 def load_message(filename: str) -> str:
     """
     Загружает текстовое сообщение из файла в папке 'data'.
 
+    Содержимое кэшируется и перечитывается только после изменения файла.
+
     Args:
         filename (str): Имя файла с сообщением.
 
@@ -12,8 +16,4 @@ def load_message(filename: str) -> str:
         str: Содержимое файла без начальных и конечных пробелов.
              Пустая строка, если файл не найден.
     """
-    path = os.path.join("data", filename)
-    if not os.path.exists(path):
-        return ""
-    with open(path, encoding="utf-8") as f:
-        return f.read().strip()
+    return load_text(os.path.join("data", filename), "")
@@ -1,7 +1,588 @@
 import os
 import csv
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime
 
+ORDERS_DB = os.path.join("orders", "orders.db")
+
+ORDER_FIELDS = [
+    "user_id",
+    "username",
+    "fio",
+    "packaging",
+    "item_id",
+    "name",
+    "unit",
+    "qty",
+    "price",
+    "timestamp",
+]
+
+
+class OrderRepository(ABC):
+    """
+    Базовый интерфейс хранилища заказов сувениров.
+
+    Реализации держат в памяти множество пользователей с открытым заказом,
+    поэтому проверка has_order не обращается к диску.
+    """
+
+    def __init__(self):
+        self._open_orders = set()
+        self._open_lock = threading.Lock()
+
+    @abstractmethod
+    def replace(self, user_id: int, username: str, fio: str, packaging: str, items: list) -> None:
+        """
+        Заменяет заказ пользователя целиком.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            username (str): Имя пользователя Telegram (может быть пустым).
+            fio (str): ФИО пользователя.
+            packaging (str): Тип упаковки.
+            items (list): Список товаров (словари с ключами id, name, unit, qty, price).
+        """
+
+    @abstractmethod
+    def get(self, user_id: int) -> list | None:
+        """
+        Возвращает строки заказа пользователя.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            list[dict] | None: Строки заказа с ключами ORDER_FIELDS или None, если заказа нет.
+        """
+
+    @abstractmethod
+    def cancel(self, user_id: int) -> bool:
+        """
+        Отменяет заказ пользователя.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            bool: True, если заказ был удалён, False если заказа не было.
+        """
+
+    @abstractmethod
+    def iter_rows(self):
+        """
+        Перебирает строки всех заказов.
+
+        Yields:
+            dict: Строка заказа с ключами ORDER_FIELDS.
+        """
+
+    def has_order(self, user_id: int) -> bool:
+        """
+        Проверяет наличие открытого заказа без обращения к диску.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            bool: True, если у пользователя есть заказ.
+        """
+        return int(user_id) in self._open_orders
+
+    def users_with_orders(self) -> set:
+        """
+        Возвращает копию множества пользователей с открытым заказом.
+
+        Returns:
+            set[int]: Идентификаторы пользователей.
+        """
+        with self._open_lock:
+            return set(self._open_orders)
+
+    def _mark_open(self, user_id: int, is_open: bool) -> None:
+        with self._open_lock:
+            if is_open:
+                self._open_orders.add(int(user_id))
+            else:
+                self._open_orders.discard(int(user_id))
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы хранилища.
+        """
+
+
+class CsvOrderRepository(OrderRepository):
+    """
+    Хранилище заказов в виде отдельного CSV-файла orders/<user_id>.csv на пользователя.
+    """
+
+    def __init__(self, orders_dir: str):
+        """
+        Args:
+            orders_dir (str): Путь к директории с заказами.
+        """
+        super().__init__()
+        self.orders_dir = orders_dir
+        os.makedirs(orders_dir, exist_ok=True)
+        for name in os.listdir(orders_dir):
+            user_id, ext = os.path.splitext(name)
+            if ext == ".csv" and user_id.lstrip("-").isdigit():
+                self._open_orders.add(int(user_id))
+
+    def _path(self, user_id) -> str:
+        return os.path.join(self.orders_dir, f"{user_id}.csv")
+
+    def replace(self, user_id, username, fio, packaging, items) -> None:
+        with open(self._path(user_id), "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(ORDER_FIELDS)
+            timestamp = datetime.now().isoformat()
+            for item in items:
+                writer.writerow(
+                    [
+                        user_id,
+                        username or "",
+                        fio,
+                        packaging,
+                        item.get("id", ""),
+                        item.get("name", ""),
+                        item.get("unit", ""),
+                        item.get("qty", ""),
+                        item.get("price", ""),
+                        timestamp,
+                    ]
+                )
+        self._mark_open(user_id, True)
+
+    def get(self, user_id) -> list | None:
+        try:
+            with open(self._path(user_id), encoding="utf-8") as f:
+                return list(csv.DictReader(f))
+        except FileNotFoundError:
+            return None
+
+    def cancel(self, user_id) -> bool:
+        try:
+            os.remove(self._path(user_id))
+        except FileNotFoundError:
+            self._mark_open(user_id, False)
+            return False
+        self._mark_open(user_id, False)
+        return True
+
+    def iter_rows(self):
+        for name in sorted(os.listdir(self.orders_dir)):
+            if name.endswith(".csv"):
+                with open(os.path.join(self.orders_dir, name), encoding="utf-8") as f:
+                    yield from csv.DictReader(f)
+
+
+class SqliteOrderRepository(OrderRepository):
+    """
+    Хранилище заказов в SQLite: таблица orders (одна строка на пользователя)
+    и order_items с индексом по user_id. Замена и отмена заказа выполняются
+    в одной транзакции.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS orders (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL DEFAULT '',
+            fio TEXT NOT NULL DEFAULT '',
+            packaging TEXT NOT NULL DEFAULT '',
+            timestamp TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS order_items (
+            user_id INTEGER NOT NULL REFERENCES orders (user_id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            item_id,
+            name TEXT NOT NULL DEFAULT '',
+            unit TEXT NOT NULL DEFAULT '',
+            qty INTEGER,
+            price REAL,
+            PRIMARY KEY (user_id, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS order_items_item_idx ON order_items (item_id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        ) WITHOUT ROWID;
+    """
+
+    SELECT_ROWS = """
+        SELECT o.user_id, o.username, o.fio, o.packaging, i.item_id, i.name, i.unit,
+               i.qty, i.price, o.timestamp
+        FROM orders o JOIN order_items i ON i.user_id = o.user_id
+    """
+
+    def __init__(self, db_path: str = ORDERS_DB):
+        """
+        Args:
+            db_path (str): Путь к файлу базы данных.
+        """
+        super().__init__()
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(self.SCHEMA)
+        self._open_orders = {row[0] for row in self._conn.execute("SELECT user_id FROM orders")}
+
+    def _write(self, user_id, username, fio, packaging, items, timestamp):
+        self._conn.execute("DELETE FROM orders WHERE user_id = ?", (user_id,))
+        self._conn.execute(
+            "INSERT INTO orders (user_id, username, fio, packaging, timestamp) VALUES (?, ?, ?, ?, ?)",
+            (user_id, username or "", fio, packaging, timestamp),
+        )
+        self._conn.executemany(
+            "INSERT INTO order_items (user_id, position, item_id, name, unit, qty, price) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    user_id,
+                    position,
+                    item.get("id", ""),
+                    item.get("name", ""),
+                    item.get("unit", ""),
+                    item.get("qty", ""),
+                    item.get("price", ""),
+                )
+                for position, item in enumerate(items)
+            ],
+        )
+
+    def replace(self, user_id, username, fio, packaging, items) -> None:
+        user_id = int(user_id)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._write(user_id, username, fio, packaging, items, datetime.now().isoformat())
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        self._mark_open(user_id, True)
+
+    def get(self, user_id) -> list | None:
+        with self._lock:
+            cursor = self._conn.execute(
+                self.SELECT_ROWS + " WHERE o.user_id = ? ORDER BY i.position", (int(user_id),)
+            )
+            rows = cursor.fetchall()
+        if not rows:
+            return None
+        return [dict(zip(ORDER_FIELDS, row)) for row in rows]
+
+    def cancel(self, user_id) -> bool:
+        user_id = int(user_id)
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM orders WHERE user_id = ?", (user_id,)).rowcount
+        self._mark_open(user_id, False)
+        return deleted > 0
+
+    def iter_rows(self):
+        with self._lock:
+            rows = self._conn.execute(self.SELECT_ROWS + " ORDER BY o.user_id, i.position").fetchall()
+        for row in rows:
+            yield dict(zip(ORDER_FIELDS, row))
+
+    def import_csv_dir(self, orders_dir: str, logger=None, force: bool = False) -> int:
+        """
+        Переносит заказы из CSV-файлов orders/<user_id>.csv.
+
+        Без force выполняется один раз: факт миграции отмечается в таблице meta.
+
+        Args:
+            orders_dir (str): Директория с CSV-файлами заказов.
+            logger (logging.Logger | None): Логгер для записи информации.
+            force (bool): Выполнить перенос, даже если он уже был.
+
+        Returns:
+            int: Количество перенесённых заказов.
+        """
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'csv_migrated'").fetchone()
+        if (done and not force) or not os.path.isdir(orders_dir):
+            return 0
+
+        source = CsvOrderRepository(orders_dir)
+        imported = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for user_id in sorted(source.users_with_orders()):
+                    rows = source.get(user_id)
+                    if not rows:
+                        continue
+                    first = rows[0]
+                    items = [
+                        {
+                            "id": row.get("item_id", ""),
+                            "name": row.get("name", ""),
+                            "unit": row.get("unit", ""),
+                            "qty": row.get("qty", ""),
+                            "price": row.get("price", ""),
+                        }
+                        for row in rows
+                    ]
+                    self._write(
+                        user_id,
+                        first.get("username", ""),
+                        first.get("fio", ""),
+                        first.get("packaging", ""),
+                        items,
+                        first.get("timestamp") or datetime.now().isoformat(),
+                    )
+                    imported.append(user_id)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_migrated', ?)",
+                    (datetime.now().isoformat(),),
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+        for user_id in imported:
+            self._mark_open(user_id, True)
+        if logger:
+            logger.info(f"Перенесено {len(imported)} заказов из {orders_dir}")
+        return len(imported)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedOrderRepository(OrderRepository):
+    """
+    Кэш заказов в памяти перед основным хранилищем.
+
+    Запись проходит в основное хранилище и сразу обновляет кэш, поэтому
+    чтения (меню бота, /get_order веб-приложения в том же процессе) не
+    обращаются к диску и не видят устаревших данных. Размер кэша ограничен
+    (LRU), отсутствие заказа тоже кэшируется.
+
+    Запись и чтение при промахе для одного пользователя выполняются под
+    блокировкой его полосы (user_id % USER_LOCK_STRIPES), чтобы результат
+    чтения, начатого до записи, не перезаписал в кэше новые данные.
+    """
+
+    USER_LOCK_STRIPES = 64
+
+    def __init__(self, backend: OrderRepository, max_size: int = 10000):
+        """
+        Args:
+            backend (OrderRepository): Основное хранилище.
+            max_size (int): Максимальное количество пользователей в кэше.
+        """
+        super().__init__()
+        self.backend = backend
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._user_locks = [threading.Lock() for _ in range(self.USER_LOCK_STRIPES)]
+        self.hits = 0
+        self.misses = 0
+
+    def _user_lock(self, user_id: int) -> threading.Lock:
+        return self._user_locks[user_id % self.USER_LOCK_STRIPES]
+
+    def _cached(self, user_id: int) -> tuple[bool, list | None]:
+        with self._lock:
+            if user_id not in self._cache:
+                return False, None
+            self._cache.move_to_end(user_id)
+            self.hits += 1
+            rows = self._cache[user_id]
+        return True, [dict(row) for row in rows] if rows is not None else None
+
+    def _remember(self, user_id, rows):
+        with self._lock:
+            self._cache[user_id] = rows
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def replace(self, user_id, username, fio, packaging, items) -> None:
+        user_id = int(user_id)
+        with self._user_lock(user_id):
+            self.backend.replace(user_id, username, fio, packaging, items)
+            self._remember(user_id, self.backend.get(user_id))
+
+    def get(self, user_id) -> list | None:
+        user_id = int(user_id)
+        found, rows = self._cached(user_id)
+        if found:
+            return rows
+        with self._user_lock(user_id):
+            # Пока ждали блокировку, заказ могли записать или прочитать
+            found, rows = self._cached(user_id)
+            if found:
+                return rows
+            self.misses += 1
+            rows = self.backend.get(user_id)
+            self._remember(user_id, rows)
+        return [dict(row) for row in rows] if rows is not None else None
+
+    def peek(self, user_id: int) -> tuple[bool, list | None]:
+        """
+        Возвращает заказ только из кэша, не обращаясь к основному хранилищу.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            tuple[bool, list | None]: (найден ли пользователь в кэше, строки заказа или None).
+        """
+        return self._cached(int(user_id))
+
+    def cancel(self, user_id) -> bool:
+        user_id = int(user_id)
+        with self._user_lock(user_id):
+            removed = self.backend.cancel(user_id)
+            self._remember(user_id, None)
+        return removed
+
+    def iter_rows(self):
+        return self.backend.iter_rows()
+
+    def has_order(self, user_id: int) -> bool:
+        return self.backend.has_order(user_id)
+
+    def users_with_orders(self) -> set:
+        return self.backend.users_with_orders()
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def order_to_webapp(items: list) -> dict:
+    """
+    Преобразует строки заказа в ответ /get_order для веб-приложения.
+
+    Args:
+        items (list[dict]): Строки заказа.
+
+    Returns:
+        dict: Товары, ФИО и упаковка (пустой словарь для пустого заказа).
+    """
+    if not items:
+        return {}
+    return {
+        "items": [
+            {
+                "id": int(i["item_id"]),
+                "name": i["name"],
+                "unit": i["unit"],
+                "qty": int(i["qty"]),
+            }
+            for i in items
+        ],
+        "fio": items[0].get("fio", ""),
+        "packaging": items[0].get("packaging", ""),
+    }
+
+
+def export_csv_dir(repository: OrderRepository, orders_dir: str) -> int:
+    """
+    Выгружает все заказы в CSV-файлы orders/<user_id>.csv (формат CsvOrderRepository).
+
+    Args:
+        repository (OrderRepository): Источник заказов.
+        orders_dir (str): Директория для CSV-файлов.
+
+    Returns:
+        int: Количество выгруженных заказов.
+    """
+    os.makedirs(orders_dir, exist_ok=True)
+    count = 0
+    current_user, f, writer = None, None, None
+    try:
+        for row in repository.iter_rows():
+            if row["user_id"] != current_user:
+                if f:
+                    f.close()
+                current_user = row["user_id"]
+                f = open(os.path.join(orders_dir, f"{current_user}.csv"), "w", encoding="utf-8", newline="")
+                writer = csv.DictWriter(f, fieldnames=ORDER_FIELDS)
+                writer.writeheader()
+                count += 1
+            writer.writerow(row)
+    finally:
+        if f:
+            f.close()
+    return count
+
+
+_repositories = {}
+_default_repository = None
+
+
+def configure_order_repository(config: dict, logger=None) -> OrderRepository:
+    """
+    Создаёт хранилище заказов по настройкам из config.yaml.
+
+    Для backend "sqlite" при первом запуске переносит заказы из CSV-файлов.
+    Если orders_cache_size больше нуля, хранилище оборачивается кэшем в памяти.
+
+    Args:
+        config (dict): Конфигурация (orders_backend, orders_dir, orders_db, orders_cache_size).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        OrderRepository: Активное хранилище заказов.
+    """
+    global _default_repository
+    orders_dir = config.get("orders_dir", "orders")
+    if config.get("orders_backend", "csv") == "sqlite":
+        repository = SqliteOrderRepository(config.get("orders_db", ORDERS_DB))
+        repository.import_csv_dir(orders_dir, logger)
+    else:
+        repository = CsvOrderRepository(orders_dir)
+
+    cache_size = config.get("orders_cache_size", 0)
+    if cache_size:
+        repository = CachedOrderRepository(repository, cache_size)
+
+    if logger:
+        logger.info(f"Хранилище заказов: {type(repository).__name__}")
+    _default_repository = repository
+    _repositories[orders_dir] = repository
+    return repository
+
+
+def get_order_repository(orders_dir: str | None = None) -> OrderRepository:
+    """
+    Возвращает хранилище заказов для директории orders_dir.
+
+    Если хранилище не настроено через configure_order_repository,
+    используются CSV-файлы в orders_dir.
+
+    Args:
+        orders_dir (str | None): Путь к директории с заказами.
+
+    Returns:
+        OrderRepository: Хранилище заказов.
+    """
+    if orders_dir is None:
+        if _default_repository is None:
+            return get_order_repository("orders")
+        return _default_repository
+    repository = _repositories.get(orders_dir)
+    if repository is None:
+        repository = _repositories.setdefault(orders_dir, CsvOrderRepository(orders_dir))
+    return repository
+
 
 def save_order(
     user_id: int,
@@ -13,7 +594,7 @@ def save_order(
     logger,
 ) -> None:
     """
-    Сохраняет заказ пользователя в CSV-файл.
+    Сохраняет заказ пользователя, заменяя предыдущий.
 
     Args:
         user_id (int): Идентификатор пользователя.
@@ -25,66 +606,41 @@ def save_order(
         logger (logging.Logger): Логгер для записи информации.
     """
     logger.debug(f"Сохранение заказа: user_id={user_id}, fio={fio}, items_count={len(items)}")
-    order_file = os.path.join(orders_dir, f"{user_id}.csv")
-
-    with open(order_file, "w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(
-            [
-                "user_id",
-                "username",
-                "fio",
-                "packaging",
-                "item_id",
-                "name",
-                "unit",
-                "qty",
-                "price",
-                "timestamp",
-            ]
-        )
-        timestamp = datetime.now().isoformat()
-        for item in items:
-            writer.writerow(
-                [
-                    user_id,
-                    username or "",
-                    fio,
-                    packaging,
-                    item.get("id", ""),
-                    item.get("name", ""),
-                    item.get("unit", ""),
-                    item.get("qty", ""),
-                    item.get("price", ""),
-                    timestamp,
-                ]
-            )
+    get_order_repository(orders_dir).replace(user_id, username, fio, packaging, items)
     logger.info(f"Заказ пользователя {user_id} успешно сохранён")
 
 
 def read_order(user_id: int, orders_dir: str) -> list | None:
     """
-    Читает заказ пользователя из CSV-файла.
+    Читает заказ пользователя.
 
     Args:
         user_id (int): Идентификатор пользователя.
         orders_dir (str): Путь к директории с заказами.
 
     Returns:
-        list[dict] | None: Список строк заказа в виде словарей или None, если файл не найден.
+        list[dict] | None: Список строк заказа в виде словарей или None, если заказа нет.
     """
-    order_file = os.path.join(orders_dir, f"{user_id}.csv")
-    if not os.path.exists(order_file):
-        return None
+    return get_order_repository(orders_dir).get(user_id)
 
-    with open(order_file, encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return [row for row in reader]
+
+def has_open_order(user_id: int, orders_dir: str) -> bool:
+    """
+    Проверяет наличие заказа у пользователя без обращения к диску.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        orders_dir (str): Путь к директории с заказами.
+
+    Returns:
+        bool: True, если у пользователя есть заказ.
+    """
+    return get_order_repository(orders_dir).has_order(user_id)
 
 
 def remove_order(user_id: int, orders_dir: str, logger) -> bool:
     """
-    Удаляет файл заказа пользователя.
+    Удаляет заказ пользователя.
 
     Args:
         user_id (int): Идентификатор пользователя.
@@ -92,11 +648,9 @@ def remove_order(user_id: int, orders_dir: str, logger) -> bool:
         logger (logging.Logger): Логгер для записи информации.
 
     Returns:
-        bool: True, если файл был удалён, False если файла не было.
+        bool: True, если заказ был удалён, False если заказа не было.
     """
-    order_file = os.path.join(orders_dir, f"{user_id}.csv")
-    if os.path.exists(order_file):
-        os.remove(order_file)
+    if get_order_repository(orders_dir).cancel(user_id):
         logger.info(f"Заказ пользователя {user_id} удалён")
         return True
     return False
@@ -0,0 +1,323 @@
+# services/persistence.py
+
+import asyncio
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from services import storage
+
+PERSISTENCE_DB = os.path.join("data", "persistence.db")
+UPDATE_INTERVAL = 30
+USER_DATA = "user_data"
+CHAT_DATA = "chat_data"
+# Пустые данные не хранятся: строка удаляется
+EMPTY = hash(b"")
+
+
+def dumps(data) -> bytes:
+    """
+    Сериализует данные пользователя, чата или состояние разговора.
+
+    Данные из простых типов (а это почти всё, что хранит бот: текущее меню,
+    номера версий) записываются компактным JSON; остальное — pickle.
+
+    Args:
+        data: Данные для сохранения.
+
+    Returns:
+        bytes: Сериализованные данные.
+    """
+    try:
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # JSON превращает кортежи в списки и ключи в строки — такие данные сохраняем через pickle
+        if json.loads(raw) == data:
+            return raw
+    except (TypeError, ValueError):
+        pass
+    return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def loads(raw: bytes):
+    """
+    Восстанавливает данные, сохранённые dumps().
+    """
+    # Pickle начинается с байта PROTO (0x80), JSON — никогда
+    if raw[:1] == b"\x80":
+        return pickle.loads(raw)
+    return json.loads(raw)
+
+
+class SQLitePersistence(BasePersistence):
+    """
+    Хранение user_data, chat_data и состояний ConversationHandler в SQLite.
+
+    В отличие от PicklePersistence, который при каждом сохранении
+    перезаписывает весь файл, здесь каждая запись — отдельная строка, а при
+    сохранении пишутся только пользователи и чаты, чьи данные изменились с
+    прошлой записи (сравнивается хэш сериализованных данных). Все изменения
+    одного цикла сохранения записываются одной транзакцией в пуле хранилища.
+
+    Данные загружаются лениво: при запуске в память читаются только активные
+    разговоры, а данные пользователя — при первом его обновлении
+    (refresh_user_data). bot_data не сохраняется: там лежат конфигурация и
+    логгер, которые создаются при запуске.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS user_data (
+            id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL,
+            updated_at INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS chat_data (
+            id INTEGER PRIMARY KEY,
+            data BLOB NOT NULL,
+            updated_at INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS conversations (
+            name TEXT NOT NULL,
+            key TEXT NOT NULL,
+            state BLOB NOT NULL,
+            PRIMARY KEY (name, key)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str = PERSISTENCE_DB, update_interval: float = UPDATE_INTERVAL, logger=None):
+        """
+        Args:
+            db_path (str): Путь к файлу базы данных.
+            update_interval (float): Интервал сохранения изменений, секунды.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=True, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.db_path = db_path
+        self.logger = logger
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        # Хэш последних записанных данных; наличие ключа означает, что данные уже загружены
+        self._written = {USER_DATA: {}, CHAT_DATA: {}}
+        self._pending = {}
+        self._writer = None
+        self.loads = 0
+        self.writes = 0
+        self.skipped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    # --- Синхронные операции с базой (выполняются в пуле хранилища) ---
+
+    def _load(self, table: str, key: int) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT data FROM {table} WHERE id = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _load_conversations(self, name: str) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, state FROM conversations WHERE name = ?", (name,)).fetchall()
+        return {tuple(json.loads(key)): loads(state) for key, state in rows}
+
+    def _write(self, batch: dict) -> None:
+        now = int(time.time())
+        upserts = {USER_DATA: [], CHAT_DATA: [], "conversations": []}
+        deletes = {USER_DATA: [], CHAT_DATA: [], "conversations": []}
+        for (table, key), raw in batch.items():
+            if table == "conversations":
+                name, conv_key = key
+                key_text = json.dumps(list(conv_key), separators=(",", ":"))
+                if raw is None:
+                    deletes[table].append((name, key_text))
+                else:
+                    upserts[table].append((name, key_text, raw))
+            elif raw is None:
+                deletes[table].append((key,))
+            else:
+                upserts[table].append((key, raw, now))
+        started = time.perf_counter()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for table in (USER_DATA, CHAT_DATA):
+                    self._conn.executemany(
+                        f"INSERT INTO {table} (id, data, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                        upserts[table],
+                    )
+                    self._conn.executemany(f"DELETE FROM {table} WHERE id = ?", deletes[table])
+                self._conn.executemany("INSERT OR REPLACE INTO conversations VALUES (?, ?, ?)", upserts["conversations"])
+                self._conn.executemany("DELETE FROM conversations WHERE name = ? AND key = ?", deletes["conversations"])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.writes += len(batch)
+        self.flushes += 1
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    # --- Запись изменений ---
+
+    def _mark(self, table: str, key: int, data: dict) -> None:
+        raw = dumps(data) if data else b""
+        digest = hash(raw)
+        if self._written[table].get(key, EMPTY) == digest:
+            self.skipped += 1
+            return
+        self._written[table][key] = digest
+        self._pending[(table, key)] = raw or None
+        self._schedule_write()
+
+    def _schedule_write(self) -> None:
+        # Application.update_persistence вызывает update_* для всех изменённых
+        # записей сразу; задача записи стартует после них и пишет всё одной транзакцией
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self) -> None:
+        await asyncio.sleep(0)
+        while self._pending:
+            batch, self._pending = self._pending, {}
+            try:
+                await storage.get_storage_pool().run("persistence.write", self._write, batch)
+            except Exception as e:
+                # Не записанное вернётся в очередь и попадёт в следующую запись
+                for key, raw in batch.items():
+                    self._pending.setdefault(key, raw)
+                    if key[0] in self._written:
+                        self._written[key[0]][key[1]] = None
+                if self.logger:
+                    self.logger.error(f"Ошибка записи состояния пользователей: {e}")
+                return
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        self._mark(USER_DATA, user_id, data)
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        self._mark(CHAT_DATA, chat_id, data)
+
+    async def update_conversation(self, name: str, key: tuple, new_state: object | None) -> None:
+        self._pending[("conversations", (name, key))] = None if new_state is None else dumps(new_state)
+        self._schedule_write()
+
+    def _drop(self, table: str, key: int) -> None:
+        self._written[table][key] = EMPTY
+        self._pending[(table, key)] = None
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._drop(USER_DATA, user_id)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._drop(CHAT_DATA, chat_id)
+
+    async def flush(self) -> None:
+        """
+        Дожидается записи всех изменений (вызывается при остановке бота).
+        """
+        if self._writer is not None:
+            await self._writer
+        if self._pending:
+            await self._write_pending()
+        if self.logger:
+            self.logger.info(f"Состояние пользователей сохранено: {self.stats()}")
+
+    # --- Загрузка ---
+
+    async def _refresh(self, table: str, key: int, data: dict) -> None:
+        if key in self._written[table]:
+            return
+        raw = await storage.get_storage_pool().run("persistence.load", self._load, table, key)
+        if key in self._written[table]:  # загружено параллельным обновлением
+            return
+        self.loads += 1
+        if raw is None:
+            self._written[table][key] = EMPTY
+            return
+        self._written[table][key] = hash(raw)
+        for name, value in loads(raw).items():
+            data.setdefault(name, value)
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        await self._refresh(USER_DATA, user_id, user_data)
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        await self._refresh(CHAT_DATA, chat_id, chat_data)
+
+    async def get_user_data(self) -> dict:
+        return {}
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_conversations(self, name: str) -> dict:
+        return await storage.get_storage_pool().run("persistence.conversations", self._load_conversations, name)
+
+    # --- bot_data и callback_data не сохраняются ---
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    async def get_callback_data(self):
+        return None
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики хранилища.
+
+        Returns:
+            dict: Загружено записей, записано, пропущено без изменений,
+                  количество транзакций и длительность последней (мс).
+        """
+        return {
+            "loaded": self.loads,
+            "written": self.writes,
+            "skipped": self.skipped,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def configure_persistence(config: dict, logger=None) -> SQLitePersistence | None:
+    """
+    Создаёт хранилище состояния пользователей по настройкам из config.yaml.
+
+    Args:
+        config (dict): Конфигурация (persistence, persistence_db, persistence_interval).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        SQLitePersistence | None: Хранилище или None, если оно отключено.
+    """
+    if not config.get("persistence", True):
+        return None
+    return SQLitePersistence(
+        config.get("persistence_db", PERSISTENCE_DB),
+        update_interval=config.get("persistence_interval", UPDATE_INTERVAL),
+        logger=logger,
+    )
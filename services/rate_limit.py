@@ -0,0 +1,349 @@
+# services/rate_limit.py
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+GLOBAL_RATE = 30
+GLOBAL_BURST = 10
+PRIVATE_RATE = 1
+PRIVATE_BURST = 3
+GROUP_PER_MINUTE = 20
+GROUP_BURST = 3
+MAX_RETRIES = 3
+# 429 в стольких разных чатах за FLOOD_WINDOW секунд — превышен общий лимит бота
+FLOOD_CHATS = 3
+FLOOD_WINDOW = 1.0
+METRICS_INTERVAL = 60
+SLOW_QUEUE = 1.0
+DELAY_WINDOW = 2048
+MAX_CHATS = 10000
+PRUNE_EVERY = 1000
+# Служебные запросы не отправляют сообщений и не ждут в очереди
+EXEMPT_ENDPOINTS = {"getMe", "getWebhookInfo", "setWebhook", "deleteWebhook", "setMyCommands", "close", "logOut"}
+# Ответ на нажатие кнопки не создаёт сообщения и не учитывается Telegram в лимитах отправки
+GLOBAL_EXEMPT_ENDPOINTS = {"answerCallbackQuery"}
+
+
+class TokenBucket:
+    """
+    Ведро токенов для ограничения частоты запросов к Telegram.
+
+    Токены пополняются со скоростью rate в секунду до capacity. acquire()
+    ждёт токен; среди ожидающих первым обслуживается запрос с меньшим
+    значением priority, при равном приоритете — пришедший раньше. block()
+    опустошает ведро и запрещает выдачу до указанного момента — так ответ 429
+    (RetryAfter) приостанавливает всех отправителей одной паузой, а не каждого
+    по отдельности.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate (float): Скорость пополнения, токенов в секунду.
+            capacity (float | None): Размер ведра (по умолчанию равен rate).
+        """
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters = []
+        self._order = itertools.count()
+        self._timer = None
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """
+        Возвращает время до появления токена, секунды (0, если токен есть).
+        """
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    @property
+    def waiting(self) -> int:
+        """
+        Количество запросов, ожидающих токен.
+        """
+        return len(self._waiters)
+
+    def try_acquire(self) -> bool:
+        """
+        Забирает токен, если он есть, без ожидания.
+
+        Returns:
+            bool: True, если токен получен.
+        """
+        if self.delay() > 0:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def acquire(self, priority: int = INTERACTIVE) -> float:
+        """
+        Ждёт и забирает токен.
+
+        Args:
+            priority (int): Приоритет запроса (меньше — важнее).
+
+        Returns:
+            float: Время ожидания, секунды.
+        """
+        if not self._waiters and self.try_acquire():
+            return 0.0
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), future))
+        self._schedule()
+        await future
+        return time.monotonic() - started
+
+    def _schedule(self) -> None:
+        if self._timer is None and self._waiters:
+            self._timer = asyncio.get_running_loop().call_later(self.delay(), self._grant)
+
+    def _grant(self) -> None:
+        self._timer = None
+        while self._waiters:
+            if self._waiters[0][2].done():  # ожидание отменено
+                heapq.heappop(self._waiters)
+                continue
+            if not self.try_acquire():
+                break
+            heapq.heappop(self._waiters)[2].set_result(None)
+        self._schedule()
+
+    def block(self, seconds: float) -> None:
+        """
+        Запрещает выдачу токенов на seconds секунд.
+
+        Args:
+            seconds (float): Длительность паузы.
+        """
+        now = time.monotonic()
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = 0
+        self._updated = now
+
+
+def _is_message(endpoint: str) -> bool:
+    # Лимиты на чат относятся к новым сообщениям, а не к правкам и действиям в чате
+    return (endpoint.startswith("send") and endpoint != "sendChatAction") or endpoint in (
+        "forwardMessage",
+        "forwardMessages",
+        "copyMessage",
+        "copyMessages",
+    )
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+class OutboundRateLimiter(BaseRateLimiter[int]):
+    """
+    Планировщик исходящих запросов бота (подключается через ApplicationBuilder.rate_limiter).
+
+    Каждый запрос к Telegram, кроме answerCallbackQuery, проходит общее ведро
+    (global_rate запросов в секунду, всплеск до GLOBAL_BURST). Отправка
+    сообщений дополнительно проходит ведро своего чата: для личных чатов —
+    private_rate в секунду, для групп (в том числе чата операторов) —
+    group_per_minute в минуту. Редактирование и удаление сообщений при
+    навигации по меню ограничены только общим ведром.
+    Интерактивные ответы (по умолчанию) получают токены раньше массовых
+    отправок: рассылка передаёт rate_limit_args=BULK. Ответ 429 на запрос в
+    чат блокирует только ведро этого чата на время из RetryAfter; общее ведро
+    блокируется, если 429 пришёл на запрос без чата или несколько чатов
+    получили 429 одновременно (превышен общий лимит бота). Ожидающие запросы
+    повторяются после одной общей паузы. Собираются задержки в очереди по
+    приоритетам и счётчики 429.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = GLOBAL_RATE,
+        private_rate: float = PRIVATE_RATE,
+        group_per_minute: float = GROUP_PER_MINUTE,
+        max_retries: int = MAX_RETRIES,
+        metrics_interval: float = METRICS_INTERVAL,
+        logger=None,
+    ):
+        """
+        Args:
+            global_rate (float): Общий лимит, запросов в секунду.
+            private_rate (float): Лимит на личный чат, сообщений в секунду.
+            group_per_minute (float): Лимит на групповой чат, сообщений в минуту.
+            max_retries (int): Сколько раз повторять запрос после RetryAfter.
+            metrics_interval (float): Интервал записи метрик в лог, секунды (0 — не писать).
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.global_bucket = TokenBucket(global_rate, capacity=min(GLOBAL_BURST, global_rate))
+        self.private_rate = private_rate
+        self.group_rate = group_per_minute / 60
+        self.max_retries = max_retries
+        self.metrics_interval = metrics_interval
+        self.logger = logger
+        self._chats = {}
+        self._floods = deque()
+        self._requests = 0
+        self._delays = {priority: deque(maxlen=DELAY_WINDOW) for priority in PRIORITY_NAMES}
+        self._counts = dict.fromkeys(PRIORITY_NAMES, 0)
+        self.flood_waits = 0
+        self.retries = 0
+        self.max_delay = 0.0
+        self._metrics_task = None
+
+    async def initialize(self) -> None:
+        if self.metrics_interval and self.logger and self._metrics_task is None:
+            self._metrics_task = asyncio.create_task(self._log_metrics())
+
+    async def shutdown(self) -> None:
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            await asyncio.gather(self._metrics_task, return_exceptions=True)
+            self._metrics_task = None
+        if self.logger:
+            self.logger.info(f"Метрики исходящих запросов: {self.metrics()}")
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, str) or int(chat_id) < 0
+            if is_group:
+                bucket = TokenBucket(self.group_rate, capacity=GROUP_BURST)
+            else:
+                bucket = TokenBucket(self.private_rate, capacity=PRIVATE_BURST)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _prune(self) -> None:
+        # Полные ведра без ожидающих ничем не отличаются от новых
+        if len(self._chats) > MAX_CHATS:
+            for chat_id in [c for c, b in self._chats.items() if not b.waiting and b.delay() == 0]:
+                del self._chats[chat_id]
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if endpoint in EXEMPT_ENDPOINTS:
+            return await callback(*args, **kwargs)
+
+        self._requests += 1
+        if self._requests % PRUNE_EVERY == 0:
+            # Полный проход по ведрам чатов — раз в PRUNE_EVERY запросов, а не на каждом
+            self._prune()
+        priority = rate_limit_args if rate_limit_args in PRIORITY_NAMES else INTERACTIVE
+        chat_id = data.get("chat_id")
+        chat_bucket = self._chat_bucket(chat_id) if chat_id is not None and _is_message(endpoint) else None
+        use_global = endpoint not in GLOBAL_EXEMPT_ENDPOINTS
+        queued = time.monotonic()
+        for attempt in range(self.max_retries + 1):
+            if chat_bucket is not None:
+                await chat_bucket.acquire(priority)
+            if use_global:
+                await self.global_bucket.acquire(priority)
+            if attempt == 0:
+                self._record(priority, time.monotonic() - queued)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.flood_waits += 1
+                if attempt == self.max_retries:
+                    raise
+                self.retries += 1
+                retry_after = float(e.retry_after)
+                if chat_bucket is not None:
+                    # Пауза одного чата не должна останавливать ответы остальным пользователям
+                    chat_bucket.block(retry_after)
+                if chat_bucket is None or self._global_flood(chat_id):
+                    self.global_bucket.block(retry_after)
+                if self.logger:
+                    self.logger.warning(f"Telegram 429 на {endpoint} (чат {chat_id}), пауза {retry_after:.0f} с")
+
+    def _global_flood(self, chat_id) -> bool:
+        now = time.monotonic()
+        self._floods.append((now, chat_id))
+        while self._floods and now - self._floods[0][0] > FLOOD_WINDOW:
+            self._floods.popleft()
+        return len({c for _, c in self._floods}) >= FLOOD_CHATS
+
+    def _record(self, priority: int, delay: float) -> None:
+        self._counts[priority] += 1
+        self._delays[priority].append(delay)
+        self.max_delay = max(self.max_delay, delay)
+
+    def metrics(self) -> dict:
+        """
+        Возвращает метрики очереди исходящих запросов.
+
+        Returns:
+            dict: Ожидающие запросы, счётчики 429 и повторов, количество запросов
+                  и p50/p99 задержки в очереди (мс) по приоритетам.
+        """
+        return {
+            "waiting": self.global_bucket.waiting,
+            "chats": len(self._chats),
+            "flood_waits": self.flood_waits,
+            "retries": self.retries,
+            "max_delay_ms": self.max_delay * 1000,
+            **{
+                name: {
+                    "count": self._counts[priority],
+                    "delay_p50_ms": _percentile(self._delays[priority], 0.5),
+                    "delay_p99_ms": _percentile(self._delays[priority], 0.99),
+                }
+                for priority, name in PRIORITY_NAMES.items()
+            },
+        }
+
+    async def _log_metrics(self) -> None:
+        reported_floods = 0
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            metrics = self.metrics()
+            new_floods = metrics["flood_waits"] - reported_floods
+            reported_floods = metrics["flood_waits"]
+            if metrics["interactive"]["delay_p99_ms"] >= SLOW_QUEUE * 1000 or new_floods:
+                self.logger.warning(f"Исходящие запросы близки к лимитам Telegram: {metrics}")
+            else:
+                self.logger.debug(f"Метрики исходящих запросов: {metrics}")
+
+
+def configure_rate_limiter(config: dict, logger=None) -> OutboundRateLimiter | None:
+    """
+    Создаёт планировщик исходящих запросов по настройкам из config.yaml.
+
+    Args:
+        config (dict): Конфигурация (rate_limiter, rate_limit_global,
+            rate_limit_private, rate_limit_group_per_minute).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        OutboundRateLimiter | None: Планировщик или None, если он отключён.
+    """
+    if not config.get("rate_limiter", True):
+        return None
+    return OutboundRateLimiter(
+        global_rate=config.get("rate_limit_global", GLOBAL_RATE),
+        private_rate=config.get("rate_limit_private", PRIVATE_RATE),
+        group_per_minute=config.get("rate_limit_group_per_minute", GROUP_PER_MINUTE),
+        logger=logger,
+    )
@@ -2,47 +2,621 @@
 
 import os
 import json
+import time
+import asyncio
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
 
 REG_DIR = "registrations"
+REG_DB = os.path.join(REG_DIR, "registrations.db")
+CACHE_SIZE = 10000
 
 
-def ensure_reg_dir():
+class RegistrationStore(ABC):
     """
-    Проверяет наличие директории для регистраций, создаёт при отсутствии.
+    Базовый интерфейс хранилища записей пользователей на экскурсии.
     """
-    if not os.path.exists(REG_DIR):
-        os.makedirs(REG_DIR)
+
+    @abstractmethod
+    def get(self, user_id: int) -> set:
+        """
+        Возвращает множество ID туров, на которые записан пользователь.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            set: Множество ID туров (пустое, если записей нет).
+        """
+
+    @abstractmethod
+    def save(self, user_id: int, registrations: set) -> None:
+        """
+        Полностью заменяет записи пользователя.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            registrations (set): Множество ID туров.
+        """
+
+    def save_many(self, items: dict) -> None:
+        """
+        Сохраняет записи нескольких пользователей.
+
+        Args:
+            items (dict): Отображение user_id -> множество ID туров.
+        """
+        for user_id, registrations in items.items():
+            self.save(user_id, registrations)
+
+    @abstractmethod
+    def users_for_tour(self, tour_id: str) -> list:
+        """
+        Возвращает пользователей, записанных на тур.
+
+        Args:
+            tour_id (str): Идентификатор тура.
+
+        Returns:
+            list[int]: Идентификаторы пользователей.
+        """
+
+    def count(self, tour_id: str) -> int:
+        """
+        Возвращает количество записей на тур.
+
+        Args:
+            tour_id (str): Идентификатор тура.
+
+        Returns:
+            int: Количество записанных пользователей.
+        """
+        return len(self.users_for_tour(tour_id))
+
+    @abstractmethod
+    def counts(self) -> dict:
+        """
+        Возвращает количество записей по всем турам.
+
+        Returns:
+            dict: Отображение ID тура -> количество записей.
+        """
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы хранилища.
+        """
+
+
+class FileRegistrationStore(RegistrationStore):
+    """
+    Хранилище записей в виде отдельного JSON-файла на каждого пользователя.
+    """
+
+    def __init__(self, reg_dir: str = REG_DIR):
+        """
+        Args:
+            reg_dir (str): Директория с файлами registrations/<user_id>.json.
+        """
+        self.reg_dir = reg_dir
+        os.makedirs(reg_dir, exist_ok=True)
+
+    def _path(self, user_id) -> str:
+        return os.path.join(self.reg_dir, f"{user_id}.json")
+
+    def _iter_files(self):
+        for name in os.listdir(self.reg_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(self.reg_dir, name), "r", encoding="utf-8") as f:
+                    yield name[: -len(".json")], json.load(f)
+
+    def get(self, user_id: int) -> set:
+        try:
+            with open(self._path(user_id), "r", encoding="utf-8") as f:
+                return set(json.load(f))
+        except FileNotFoundError:
+            return set()
+
+    def save(self, user_id: int, registrations: set) -> None:
+        # Пишем во временный файл и атомарно подменяем, чтобы не оставить обрезанный JSON
+        fd, tmp_path = tempfile.mkstemp(dir=self.reg_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(list(registrations), f)
+            os.replace(tmp_path, self._path(user_id))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def users_for_tour(self, tour_id: str) -> list:
+        return [int(user_id) for user_id, regs in self._iter_files() if tour_id in regs]
+
+    def counts(self) -> dict:
+        counts = {}
+        for _, regs in self._iter_files():
+            for tour_id in regs:
+                counts[tour_id] = counts.get(tour_id, 0) + 1
+        return counts
+
+
+class SqliteRegistrationStore(RegistrationStore):
+    """
+    Хранилище записей в одном файле SQLite в режиме WAL.
+
+    Записи лежат в таблице (user_id, tour_id) с первичным ключом и индексом
+    по tour_id, а счётчики по турам поддерживаются триггерами в tour_counts,
+    поэтому количество записей на тур читается одной строкой.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS registrations (
+            user_id INTEGER NOT NULL,
+            tour_id TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, tour_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS registrations_tour_idx ON registrations (tour_id);
+        CREATE TABLE IF NOT EXISTS tour_counts (
+            tour_id TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        ) WITHOUT ROWID;
+        CREATE TRIGGER IF NOT EXISTS registrations_ins AFTER INSERT ON registrations BEGIN
+            INSERT INTO tour_counts (tour_id, count) VALUES (NEW.tour_id, 1)
+                ON CONFLICT (tour_id) DO UPDATE SET count = count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS registrations_del AFTER DELETE ON registrations BEGIN
+            UPDATE tour_counts SET count = count - 1 WHERE tour_id = OLD.tour_id;
+        END;
+    """
+
+    def __init__(self, db_path: str = REG_DB):
+        """
+        Args:
+            db_path (str): Путь к файлу базы данных.
+        """
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def get(self, user_id: int) -> set:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tour_id FROM registrations WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def _replace(self, user_id, registrations, now):
+        current = {
+            row[0]
+            for row in self._conn.execute(
+                "SELECT tour_id FROM registrations WHERE user_id = ?", (user_id,)
+            )
+        }
+        removed = current - set(registrations)
+        added = set(registrations) - current
+        if removed:
+            self._conn.executemany(
+                "DELETE FROM registrations WHERE user_id = ? AND tour_id = ?",
+                [(user_id, tour_id) for tour_id in removed],
+            )
+        if added:
+            self._conn.executemany(
+                "INSERT INTO registrations (user_id, tour_id, created_at) VALUES (?, ?, ?)",
+                [(user_id, tour_id, now) for tour_id in added],
+            )
+
+    def save(self, user_id: int, registrations: set) -> None:
+        self.save_many({user_id: registrations})
+
+    def save_many(self, items: dict) -> None:
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for user_id, registrations in items.items():
+                    self._replace(int(user_id), registrations, now)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def users_for_tour(self, tour_id: str) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id FROM registrations WHERE tour_id = ?", (tour_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, tour_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count FROM tour_counts WHERE tour_id = ?", (tour_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT tour_id, count FROM tour_counts WHERE count > 0"
+            ).fetchall()
+        return dict(rows)
+
+    def migrate_from_dir(self, reg_dir: str, logger=None) -> int:
+        """
+        Однократно переносит записи из JSON-файлов registrations/<user_id>.json.
+
+        Повторный вызов ничего не делает: факт миграции отмечается в таблице meta.
+
+        Args:
+            reg_dir (str): Директория с JSON-файлами.
+            logger (logging.Logger | None): Логгер для записи информации.
+
+        Returns:
+            int: Количество перенесённых пользователей.
+        """
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'json_migrated'"
+            ).fetchone()
+        if done or not os.path.isdir(reg_dir):
+            return 0
+
+        items = {}
+        for name in os.listdir(reg_dir):
+            user_id, ext = os.path.splitext(name)
+            if ext != ".json" or not user_id.lstrip("-").isdigit():
+                continue
+            try:
+                with open(os.path.join(reg_dir, name), "r", encoding="utf-8") as f:
+                    items[int(user_id)] = set(json.load(f))
+            except (OSError, ValueError) as e:
+                if logger:
+                    logger.error(f"Ошибка чтения записей из {name}: {e}")
+
+        self.save_many(items)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (datetime.now().isoformat(),),
+            )
+        if logger:
+            logger.info(f"Перенесены записи на экскурсии {len(items)} пользователей из {reg_dir}")
+        return len(items)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class WriteBehindRegistrationStore(RegistrationStore):
+    """
+    Буфер отложенной записи перед основным хранилищем.
+
+    Изменения сразу применяются в памяти, повторные переключения одного
+    пользователя схлопываются в одну запись, а «грязные» пользователи
+    сбрасываются в основное хранилище пачками раз в interval секунд
+    (в отдельном потоке, чтобы не блокировать цикл событий). Выборки по
+    турам читают основное хранилище и накладывают на него несброшенные
+    изменения, не дожидаясь сброса. Кэш прочитанных записей ограничен
+    cache_size пользователями (LRU); несброшенные записи не вытесняются.
+    """
+
+    def __init__(
+        self,
+        backend: RegistrationStore,
+        interval: float = 2.0,
+        batch_size: int = 500,
+        cache_size: int = CACHE_SIZE,
+        logger=None,
+    ):
+        """
+        Args:
+            backend (RegistrationStore): Основное хранилище.
+            interval (float): Интервал сброса, секунды.
+            batch_size (int): Максимальное количество пользователей в одной пачке.
+            cache_size (int): Максимальное количество пользователей в кэше.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.backend = backend
+        self.interval = interval
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.logger = logger
+        self._cache = OrderedDict()
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task = None
+        self._stopped = False
+        self.flushes = 0
+        self.flushed_users = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    def get(self, user_id: int) -> set:
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None:
+                self._cache.move_to_end(user_id)
+        if cached is None:
+            cached = frozenset(self.backend.get(user_id))
+            with self._lock:
+                cached = self._cache.setdefault(user_id, cached)
+                self._evict()
+        return set(cached)
+
+    def save(self, user_id: int, registrations: set) -> None:
+        frozen = frozenset(registrations)
+        with self._lock:
+            self._cache[user_id] = frozen
+            self._cache.move_to_end(user_id)
+            self._dirty[user_id] = frozen
+            self._evict()
+
+    def _evict(self) -> None:
+        # Вызывается под self._lock; несброшенные записи должны остаться в кэше
+        excess = len(self._cache) - self.cache_size
+        if excess <= 0:
+            return
+        victims = []
+        for user_id in self._cache:
+            if len(victims) >= excess:
+                break
+            if user_id not in self._dirty:
+                victims.append(user_id)
+        for user_id in victims:
+            del self._cache[user_id]
+
+    def _read(self, func, *args) -> tuple:
+        # Под _flush_lock пачка не может оказаться ни в _dirty, ни в основном хранилище
+        with self._flush_lock:
+            result = func(*args)
+            with self._lock:
+                dirty = dict(self._dirty)
+            stored = {user_id: self.backend.get(user_id) for user_id in dirty}
+        return result, dirty, stored
+
+    def users_for_tour(self, tour_id: str) -> list:
+        users, dirty, _ = self._read(self.backend.users_for_tour, tour_id)
+        users = set(users)
+        for user_id, regs in dirty.items():
+            if tour_id in regs:
+                users.add(user_id)
+            else:
+                users.discard(user_id)
+        return list(users)
+
+    def count(self, tour_id: str) -> int:
+        count, dirty, stored = self._read(self.backend.count, tour_id)
+        for user_id, regs in dirty.items():
+            count += (tour_id in regs) - (tour_id in stored[user_id])
+        return count
+
+    def counts(self) -> dict:
+        counts, dirty, stored = self._read(self.backend.counts)
+        counts = dict(counts)
+        for user_id, regs in dirty.items():
+            for tour_id in regs - stored[user_id]:
+                counts[tour_id] = counts.get(tour_id, 0) + 1
+            for tour_id in stored[user_id] - regs:
+                counts[tour_id] -= 1
+        return {tour_id: count for tour_id, count in counts.items() if count > 0}
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество пользователей, ожидающих записи в основное хранилище.
+        """
+        return len(self._dirty)
+
+    def flush(self) -> int:
+        """
+        Сбрасывает все накопленные изменения в основное хранилище.
+
+        Returns:
+            int: Количество записанных пользователей.
+        """
+        total = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._dirty:
+                        break
+                    batch = dict(list(self._dirty.items())[: self.batch_size])
+                    for user_id in batch:
+                        del self._dirty[user_id]
+
+                start = time.perf_counter()
+                try:
+                    self.backend.save_many(batch)
+                except Exception as e:
+                    with self._lock:
+                        # Возвращаем пачку, не затирая более свежие изменения
+                        for user_id, regs in batch.items():
+                            self._dirty.setdefault(user_id, regs)
+                    if self.logger:
+                        self.logger.error(f"Ошибка сброса записей на экскурсии: {e}")
+                    raise
+                latency = time.perf_counter() - start
+
+                self.flushes += 1
+                self.flushed_users += len(batch)
+                self.last_batch_size = len(batch)
+                self.max_batch_size = max(self.max_batch_size, len(batch))
+                self.last_flush_latency = latency
+                self.max_flush_latency = max(self.max_flush_latency, latency)
+                self.total_flush_latency += latency
+                total += len(batch)
+                if self.logger:
+                    self.logger.debug(
+                        f"Записи на экскурсии сброшены: {len(batch)} польз. за {latency * 1000:.1f} мс"
+                    )
+        return total
+
+    def metrics(self) -> dict:
+        """
+        Возвращает метрики отложенной записи.
+
+        Returns:
+            dict: Количество сбросов, размеры пачек и задержки сброса (мс).
+        """
+        return {
+            "pending": self.pending,
+            "flushes": self.flushes,
+            "flushed_users": self.flushed_users,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "avg_batch_size": self.flushed_users / self.flushes if self.flushes else 0.0,
+            "last_flush_ms": self.last_flush_latency * 1000,
+            "max_flush_ms": self.max_flush_latency * 1000,
+            "avg_flush_ms": self.total_flush_latency * 1000 / self.flushes if self.flushes else 0.0,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._dirty:
+                try:
+                    await loop.run_in_executor(None, self.flush)
+                except Exception:
+                    pass  # уже залогировано, повторим на следующем интервале
+
+    def start(self) -> None:
+        """
+        Запускает периодический сброс в текущем цикле событий.
+        """
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодический сброс и записывает все оставшиеся изменения.
+
+        Ошибка записи логируется и не прерывает остановку бота: остальные
+        хранилища должны закрыться в любом случае.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._stopped = True
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.flush)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Не сохранены записи на экскурсии {self.pending} польз.: {e}")
+            return
+        if self.logger:
+            self.logger.info(f"Записи на экскурсии сохранены, метрики: {self.metrics()}")
+
+    def close(self) -> None:
+        # После stop() изменения уже записаны (или ошибка залогирована)
+        if not self._stopped:
+            try:
+                self.flush()
+            except Exception:
+                pass  # уже залогировано в flush
+        self.backend.close()
+
+
+_store = None
+
+
+def configure_registration_store(config: dict, logger=None) -> RegistrationStore:
+    """
+    Создаёт хранилище записей по настройкам из config.yaml.
+
+    Для backend "sqlite" при первом запуске переносит записи из JSON-файлов.
+    Если registrations_flush_interval больше нуля, хранилище оборачивается
+    буфером отложенной записи.
+
+    Args:
+        config (dict): Конфигурация (registrations_backend, registrations_dir,
+            registrations_db, registrations_flush_interval, registrations_cache_size).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        RegistrationStore: Активное хранилище записей.
+    """
+    global _store
+    backend = config.get("registrations_backend", "file")
+    reg_dir = config.get("registrations_dir", REG_DIR)
+
+    if backend == "sqlite":
+        store = SqliteRegistrationStore(config.get("registrations_db", REG_DB))
+        store.migrate_from_dir(reg_dir, logger)
+    else:
+        store = FileRegistrationStore(reg_dir)
+
+    interval = config.get("registrations_flush_interval", 0)
+    if interval:
+        store = WriteBehindRegistrationStore(
+            store,
+            interval=interval,
+            cache_size=config.get("registrations_cache_size", CACHE_SIZE),
+            logger=logger,
+        )
+
+    if logger:
+        logger.info(f"Хранилище записей на экскурсии: {type(store).__name__}")
+    _store = store
+    return store
+
+
+def get_registration_store() -> RegistrationStore:
+    """
+    Возвращает активное хранилище записей (по умолчанию — JSON-файлы в REG_DIR).
+
+    Returns:
+        RegistrationStore: Хранилище записей.
+    """
+    global _store
+    if _store is None:
+        _store = FileRegistrationStore(REG_DIR)
+    return _store
 
 
 def get_user_registrations(user_id: int) -> set:
     """
-    Загружает регистрации пользователя из JSON-файла.
+    Загружает регистрации пользователя из хранилища.
 
     Args:
         user_id (int): Идентификатор пользователя.
 
     Returns:
         set: Множество зарегистрированных значений (например, ID мероприятий).
-             Пустое множество, если файл не найден или пуст.
+             Пустое множество, если записей нет.
     """
-    ensure_reg_dir()
-    path = os.path.join(REG_DIR, f"{user_id}.json")
-    if not os.path.exists(path):
-        return set()
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return set(data)
+    return get_registration_store().get(user_id)
 
 
 def save_user_registrations(user_id: int, registrations: set) -> None:
     """
-    Сохраняет регистрации пользователя в JSON-файл.
+    Сохраняет регистрации пользователя в хранилище.
 
     Args:
         user_id (int): Идентификатор пользователя.
         registrations (set): Множество зарегистрированных значений.
     """
-    ensure_reg_dir()
-    path = os.path.join(REG_DIR, f"{user_id}.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(list(registrations), f)
+    get_registration_store().save(user_id, registrations)
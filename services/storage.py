@@ -0,0 +1,325 @@
+# services/storage.py
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.data_cache import Snapshot, data_cache, parse_json, parse_text
+from services import orders, registrations, tours
+from services.tickets import get_ticket_store
+from services.materials import MaterialsCatalog, materials_index
+
+MAX_WORKERS = 8
+MAX_PENDING = 256
+SLOW_OPERATION = 1.0
+LATENCY_WINDOW = 2048
+
+
+class StoragePool:
+    """
+    Ограниченный пул потоков для блокирующих операций с диском.
+
+    Обработчики ждут результат через await, поэтому медленный диск задерживает
+    только тех пользователей, чьи данные читаются, а не весь цикл событий.
+    Число одновременно ожидающих операций ограничено max_pending: при
+    переполнении новые вызовы ждут свободного места (backpressure), а не
+    растят очередь пула без ограничений. Для каждой операции собираются
+    счётчики и задержки, общая очередь и время ожидания в ней.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_pending: int = MAX_PENDING, logger=None):
+        """
+        Args:
+            max_workers (int): Количество потоков пула.
+            max_pending (int): Максимальное количество операций в пуле и очереди.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+        self._slots = None
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self._ops = {}
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._waits = deque(maxlen=LATENCY_WINDOW)
+
+    async def run(self, op: str, func, *args):
+        """
+        Выполняет func(*args) в пуле и возвращает результат.
+
+        Args:
+            op (str): Имя операции для метрик.
+            func (Callable): Блокирующая функция.
+            *args: Аргументы функции.
+
+        Returns:
+            Any: Результат func.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        submitted = time.perf_counter()
+        async with self._slots:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._call, op, submitted, func, args
+                )
+            finally:
+                self.queued -= 1
+
+    def _call(self, op, submitted, func, args):
+        started = time.perf_counter()
+        with self._stats_lock:
+            self.active += 1
+        try:
+            return func(*args)
+        finally:
+            self._record(op, started - submitted, time.perf_counter() - started)
+
+    def _record(self, op: str, wait: float, latency: float) -> None:
+        with self._stats_lock:
+            self.active -= 1
+            stats = self._ops.setdefault(op, {"count": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += latency
+            stats["max"] = max(stats["max"], latency)
+            self._latencies.append(latency)
+            self._waits.append(wait)
+        if latency >= SLOW_OPERATION and self.logger:
+            self.logger.warning(f"Медленная операция хранилища {op}: {latency * 1000:.0f} мс")
+
+    def metrics(self) -> dict:
+        """
+        Возвращает метрики пула.
+
+        Returns:
+            dict: Глубина очереди, активные потоки, p50/p99 задержки и ожидания (мс)
+                  по последним операциям и сводка по каждой операции.
+        """
+
+        def percentile(values, q):
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+        with self._stats_lock:
+            latencies, waits = list(self._latencies), list(self._waits)
+            ops = {op: dict(s) for op, s in self._ops.items()}
+        return {
+            "queued": self.queued,
+            "active": self.active,
+            "max_queued": self.max_queued,
+            "latency_p50_ms": percentile(latencies, 0.5),
+            "latency_p99_ms": percentile(latencies, 0.99),
+            "wait_p50_ms": percentile(waits, 0.5),
+            "wait_p99_ms": percentile(waits, 0.99),
+            "ops": {
+                op: {
+                    "count": s["count"],
+                    "avg_ms": s["total"] * 1000 / s["count"],
+                    "max_ms": s["max"] * 1000,
+                }
+                for op, s in ops.items()
+            },
+        }
+
+    def shutdown(self) -> None:
+        """
+        Останавливает пул, дожидаясь начатых операций.
+        """
+        self._executor.shutdown(wait=True)
+
+
+_pool = None
+
+
+def configure_storage(config: dict, logger=None) -> StoragePool:
+    """
+    Создаёт пул операций с хранилищем по настройкам из config.yaml.
+
+    Args:
+        config (dict): Конфигурация (storage_workers).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        StoragePool: Активный пул.
+    """
+    global _pool
+    _pool = StoragePool(config.get("storage_workers", MAX_WORKERS), logger=logger)
+    return _pool
+
+
+def get_storage_pool() -> StoragePool:
+    """
+    Возвращает активный пул (создаёт его при первом обращении).
+
+    Returns:
+        StoragePool: Пул операций с хранилищем.
+    """
+    global _pool
+    if _pool is None:
+        _pool = StoragePool()
+    return _pool
+
+
+# --- Заказы ---
+
+
+async def read_order(user_id: int, orders_dir: str) -> list | None:
+    """
+    Асинхронная версия services.orders.read_order.
+
+    Заказ из кэша в памяти возвращается без обращения к пулу.
+    """
+    repository = orders.get_order_repository(orders_dir)
+    if isinstance(repository, orders.CachedOrderRepository):
+        found, items = repository.peek(user_id)
+        if found:
+            return items
+    return await get_storage_pool().run("orders.read", orders.read_order, user_id, orders_dir)
+
+
+async def save_order(user_id: int, username: str, fio: str, packaging: str, items: list, orders_dir: str, logger) -> None:
+    """
+    Асинхронная версия services.orders.save_order.
+    """
+    await get_storage_pool().run(
+        "orders.save", orders.save_order, user_id, username, fio, packaging, items, orders_dir, logger
+    )
+
+
+async def remove_order(user_id: int, orders_dir: str, logger) -> bool:
+    """
+    Асинхронная версия services.orders.remove_order.
+    """
+    return await get_storage_pool().run("orders.remove", orders.remove_order, user_id, orders_dir, logger)
+
+
+# --- Записи на экскурсии ---
+
+
+async def get_user_registrations(user_id: int) -> set:
+    """
+    Асинхронная версия services.registrations.get_user_registrations.
+    """
+    return await get_storage_pool().run(
+        "registrations.get", registrations.get_user_registrations, user_id
+    )
+
+
+async def save_user_registrations(user_id: int, registered: set) -> None:
+    """
+    Асинхронная версия services.registrations.save_user_registrations.
+    """
+    await get_storage_pool().run(
+        "registrations.save", registrations.save_user_registrations, user_id, registered
+    )
+
+
+# --- Файлы и данные ---
+
+
+def _list_files(directory: str) -> list:
+    return sorted(
+        name for name in os.listdir(directory) if os.path.isfile(os.path.join(directory, name))
+    )
+
+
+async def list_files(directory: str) -> list:
+    """
+    Возвращает отсортированный список файлов директории (без поддиректорий).
+
+    Raises:
+        OSError: Если директорию не удалось прочитать.
+    """
+    return await get_storage_pool().run("files.list", _list_files, directory)
+
+
+async def is_file(path: str) -> bool:
+    """
+    Асинхронная версия os.path.isfile.
+    """
+    return await get_storage_pool().run("files.isfile", os.path.isfile, path)
+
+
+async def json_snapshot(path: str, default=None) -> Snapshot:
+    """
+    Возвращает снимок JSON-файла из общего кэша.
+
+    Если файл недавно проверялся, снимок возвращается сразу, иначе проверка
+    и перечитывание выполняются в пуле.
+    """
+    snapshot = data_cache.peek(path, parse_json)
+    if snapshot is not None:
+        return snapshot
+    return await get_storage_pool().run("data.json", data_cache.get, path, parse_json, default)
+
+
+async def load_message(filename: str) -> str:
+    """
+    Асинхронная версия services.messages.load_message.
+    """
+    path = os.path.join("data", filename)
+    snapshot = data_cache.peek(path, parse_text)
+    if snapshot is None:
+        snapshot = await get_storage_pool().run("data.text", data_cache.get, path, parse_text, "")
+    return snapshot.data
+
+
+async def tour_catalog() -> tours.TourCatalog:
+    """
+    Возвращает каталог экскурсий для актуального снимка файла.
+    """
+    return tours.get_tour_catalog(await json_snapshot(tours.EXCURSIONS_FILE, []))
+
+
+async def materials_catalog(directory: str) -> MaterialsCatalog:
+    """
+    Возвращает каталог материалов директории.
+
+    Если директория недавно проверялась, каталог возвращается сразу, иначе
+    проверка (и при изменении — сканирование) выполняется в пуле.
+    """
+    catalog = materials_index.peek(directory)
+    if catalog is not None:
+        return catalog
+    return await get_storage_pool().run("materials.scan", materials_index.get, directory)
+
+
+# --- Обращения в поддержку ---
+
+
+async def save_ticket(chat_id: int, message_id: int, user_id: int, question: str) -> None:
+    """
+    Асинхронная версия SupportTicketStore.add.
+    """
+    await get_storage_pool().run("tickets.add", get_ticket_store().add, chat_id, message_id, user_id, question)
+
+
+async def find_ticket(chat_id: int, message_id: int) -> dict | None:
+    """
+    Асинхронная версия SupportTicketStore.get.
+
+    Свежее обращение из памяти возвращается без обращения к пулу.
+    """
+    store = get_ticket_store()
+    ticket = store.peek(chat_id, message_id)
+    if ticket is not None:
+        return ticket
+    return await get_storage_pool().run("tickets.get", store.get, chat_id, message_id)
+
+
+async def mark_ticket_answered(chat_id: int, message_id: int) -> None:
+    """
+    Асинхронная версия SupportTicketStore.mark_answered.
+    """
+    await get_storage_pool().run("tickets.answered", get_ticket_store().mark_answered, chat_id, message_id)
@@ -0,0 +1,198 @@
+# services/tickets.py
+
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+TICKETS_DB = os.path.join("data", "tickets.db")
+CACHE_SIZE = 1000
+CACHE_TTL = 24 * 3600
+RETENTION_DAYS = 90
+
+
+class SupportTicketStore:
+    """
+    Обращения в поддержку: связь сообщения в чате операторов с пользователем.
+
+    Ключ — (chat_id, message_id) сообщения, пересланного операторам. Все
+    обращения хранятся в SQLite и переживают перезапуск бота; последние
+    cache_size обращений моложе cache_ttl держатся в памяти (LRU), поэтому
+    ответ на свежий вопрос находится без обращения к диску, а память не
+    растёт со временем работы бота.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tickets (
+            chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            answered_at TEXT,
+            answers INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (chat_id, message_id)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str = TICKETS_DB, cache_size: int = CACHE_SIZE, cache_ttl: float = CACHE_TTL):
+        """
+        Args:
+            db_path (str): Путь к файлу базы данных.
+            cache_size (int): Максимальное количество обращений в памяти.
+            cache_ttl (float): Сколько секунд обращение держится в памяти.
+        """
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: tuple, ticket: dict) -> None:
+        self._cache[key] = (time.monotonic() + self.cache_ttl, ticket)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def add(self, chat_id: int, message_id: int, user_id: int, question: str) -> None:
+        """
+        Сохраняет обращение.
+
+        Args:
+            chat_id (int): Чат операторов.
+            message_id (int): Сообщение с вопросом в чате операторов.
+            user_id (int): Пользователь, задавший вопрос.
+            question (str): Текст вопроса.
+        """
+        ticket = {"user_id": user_id, "question": question}
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tickets (chat_id, message_id, user_id, question, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chat_id, message_id, user_id, question, datetime.now().isoformat()),
+            )
+            self._remember((chat_id, message_id), ticket)
+
+    def peek(self, chat_id: int, message_id: int) -> dict | None:
+        """
+        Возвращает обращение из памяти без обращения к диску.
+
+        Returns:
+            dict | None: {"user_id", "question"} или None, если в памяти его нет.
+        """
+        key = (chat_id, message_id)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[0]:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get(self, chat_id: int, message_id: int) -> dict | None:
+        """
+        Возвращает обращение по сообщению в чате операторов.
+
+        Returns:
+            dict | None: {"user_id", "question"} или None, если обращение не найдено.
+        """
+        ticket = self.peek(chat_id, message_id)
+        if ticket is not None:
+            return ticket
+        with self._lock:
+            self.misses += 1
+            row = self._conn.execute(
+                "SELECT user_id, question FROM tickets WHERE chat_id = ? AND message_id = ?",
+                (chat_id, message_id),
+            ).fetchone()
+            if row is None:
+                return None
+            ticket = {"user_id": row[0], "question": row[1]}
+            self._remember((chat_id, message_id), ticket)
+        return ticket
+
+    def mark_answered(self, chat_id: int, message_id: int) -> None:
+        """
+        Отмечает, что оператор ответил на обращение.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tickets SET answered_at = ?, answers = answers + 1 WHERE chat_id = ? AND message_id = ?",
+                (datetime.now().isoformat(), chat_id, message_id),
+            )
+
+    def purge(self, days: int = RETENTION_DAYS) -> int:
+        """
+        Удаляет обращения старше days дней.
+
+        Returns:
+            int: Количество удалённых обращений.
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        with self._lock:
+            return self._conn.execute("DELETE FROM tickets WHERE created_at < ?", (cutoff,)).rowcount
+
+    def stats(self) -> dict:
+        """
+        Возвращает счётчики хранилища.
+
+        Returns:
+            dict: Обращений в памяти, попадания и промахи кэша.
+        """
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+
+
+def configure_ticket_store(config: dict, logger=None) -> SupportTicketStore:
+    """
+    Создаёт хранилище обращений по настройкам из config.yaml и удаляет старые обращения.
+
+    Args:
+        config (dict): Конфигурация (tickets_db, tickets_cache_size, tickets_retention_days).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        SupportTicketStore: Активное хранилище обращений.
+    """
+    global _store
+    _store = SupportTicketStore(
+        config.get("tickets_db", TICKETS_DB),
+        cache_size=config.get("tickets_cache_size", CACHE_SIZE),
+    )
+    removed = _store.purge(config.get("tickets_retention_days", RETENTION_DAYS))
+    if logger and removed:
+        logger.info(f"Удалено старых обращений в поддержку: {removed}")
+    return _store
+
+
+def get_ticket_store() -> SupportTicketStore:
+    """
+    Возвращает активное хранилище обращений (создаёт его при первом обращении).
+
+    Returns:
+        SupportTicketStore: Хранилище обращений.
+    """
+    global _store
+    if _store is None:
+        _store = SupportTicketStore()
+    return _store
@@ -1,7 +1,9 @@
 # services/excursions.py
 
-import json
 import os
+import threading
+from collections import OrderedDict
+from core.data_cache import Snapshot, get_json_snapshot, load_json
 from core.logger import get_logger
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,32 +18,125 @@ def load_tours():
     """
     Загружает список экскурсий из JSON-файла.
 
+    Файл разбирается один раз и перечитывается только после изменения.
     Возвращает пустой список в случае отсутствия файла, пустого содержимого
     или ошибки парсинга.
 
     Returns:
-        list: Список экскурсий (словарей).
+        tuple: Неизменяемый список экскурсий.
     """
-    abs_path = os.path.abspath(EXCURSIONS_FILE)
-    logger.info(f"Загрузка файла экскурсий: {abs_path}")
+    return load_json(EXCURSIONS_FILE, [])
 
-    if not os.path.exists(EXCURSIONS_FILE):
-        logger.error(f"Файл {abs_path} не найден")
-        return []
 
-    with open(EXCURSIONS_FILE, encoding="utf-8") as f:
-        content = f.read()
+class TourCatalog:
+    """
+    Индексированный каталог экскурсий, строится один раз на снимок данных.
+
+    Attributes:
+        version (int): Версия снимка tours.json, из которого построен каталог.
+        by_id (dict): Отображение ID тура -> тур.
+        by_date (dict): Отображение даты -> кортеж туров, отсортированных по времени.
+        dates (tuple): Отсортированный список дат.
+        time_ranges (dict): Отображение ID тура -> строка "начало - конец".
+    """
+
+    def __init__(self, tours, version: int = 0):
+        """
+        Args:
+            tours (Iterable): Список экскурсий (словарей).
+            version (int): Версия снимка данных.
+        """
+        self.version = version
+        self.by_id = {}
+        grouped = {}
+        for tour in tours:
+            self.by_id[tour["id"]] = tour
+            grouped.setdefault(tour["date"], []).append(tour)
+
+        self.dates = tuple(sorted(grouped))
+        self.by_date = {
+            date: tuple(sorted(grouped[date], key=lambda t: t.get("time", "")))
+            for date in self.dates
+        }
+        self.time_ranges = {}
+        for tour_id, tour in self.by_id.items():
+            start = tour.get("time", "")
+            end = tour.get("end_time", "")
+            self.time_ranges[tour_id] = f"{start} - {end}" if end else start
+
+    def __bool__(self):
+        return bool(self.by_id)
+
+    def get(self, tour_id: str):
+        """
+        Возвращает тур по ID.
+
+        Args:
+            tour_id (str): Идентификатор тура.
+
+        Returns:
+            Mapping | None: Тур или None, если такого нет.
+        """
+        return self.by_id.get(tour_id)
+
+    def tours_on(self, date: str) -> tuple:
+        """
+        Возвращает туры на дату, отсортированные по времени начала.
+
+        Args:
+            date (str): Дата в формате YYYY-MM-DD.
+
+        Returns:
+            tuple: Туры на дату (пустой кортеж, если туров нет).
+        """
+        return self.by_date.get(date, ())
+
 
-    logger.info(f"Содержимое файла ({len(content)} байт)")
+KEEP_VERSIONS = 3
 
-    if not content.strip():
-        logger.warning(f"Файл {abs_path} пуст")
-        return []
+_catalog = TourCatalog(())
+_catalogs = OrderedDict()
+_catalog_lock = threading.Lock()
 
-    try:
-        excursions = json.loads(content)
-    except json.JSONDecodeError as e:
-        logger.error(f"Ошибка парсинга JSON в {abs_path}: {e}")
-        return []
 
-    return excursions
+def get_tour_catalog(snapshot: Snapshot | None = None) -> TourCatalog:
+    """
+    Возвращает каталог экскурсий для актуального снимка tours.json.
+
+    Каталог перестраивается только после изменения файла. Каталоги последних
+    KEEP_VERSIONS версий сохраняются (см. get_tour_catalog_version).
+
+    Args:
+        snapshot (Snapshot | None): Уже полученный снимок файла (например,
+            из services.storage.json_snapshot); по умолчанию берётся из кэша.
+
+    Returns:
+        TourCatalog: Индексированный каталог экскурсий.
+    """
+    global _catalog
+    if snapshot is None:
+        snapshot = get_json_snapshot(EXCURSIONS_FILE, [])
+    catalog = _catalog
+    if catalog.version == snapshot.version:
+        return catalog
+    with _catalog_lock:
+        if _catalog.version != snapshot.version:
+            _catalog = _catalogs.get(snapshot.version) or TourCatalog(snapshot.data, snapshot.version)
+            _catalogs[snapshot.version] = _catalog
+            while len(_catalogs) > KEEP_VERSIONS:
+                _catalogs.popitem(last=False)
+            logger.debug(f"Построен каталог экскурсий v{snapshot.version}: {len(_catalog.by_id)} туров")
+        return _catalog
+
+
+def get_tour_catalog_version(version: int) -> TourCatalog | None:
+    """
+    Возвращает каталог экскурсий указанной версии, если он ещё хранится.
+
+    Args:
+        version (int): Версия снимка tours.json.
+
+    Returns:
+        TourCatalog | None: Каталог или None, если версия вытеснена более новыми.
+    """
+    return _catalogs.get(version)
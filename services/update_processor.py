@@ -0,0 +1,161 @@
+# services/update_processor.py
+
+import asyncio
+import time
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+CONCURRENT_UPDATES = 16
+MAX_PENDING = 1024
+SLOW_WAIT = 1.0
+WAIT_WINDOW = 2048
+
+
+def update_key(update: object):
+    """
+    Возвращает ключ, в пределах которого обновления обрабатываются по порядку.
+
+    Args:
+        update (object): Обновление.
+
+    Returns:
+        int | None: ID пользователя (или чата, если пользователя нет) либо None.
+    """
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    return None
+
+
+class OrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Параллельная обработка обновлений с сохранением порядка для каждого пользователя.
+
+    Обновления разных пользователей обрабатываются одновременно (не больше
+    concurrency обработчиков сразу), поэтому медленная отправка фото или
+    документа одному пользователю не задерживает остальных. Обновления одного
+    пользователя выстраиваются в цепочку: следующее начинает обрабатываться
+    только после завершения предыдущего, поэтому повторные нажатия кнопок
+    записи или переходы по меню никогда не выполняются одновременно.
+
+    Обновление, ожидающее своей очереди, не занимает место обработчика.
+    Семафор PTB (max_concurrent_updates) ограничивает общее количество
+    принятых обновлений — выполняющихся и ожидающих — значением max_pending.
+    """
+
+    def __init__(self, concurrency: int = CONCURRENT_UPDATES, max_pending: int = MAX_PENDING, logger=None):
+        """
+        Args:
+            concurrency (int): Максимальное количество одновременно выполняющихся обработчиков.
+            max_pending (int): Максимальное количество принятых, но не обработанных обновлений.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        super().__init__(max(max_pending, concurrency))
+        self.concurrency = concurrency
+        self.logger = logger
+        self._running = asyncio.BoundedSemaphore(concurrency)
+        self._tails = {}
+        self._waits = deque(maxlen=WAIT_WINDOW)
+        self.processed = 0
+        self.queued_behind_user = 0
+        self.active = 0
+        self.max_active = 0
+        self.max_wait = 0.0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self.logger:
+            self.logger.info(f"Метрики обработки обновлений: {self.metrics()}")
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        received = time.monotonic()
+        key = update_key(update)
+        previous = None
+        done = None
+        if key is not None:
+            # Регистрация в цепочке выполняется до первого await — в порядке поступления
+            previous = self._tails.get(key)
+            done = asyncio.get_running_loop().create_future()
+            self._tails[key] = done
+        try:
+            if previous is not None:
+                self.queued_behind_user += 1
+                await asyncio.shield(previous)
+            async with self._running:
+                self._record(time.monotonic() - received)
+                try:
+                    await coroutine
+                finally:
+                    self.active -= 1
+        finally:
+            if done is not None:
+                if previous is not None and not previous.done():
+                    # Отменено в очереди: следующее обновление ждёт завершения предыдущего
+                    previous.add_done_callback(lambda _: self._release(key, done))
+                else:
+                    self._release(key, done)
+            if getattr(coroutine, "cr_frame", None) is not None and not coroutine.cr_running:
+                coroutine.close()  # отменено до начала обработки
+
+    def _release(self, key, done: asyncio.Future) -> None:
+        done.set_result(None)
+        if self._tails.get(key) is done:
+            del self._tails[key]
+
+    def _record(self, wait: float) -> None:
+        self.processed += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.max_wait = max(self.max_wait, wait)
+        self._waits.append(wait)
+        if wait >= SLOW_WAIT and self.logger:
+            self.logger.warning(f"Обновление ждало обработки {wait * 1000:.0f} мс")
+
+    def metrics(self) -> dict:
+        """
+        Возвращает метрики обработки обновлений.
+
+        Returns:
+            dict: Количество обработанных обновлений, ожидавших предыдущего
+                  обновления того же пользователя, максимум одновременных
+                  обработчиков, пользователей с очередью и p50/p99 ожидания (мс).
+        """
+        waits = sorted(self._waits)
+
+        def percentile(q):
+            return waits[min(len(waits) - 1, int(len(waits) * q))] * 1000 if waits else 0.0
+
+        return {
+            "processed": self.processed,
+            "queued_behind_user": self.queued_behind_user,
+            "max_active": self.max_active,
+            "users_in_flight": len(self._tails),
+            "wait_p50_ms": percentile(0.5),
+            "wait_p99_ms": percentile(0.99),
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+def configure_update_processor(config: dict, logger=None) -> OrderedUpdateProcessor | None:
+    """
+    Создаёт обработчик обновлений по настройкам из config.yaml.
+
+    Args:
+        config (dict): Конфигурация (concurrent_updates).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        OrderedUpdateProcessor | None: Обработчик или None при последовательной обработке
+            (concurrent_updates не больше 1).
+    """
+    concurrency = config.get("concurrent_updates", CONCURRENT_UPDATES)
+    if concurrency <= 1:
+        return None
+    return OrderedUpdateProcessor(concurrency, logger=logger)
@@ -1,24 +1,331 @@
+import asyncio
 import os
+from collections import OrderedDict, deque
 from datetime import datetime
 
+from services.activity_log import SEGMENT_SIZE, SegmentedActivityLog
 
-def log_user_message(user_id: int, username: str, text: str, logs_dir: str, logger) -> None:
+MAX_OPEN_FILES = 256
+QUEUE_SIZE = 10000
+BATCH_SIZE = 1000
+ACTIVITY_DIR = "activity"
+
+
+def format_log_entry(username: str, text: str) -> str:
     """
-    Логирует сообщение пользователя в файл с именем по user_id.
+    Формирует строку лога пользователя с текущим временем.
 
     Args:
-        user_id (int): Идентификатор пользователя.
         username (str): Имя пользователя в Telegram (может быть None).
         text (str): Текст сообщения пользователя.
-        logs_dir (str): Путь к директории с логами.
-        logger (logging.Logger): Объект логгера для отладки.
+
+    Returns:
+        str: Строка лога с переводом строки в конце.
     """
-    log_file = os.path.join(logs_dir, f"{user_id}.log")
     timestamp = datetime.now().isoformat()
     user_tag = f"@{username}" if username else "@unknown"
-    log_entry = f"{timestamp} - {user_tag}: {text}\n"
+    return f"{timestamp} - {user_tag}: {text}\n"
+
+
+def append_user_log(user_id: int, entry: str, logs_dir: str) -> None:
+    """
+    Синхронно дописывает строку в файл logs/<user_id>.log (открыть-записать-закрыть).
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        entry (str): Готовая строка лога.
+        logs_dir (str): Путь к директории с логами.
+    """
+    with open(os.path.join(logs_dir, f"{user_id}.log"), "a", encoding="utf-8") as f:
+        f.write(entry)
+
+
+class ActivityLogWriter:
+    """
+    Асинхронная запись логов активности пользователей.
+
+    Обработчики только кладут строку в ограниченную очередь, фоновая задача
+    забирает накопившиеся строки пачкой, группирует их по пользователю и
+    пишет в пуле потоков. Открытые файлы держатся в LRU (не больше
+    max_open_files), поэтому активные пользователи не платят за open/close
+    на каждое сообщение. Когда очередь заполнена, write ждёт (backpressure),
+    а не копит строки в памяти без ограничений. При остановке очередь
+    дописывается до конца и все файлы закрываются.
+
+    Если передан store (SegmentedActivityLog), пачки пишутся в общий
+    сегментированный журнал вместо отдельных файлов пользователей.
+    """
+
+    def __init__(
+        self,
+        logs_dir: str,
+        max_open_files: int = MAX_OPEN_FILES,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        store: SegmentedActivityLog | None = None,
+        logger=None,
+    ):
+        """
+        Args:
+            logs_dir (str): Путь к директории с логами.
+            max_open_files (int): Максимальное количество одновременно открытых файлов.
+            queue_size (int): Размер очереди строк, после которого write ждёт.
+            batch_size (int): Максимальное количество строк в одной пачке.
+            store (SegmentedActivityLog | None): Сегментированный журнал.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.logs_dir = logs_dir
+        self.store = store
+        self.max_open_files = max_open_files
+        self.batch_size = batch_size
+        self.logger = logger
+        self._queue = None
+        self._queue_size = queue_size
+        self._files = OrderedDict()
+        self._task = None
+        self.lines = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.opens = 0
+        self.blocked_writes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def pending(self) -> int:
+        """
+        Количество строк в очереди на запись.
+        """
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self) -> None:
+        """
+        Запускает фоновую запись в текущем цикле событий.
+        """
+        if self._task is None:
+            os.makedirs(self.logs_dir, exist_ok=True)
+            self._queue = asyncio.Queue(self._queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Дописывает очередь, останавливает фоновую задачу и закрывает файлы.
+        """
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.get_running_loop().run_in_executor(None, self._close_all)
+        if self.logger:
+            self.logger.info(f"Логи активности дописаны: {self.lines} строк, {self.batches} пачек")
+
+    async def write(self, user_id: int, entry: str) -> None:
+        """
+        Ставит строку лога в очередь; ждёт, если очередь заполнена.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            entry (str): Готовая строка лога.
+        """
+        if self._queue.full():
+            self.blocked_writes += 1
+        await self._queue.put((user_id, entry))
+
+    def _file(self, user_id: int):
+        f = self._files.get(user_id)
+        if f is not None:
+            self._files.move_to_end(user_id)
+            return f
+        if len(self._files) >= self.max_open_files:
+            _, oldest = self._files.popitem(last=False)
+            oldest.close()
+        f = open(os.path.join(self.logs_dir, f"{user_id}.log"), "a", encoding="utf-8")
+        self._files[user_id] = f
+        self.opens += 1
+        return f
+
+    def _write_batch(self, batch: list) -> None:
+        if self.store is not None:
+            self.store.append_many(batch)
+            return
+
+        grouped = {}
+        for user_id, entry in batch:
+            grouped.setdefault(user_id, []).append(entry)
+        for user_id, entries in grouped.items():
+            if (
+                len(entries) == 1
+                and user_id not in self._files
+                and len(self._files) >= self.max_open_files
+            ):
+                # Единичная строка не вытесняет из LRU файлы активных пользователей
+                append_user_log(user_id, entries[0], self.logs_dir)
+                self.opens += 1
+                continue
+            f = self._file(user_id)
+            f.write("".join(entries))
+            # Сбрасываем буфер в ОС после каждой пачки: при падении процесса
+            # теряется не больше одной пачки
+            f.flush()
+
+    def _close_all(self) -> None:
+        while self._files:
+            _, f = self._files.popitem()
+            f.close()
+        if self.store is not None:
+            self.store.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await loop.run_in_executor(None, self._write_batch, batch)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Ошибка записи логов активности ({len(batch)} строк): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            self.lines += len(batch)
+            self.batches += 1
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+
+    def metrics(self) -> dict:
+        """
+        Возвращает метрики записи.
+
+        Returns:
+            dict: Строки, пачки, размер очереди, открытия файлов и ожидания backpressure.
+        """
+        return {
+            "pending": self.pending,
+            "lines": self.lines,
+            "batches": self.batches,
+            "avg_batch_size": self.lines / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "open_files": len(self._files),
+            "opens": self.opens,
+            "blocked_writes": self.blocked_writes,
+        }
+
+
+_writer = None
 
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(log_entry)
+
+def configure_activity_log(config: dict, logger=None) -> ActivityLogWriter:
+    """
+    Создаёт фоновую запись логов активности (запускается через start()).
+
+    При activity_log_format: segmented строки пишутся в общий журнал
+    logs/activity (см. SegmentedActivityLog), иначе — в logs/<user_id>.log.
+
+    Args:
+        config (dict): Конфигурация (logs_dir, activity_log_format,
+            activity_log_open_files, activity_log_segment_size).
+        logger (logging.Logger | None): Логгер для записи информации.
+
+    Returns:
+        ActivityLogWriter: Активный писатель логов.
+    """
+    global _writer
+    store = None
+    if config.get("activity_log_format", "files") == "segmented":
+        store = SegmentedActivityLog(
+            os.path.join(config["logs_dir"], ACTIVITY_DIR),
+            segment_size=config.get("activity_log_segment_size", SEGMENT_SIZE),
+        )
+        if logger:
+            stats = store.stats()
+            logger.info(
+                f"Журнал активности: сегмент {stats['active_segment']}, "
+                f"{stats['users']} пользователей, {stats['entries']} записей"
+            )
+    _writer = ActivityLogWriter(
+        config["logs_dir"],
+        max_open_files=config.get("activity_log_open_files", MAX_OPEN_FILES),
+        store=store,
+        logger=logger,
+    )
+    return _writer
+
+
+def read_user_history(user_id: int, logs_dir: str, limit: int = 20) -> list:
+    """
+    Возвращает последние записи лога пользователя.
+
+    Для сегментированного журнала записи находятся по индексу, для
+    отдельных файлов читается хвост logs/<user_id>.log.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        logs_dir (str): Путь к директории с логами.
+        limit (int): Максимальное количество записей.
+
+    Returns:
+        list[str]: Строки лога в хронологическом порядке.
+    """
+    if _writer is not None and _writer.store is not None and _writer.logs_dir == logs_dir:
+        return _writer.store.tail(user_id, limit)
+    try:
+        with open(os.path.join(logs_dir, f"{user_id}.log"), encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in deque(f, maxlen=limit)]
+    except FileNotFoundError:
+        return []
+
+
+def known_users(logs_dir: str) -> set:
+    """
+    Возвращает идентификаторы всех пользователей, писавших боту.
+
+    Args:
+        logs_dir (str): Путь к директории с логами.
+
+    Returns:
+        set[int]: Идентификаторы пользователей из лога активности.
+    """
+    if _writer is not None and _writer.store is not None and _writer.logs_dir == logs_dir:
+        return set(_writer.store.users())
+    users = set()
+    for name in os.listdir(logs_dir):
+        user_id, ext = os.path.splitext(name)
+        if ext == ".log" and user_id.lstrip("-").isdigit():
+            users.add(int(user_id))
+    return users
+
+
+async def log_user_message(user_id: int, username: str, text: str, logs_dir: str, logger) -> None:
+    """
+    Логирует сообщение пользователя в лог активности.
+
+    Если запущена фоновая запись, строка ставится в её очередь, иначе
+    дописывается сразу (в общий журнал или в файл logs/<user_id>.log).
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        username (str): Имя пользователя в Telegram (может быть None).
+        text (str): Текст сообщения пользователя.
+        logs_dir (str): Путь к директории с логами.
+        logger (logging.Logger): Объект логгера для отладки.
+    """
+    entry = format_log_entry(username, text)
+    if _writer is not None and _writer.logs_dir == logs_dir:
+        if _writer.running:
+            await _writer.write(user_id, entry)
+        else:
+            _writer._write_batch([(user_id, entry)])
+    else:
+        append_user_log(user_id, entry, logs_dir)
 
     logger.debug(f"Лог пользователя {user_id} обновлен: {text}")
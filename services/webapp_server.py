@@ -0,0 +1,145 @@
+# services/webapp_server.py
+
+import asyncio
+import json
+
+from aiohttp import web
+
+from core.assets import AssetStore, etag_matches
+from services.orders import CachedOrderRepository, get_order_repository, order_to_webapp
+
+WEBAPP_DIR = "webapp"
+WEBAPP_PORT = 8080
+
+
+class WebAppServer:
+    """
+    HTTP-сервер веб-приложения, работающий в цикле asyncio процесса бота.
+
+    /get_order отвечает из того же кэша заказов, который обновляет
+    webapp_data_handler, поэтому после сохранения заказа веб-приложение сразу
+    видит новые данные без повторного чтения с диска. Статика отдаётся из
+    AssetStore (сжатые варианты, ETag, 304) так же, как в start.py.
+    """
+
+    def __init__(
+        self,
+        orders_dir: str,
+        webapp_dir: str = WEBAPP_DIR,
+        port: int = WEBAPP_PORT,
+        host: str = "0.0.0.0",
+        logger=None,
+    ):
+        """
+        Args:
+            orders_dir (str): Путь к директории с заказами.
+            webapp_dir (str): Корневая директория статики веб-приложения.
+            port (int): Порт сервера (0 — выбрать свободный).
+            host (str): Адрес для прослушивания (по умолчанию все IPv4-интерфейсы, как в start.py).
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.orders_dir = orders_dir
+        self.webapp_dir = webapp_dir
+        self.port = port
+        self.host = host
+        self.logger = logger
+        self.assets = None
+        self.app = web.Application()
+        self.app.router.add_get("/get_order", self.get_order)
+        self.app.router.add_route("GET", "/{path:.*}", self.static)
+        self.app.router.add_route("HEAD", "/{path:.*}", self.static)
+        self._runner = None
+
+    def add_post(self, path: str, handler) -> None:
+        """
+        Добавляет обработчик POST-запросов (например, webhook Telegram).
+
+        Маршруты нужно добавлять до start(): после запуска aiohttp
+        замораживает таблицу маршрутов.
+
+        Args:
+            path (str): Путь запроса.
+            handler (Callable): Корутина aiohttp, принимающая web.Request.
+        """
+        self.app.router.add_post(path, handler)
+
+    async def start(self) -> None:
+        """
+        Сканирует статику и начинает принимать соединения.
+        """
+        loop = asyncio.get_running_loop()
+        self.assets = await loop.run_in_executor(None, AssetStore, self.webapp_dir)
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # При port=0 узнаём фактически выбранный порт
+        sockets = self._runner.addresses
+        if sockets:
+            self.port = sockets[0][1]
+        if self.logger:
+            self.logger.info(f"Веб-сервер WebApp запущен в процессе бота на порту {self.port}")
+
+    async def stop(self) -> None:
+        """
+        Останавливает сервер и закрывает соединения.
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            if self.logger:
+                self.logger.info("Веб-сервер WebApp остановлен")
+
+    async def get_order(self, request: web.Request) -> web.Response:
+        """
+        Возвращает заказ пользователя для предзаполнения формы веб-приложения.
+        """
+        user_id = request.query.get("user_id", "")
+        if not user_id.lstrip("-").isdigit():
+            raise web.HTTPNotFound(text="Order not found")
+
+        repository = get_order_repository(self.orders_dir)
+        found, items = False, None
+        if isinstance(repository, CachedOrderRepository):
+            found, items = repository.peek(int(user_id))
+        if not found:
+            # Промах кэша читает хранилище в пуле потоков, чтобы не блокировать бота
+            items = await asyncio.get_running_loop().run_in_executor(
+                None, repository.get, int(user_id)
+            )
+        if items is None:
+            raise web.HTTPNotFound(text="Order not found")
+
+        return web.Response(body=json.dumps(order_to_webapp(items)).encode(), content_type="application/json")
+
+    async def static(self, request: web.Request) -> web.StreamResponse:
+        """
+        Отдаёт статический файл из AssetStore.
+        """
+        if self.assets is None:
+            raise web.HTTPNotFound(text="File not found")
+        ready, asset = self.assets.peek(request.path)
+        if not ready:
+            # stat, повторное сканирование и сжатие изменившегося файла не блокируют бота
+            asset = await asyncio.get_running_loop().run_in_executor(None, self.assets.lookup, request.path)
+        if asset is None:
+            raise web.HTTPNotFound(text="File not found")
+
+        encoding, body, etag = asset.select(request.headers.get("Accept-Encoding"))
+        headers = {
+            "ETag": etag,
+            "Cache-Control": asset.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            return web.Response(status=304, headers=headers)
+
+        headers["Content-Type"] = asset.content_type
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        if body is None:
+            # Крупный файл без сжатия: aiohttp отдаёт его через sendfile
+            # и сам ведёт ETag/If-None-Match по mtime и размеру файла
+            del headers["ETag"]
+            return web.FileResponse(asset.path, headers=headers)
+        return web.Response(body=body, headers=headers)
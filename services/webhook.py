@@ -0,0 +1,257 @@
+# services/webhook.py
+
+import asyncio
+import hmac
+import secrets
+import signal
+import urllib.parse
+from datetime import datetime, timezone
+
+from aiohttp import web
+from telegram import Update
+from telegram.error import TelegramError
+
+POLLING = "polling"
+WEBHOOK = "webhook"
+WEBHOOK_PATH = "/telegram/webhook"
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+WEBHOOK_CHECK_INTERVAL = 60
+
+
+def resolve_webhook_url(config: dict) -> str | None:
+    """
+    Определяет публичный адрес webhook.
+
+    Явно заданный webhook_url используется как есть, иначе адрес строится
+    из публичного адреса WebApp (туннель CloudPub), который start.py
+    записывает в webapp_url.
+
+    Args:
+        config (dict): Конфигурация (webhook_url, webapp_url).
+
+    Returns:
+        str | None: Адрес webhook или None, если публичного HTTPS-адреса нет.
+    """
+    if config.get("webhook_url"):
+        return config["webhook_url"]
+    parsed = urllib.parse.urlsplit(config.get("webapp_url") or "")
+    if parsed.scheme != "https" or not parsed.netloc:
+        return None
+    return f"https://{parsed.netloc}{WEBHOOK_PATH}"
+
+
+class WebhookReceiver:
+    """
+    Принимает обновления Telegram на встроенном aiohttp-сервере.
+
+    Запрос без правильного секретного токена отклоняется, принятое
+    обновление ставится в update_queue приложения и обрабатывается так же,
+    как полученное через polling.
+    """
+
+    def __init__(self, application, secret: str, logger=None):
+        """
+        Args:
+            application (telegram.ext.Application): Приложение бота.
+            secret (str): Секретный токен, который Telegram передаёт в заголовке.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.application = application
+        self.secret = secret
+        self.logger = logger
+        self.received = 0
+        self.rejected = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Обрабатывает POST-запрос Telegram с обновлением.
+        """
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), self.secret.encode()):
+            self.rejected += 1
+            if self.logger:
+                self.logger.warning(f"Webhook: запрос с неверным секретным токеном от {request.remote}")
+            raise web.HTTPForbidden()
+
+        try:
+            data = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest()
+
+        update = Update.de_json(data, self.application.bot)
+        if update is not None:
+            await self.application.update_queue.put(update)
+            self.received += 1
+        return web.Response()
+
+
+class UpdateSource:
+    """
+    Источник обновлений бота: webhook на встроенном сервере или polling.
+
+    В режиме webhook (update_mode: webhook) адрес регистрируется с секретным
+    токеном. Если публичного адреса или встроенного сервера нет, либо
+    Telegram не принял webhook, бот переходит на polling. После запуска
+    состояние webhook периодически проверяется через getWebhookInfo: если
+    Telegram сообщает об ошибках доставки и копит обновления, бот тоже
+    переключается на polling (start_polling сам удаляет webhook).
+    """
+
+    def __init__(self, application, config: dict, server=None, logger=None):
+        """
+        Args:
+            application (telegram.ext.Application): Приложение бота.
+            config (dict): Конфигурация (update_mode, webhook_secret, webhook_check_interval).
+            server (WebAppServer | None): Встроенный веб-сервер для приёма webhook.
+            logger (logging.Logger | None): Логгер для записи информации.
+        """
+        self.application = application
+        self.config = config
+        self.server = server
+        self.logger = logger
+        self.requested = config.get("update_mode", POLLING)
+        self.check_interval = config.get("webhook_check_interval", WEBHOOK_CHECK_INTERVAL)
+        self.mode = None
+        self.url = None
+        self.receiver = None
+        self._registered_at = None
+        self._monitor = None
+
+        if self.requested == WEBHOOK and server is not None:
+            secret = config.get("webhook_secret") or secrets.token_urlsafe(32)
+            self.receiver = WebhookReceiver(application, secret, logger)
+            server.add_post(WEBHOOK_PATH, self.receiver.handle)
+
+    async def start(self) -> str:
+        """
+        Запускает получение обновлений.
+
+        Returns:
+            str: Фактический режим: WEBHOOK или POLLING.
+        """
+        if self.requested == WEBHOOK and await self._start_webhook():
+            return self.mode
+        await self._start_polling()
+        return self.mode
+
+    async def stop(self) -> None:
+        """
+        Останавливает получение обновлений.
+
+        Webhook при остановке не удаляется: Telegram накопит обновления и
+        доставит их после перезапуска.
+        """
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+        if self.application.updater and self.application.updater.running:
+            await self.application.updater.stop()
+
+    async def _start_webhook(self) -> bool:
+        if self.receiver is None:
+            self._log_warning("режим webhook требует встроенного веб-сервера (webapp_embedded)")
+            return False
+        self.url = resolve_webhook_url(self.config)
+        if not self.url:
+            self._log_warning("не найден публичный HTTPS-адрес (webhook_url или webapp_url)")
+            return False
+
+        try:
+            await self.application.bot.set_webhook(
+                self.url,
+                secret_token=self.receiver.secret,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        except TelegramError as e:
+            self._log_warning(f"Telegram не принял webhook: {e}")
+            return False
+
+        self.mode = WEBHOOK
+        self._registered_at = datetime.now(timezone.utc)
+        if self.check_interval:
+            self._monitor = asyncio.create_task(self._watch_webhook())
+        if self.logger:
+            self.logger.info(f"Обновления принимаются через webhook: {self.url}")
+        return True
+
+    async def _start_polling(self) -> None:
+        await self.application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+        self.mode = POLLING
+        if self.logger:
+            self.logger.info("Обновления принимаются через polling")
+
+    async def _watch_webhook(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                info = await self.application.bot.get_webhook_info()
+            except TelegramError as e:
+                if self.logger:
+                    self.logger.warning(f"Не удалось проверить webhook: {e}")
+                continue
+
+            failing = (
+                info.last_error_date is not None
+                and info.last_error_date > self._registered_at
+                and info.pending_update_count > 0
+            )
+            if info.url != self.url or failing:
+                self._log_warning(
+                    f"Telegram не может доставить обновления ({info.last_error_message or 'webhook сброшен'}), "
+                    f"в очереди {info.pending_update_count}"
+                )
+                self._monitor = None
+                await self._start_polling()
+                return
+
+    def _log_warning(self, reason: str) -> None:
+        if self.logger:
+            self.logger.warning(f"Webhook недоступен: {reason}. Переход на polling")
+
+
+async def run_application(
+    application, update_source: UpdateSource, logger=None, stop_event: asyncio.Event | None = None
+) -> None:
+    """
+    Запускает приложение бота с выбранным источником обновлений и ждёт SIGINT/SIGTERM.
+
+    Повторяет последовательность Application.run_polling (initialize,
+    post_init, start, stop, post_stop, shutdown, post_shutdown), но получение
+    обновлений делегирует UpdateSource.
+
+    Args:
+        application (telegram.ext.Application): Приложение бота.
+        update_source (UpdateSource): Источник обновлений.
+        logger (logging.Logger | None): Логгер для записи информации.
+        stop_event (asyncio.Event | None): Событие остановки; по умолчанию создаётся новое.
+    """
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: остановка по KeyboardInterrupt
+
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        mode = await update_source.start()
+        await application.start()
+        if logger:
+            logger.info(f"Бот запущен, режим получения обновлений: {mode}")
+        await stop_event.wait()
+    finally:
+        await update_source.stop()
+        if application.running:
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
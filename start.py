@@ -3,21 +3,38 @@
 import os
 import yaml
 import json
-import signal
 import subprocess
+import sys
 import threading
+import time
 import http.server
-import socketserver
 import re
-import csv
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
+from core.assets import AssetStore, etag_matches
+from core.config import EXIT_CONFIG_ERROR
+from services.orders import configure_order_repository, order_to_webapp, read_order
+
 CONFIG_FILE = "config.yaml"
 PRODUCTS_FILE = "products.yaml"
 WEBAPP_DIR = "webapp"
 WEBAPP_PORT = 8080
+WEBAPP_WORKERS = 32
+WEBAPP_TIMEOUT = 10
 ORDERS_DIR = "orders"
+BOT_RESTART_DELAY = 5
+BOT_RESTART_MAX_DELAY = 300
+BOT_MAX_RESTARTS = 10
+# Бот, проработавший дольше этого времени, считается стабильным: пауза сбрасывается
+BOT_STABLE_TIME = 60
+REJECT_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Length: 0\r\n"
+    b"Retry-After: 1\r\n"
+    b"Connection: close\r\n\r\n"
+)
 
 
 def load_config():
@@ -49,57 +66,183 @@ class WebAppRequestHandler(http.server.SimpleHTTPRequestHandler):
     """
     Обработчик HTTP-запросов для веб-сервера.
     Обрабатывает запросы к /get_order и отдаёт данные заказа пользователя.
+
+    Работает по HTTP/1.1 с keep-alive; timeout ограничивает ожидание данных
+    от клиента, поэтому медленное или простаивающее соединение закрывается.
     """
 
+    protocol_version = "HTTP/1.1"
+    timeout = WEBAPP_TIMEOUT
+    # Заголовки и тело пишутся отдельными send(); без TCP_NODELAY keep-alive
+    # упирается в связку Nagle + delayed ACK (~40 мс на ответ)
+    disable_nagle_algorithm = True
+    assets = None
+
     def do_GET(self):
         parsed_path = urllib.parse.urlparse(self.path)
         if parsed_path.path == "/get_order":
             query = urllib.parse.parse_qs(parsed_path.query)
             user_id = query.get("user_id", [None])[0]
-            if user_id:
-                order_file = os.path.join(ORDERS_DIR, f"{user_id}.csv")
-                if os.path.exists(order_file):
-                    self.send_response(200)
-                    self.send_header("Content-type", "application/json")
-                    self.end_headers()
-                    with open(order_file, encoding="utf-8") as f:
-                        reader = csv.DictReader(f)
-                        items = list(reader)
-                    if items:
-                        response = {
-                            "items": [
-                                {
-                                    "id": int(i["item_id"]),
-                                    "name": i["name"],
-                                    "unit": i["unit"],
-                                    "qty": int(i["qty"]),
-                                }
-                                for i in items
-                            ],
-                            "fio": items[0].get("fio", ""),
-                            "packaging": items[0].get("packaging", ""),
-                        }
-                    else:
-                        response = {}
-                    self.wfile.write(json.dumps(response).encode())
-                    return
-                else:
-                    self.send_response(404)
-                    self.end_headers()
-                    return
-        super().do_GET()
-
+            items = None
+            if user_id and user_id.lstrip("-").isdigit():
+                items = read_order(int(user_id), ORDERS_DIR)
+            if items is None:
+                self.send_error(404, "Order not found")
+                return
+
+            response = order_to_webapp(items)
+            body = json.dumps(response).encode()
+            self.send_response(200)
+            self.send_header("Content-type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_asset(parsed_path.path)
+
+    def do_HEAD(self):
+        self.send_asset(urllib.parse.urlparse(self.path).path, head_only=True)
+
+    def send_asset(self, url_path: str, head_only: bool = False):
+        """
+        Отдаёт статический файл из AssetStore.
+
+        Выбирает сжатый вариант по Accept-Encoding, отвечает 304 при совпадении
+        ETag, небольшие файлы пишет из памяти, крупные — через socket.sendfile.
+
+        Args:
+            url_path (str): Путь из URL.
+            head_only (bool): Отправить только заголовки (HEAD).
+        """
+        asset = self.assets.lookup(urllib.parse.unquote(url_path)) if self.assets else None
+        if asset is None:
+            self.send_error(404, "File not found")
+            return
+
+        encoding, body, etag = asset.select(self.headers.get("Accept-Encoding"))
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", asset.cache_control)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        length = len(body) if body is not None else asset.size
+        self.send_response(200)
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", asset.cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        if head_only:
+            return
+
+        if body is not None:
+            self.wfile.write(body)
+            return
+
+        # socket.sendfile ждёт готовности сокета с учётом timeout (os.sendfile на
+        # сокете с таймаутом прерывается с EAGAIN и обрезает ответ)
+        with open(asset.path, "rb") as f:
+            self.connection.sendfile(f, 0, length)
+
+    def end_headers(self):
+        # Пока пул почти заполнен, не держим keep-alive: поток освобождается сразу после ответа
+        if not self.close_connection and self.server.saturated():
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass  # журнал каждого запроса замедляет сервер под нагрузкой
+
+
+class BoundedThreadingHTTPServer(http.server.HTTPServer):
+    """
+    HTTP-сервер, обрабатывающий соединения в ограниченном пуле потоков.
+
+    Одно медленное соединение больше не блокирует остальных клиентов.
+    Цикл приёма соединений никогда не ждёт свободного потока: если все
+    потоки заняты, новое соединение сразу получает 503 и закрывается.
+    Когда занято больше трёх четвертей потоков, ответы отправляются с
+    Connection: close, чтобы простаивающие keep-alive соединения не держали
+    потоки.
+    """
 
-def start_web_server():
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers: int = WEBAPP_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="webapp")
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        self.rejected = 0
+
+    def saturated(self) -> bool:
+        """
+        Возвращает True, если занято больше трёх четвертей потоков пула.
+        """
+        return self._busy * 4 > self.max_workers * 3
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+        with self._busy_lock:
+            self._busy += 1
+        self._pool.submit(self._process_request_thread, request, client_address)
+
+    def _reject(self, request):
+        self.rejected += 1
+        try:
+            request.settimeout(1)
+            request.sendall(REJECT_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._busy_lock:
+                self._busy -= 1
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def start_web_server(port: int = WEBAPP_PORT, max_workers: int = WEBAPP_WORKERS, quiet: bool = False):
     """
     Запускает HTTP-сервер для обслуживания веб-приложения.
 
+    Args:
+        port (int): Порт сервера (0 — выбрать свободный).
+        max_workers (int): Размер пула потоков обработки соединений.
+        quiet (bool): Не печатать сообщение о запуске.
+
     Returns:
-        socketserver.TCPServer: Запущенный сервер.
+        BoundedThreadingHTTPServer: Запущенный сервер.
     """
+    WebAppRequestHandler.assets = AssetStore(WEBAPP_DIR)
     handler = partial(WebAppRequestHandler, directory=WEBAPP_DIR)
-    httpd = socketserver.TCPServer(("", WEBAPP_PORT), handler)
-    print(f"✅ Веб-сервер запущен и обслуживает папку {WEBAPP_DIR} на http://localhost:{WEBAPP_PORT}")
+    httpd = BoundedThreadingHTTPServer(("", port), handler, max_workers=max_workers)
+    if not quiet:
+        print(
+            f"✅ Веб-сервер запущен и обслуживает папку {WEBAPP_DIR} на "
+            f"http://localhost:{httpd.server_address[1]} (потоков: {max_workers})"
+        )
 
     server_thread = threading.Thread(target=httpd.serve_forever, daemon=True)
     server_thread.start()
@@ -148,6 +291,9 @@ def start_telegram_bot(token):
     """
     Запускает Telegram-бота как отдельный процесс.
 
+    Вывод бота не перехватывается: непрочитанный канал stdout/stderr
+    со временем заполняется и останавливает процесс на записи в лог.
+
     Args:
         token (str): Токен Telegram-бота.
 
@@ -155,12 +301,7 @@ def start_telegram_bot(token):
         subprocess.Popen или None: Процесс бота или None при ошибке.
     """
     try:
-        bot_process = subprocess.Popen(
-            ["python", "bot.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
+        bot_process = subprocess.Popen([sys.executable, "bot.py"])
         print("✅ Telegram-бот запущен")
         return bot_process
     except Exception as e:
@@ -168,6 +309,48 @@ def start_telegram_bot(token):
         return None
 
 
+def supervise_bot(processes, token):
+    """
+    Следит за процессом бота и перезапускает его после аварийного завершения.
+
+    Не перезапускает бота, завершившегося штатно (код 0) или из-за ошибки
+    конфигурации (EXIT_CONFIG_ERROR). Пауза перед перезапуском удваивается
+    после каждого падения подряд (до BOT_RESTART_MAX_DELAY) и сбрасывается,
+    если бот проработал дольше BOT_STABLE_TIME; после BOT_MAX_RESTARTS
+    падений подряд наблюдение прекращается.
+
+    Args:
+        processes (dict): Словарь процессов; ключ "bot" обновляется при перезапуске.
+        token (str): Токен Telegram-бота.
+    """
+    restarts = 0
+    started = time.monotonic()
+    while True:
+        bot_process = processes.get("bot")
+        if bot_process is None or bot_process.poll() is not None:
+            code = bot_process.returncode if bot_process is not None else None
+            if code == 0:
+                print("✅ Бот завершил работу")
+                return
+            if code == EXIT_CONFIG_ERROR:
+                print("❌ Бот остановлен из-за ошибки конфигурации, проверьте config.yaml")
+                return
+            if time.monotonic() - started >= BOT_STABLE_TIME:
+                restarts = 0
+            if restarts >= BOT_MAX_RESTARTS:
+                print(f"❌ Бот падает {restarts} раз подряд, перезапуски прекращены")
+                return
+            delay = min(BOT_RESTART_DELAY * 2**restarts, BOT_RESTART_MAX_DELAY)
+            restarts += 1
+            if bot_process is not None:
+                print(f"⚠️ Бот завершился с кодом {code}, перезапуск через {delay} с")
+            time.sleep(delay)
+            processes["bot"] = start_telegram_bot(token)
+            started = time.monotonic()
+            continue
+        time.sleep(1)
+
+
 def cleanup(processes):
     """
     Останавливает запущенные процессы.
@@ -180,6 +363,7 @@ def cleanup(processes):
             try:
                 if name == "web_server":
                     process.shutdown()
+                    process.server_close()
                 else:
                     process.terminate()
                 print(f"✅ Процесс {name} остановлен")
@@ -191,19 +375,25 @@ def main():
     """
     Главная функция запуска проекта:
     - Загружает конфигурацию.
-    - Запускает веб-сервер.
+    - Запускает веб-сервер (если он не встроен в процесс бота, webapp_embedded).
     - Запускает CloudPub туннель.
-    - Запускает Telegram-бота.
+    - Запускает Telegram-бота и перезапускает его при аварийном завершении.
     - Ожидает сигнала завершения и корректно останавливает процессы.
     """
     print("🚀 Запуск проекта Telegram-бота с Web App (CloudPub)")
 
     config = load_config()
     os.makedirs(ORDERS_DIR, exist_ok=True)
+    webapp_port = config.get("webapp_port", WEBAPP_PORT)
 
-    web_server = start_web_server()
+    # Во встроенном режиме веб-сервер работает внутри процесса бота
+    web_server = None
+    if not config.get("webapp_embedded"):
+        # Заказы пишет отдельный процесс бота, поэтому кэш здесь устаревал бы: читаем с диска
+        configure_order_repository({**config, "orders_cache_size": 0})
+        web_server = start_web_server(port=webapp_port, max_workers=config.get("webapp_workers", WEBAPP_WORKERS))
 
-    cloudpub_url, cloudpub_proc = start_cloudpub(WEBAPP_PORT)
+    cloudpub_url, cloudpub_proc = start_cloudpub(webapp_port)
     if not cloudpub_url:
         print("❌ Не удалось запустить CloudPub туннель, остановка.")
         cleanup({"web_server": web_server})
@@ -217,24 +407,23 @@ def main():
         config["telegram_token"] = token
         save_config(config)
 
-    bot_process = start_telegram_bot(config["telegram_token"])
+    processes = {
+        "web_server": web_server,
+        "cloudpub": cloudpub_proc,
+        "bot": start_telegram_bot(config["telegram_token"]),
+    }
 
     print("\n✨ Всё готово! ✨")
     print(f"📱 Telegram Web App доступен по адресу: {config['webapp_url']}")
     print("⚠️ Нажмите Ctrl+C для остановки всех процессов")
 
     try:
-        signal.pause()
+        supervise_bot(processes, config["telegram_token"])
     except (KeyboardInterrupt, SystemExit):
-        print("\n🛑 Останавливаем все процессы...")
-        cleanup(
-            {
-                "web_server": web_server,
-                "cloudpub": cloudpub_proc,
-                "bot": bot_process,
-            }
-        )
-        print("👋 До свидания!")
+        pass
+    print("\n🛑 Останавливаем все процессы...")
+    cleanup(processes)
+    print("👋 До свидания!")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк записи логов активности: строк в секунду.
+
+Сравнивает прежнюю схему (открыть-дописать-закрыть файл на каждую строку
+прямо в цикле событий) и ActivityLogWriter (очередь, пачки, LRU открытых
+файлов). Для ActivityLogWriter отдельно показано время постановки строк
+в очередь (включая ожидание при заполненной очереди) и общее время до
+полной записи на диск.
+
+Запуск из корня проекта:
+    python -m tools.bench_activity_log --users 5000 --lines 100000
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+
+from services.users import ActivityLogWriter, append_user_log, format_log_entry
+
+
+def make_workload(users: int, lines: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    # Активность неравномерна: небольшая часть пользователей пишет чаще
+    population = [rng.randrange(10**8, 10**9) for _ in range(users)]
+    weights = [1.0 / (rank + 1) ** 0.8 for rank in range(users)]
+    chosen = rng.choices(population, weights, k=lines)
+    return [(user_id, format_log_entry("user", f"WebApp data: {{\"n\": {i}}}")) for i, user_id in enumerate(chosen)]
+
+
+async def bench_sync(workload: list, logs_dir: str) -> dict:
+    start = time.perf_counter()
+    for user_id, entry in workload:
+        append_user_log(user_id, entry, logs_dir)
+    return {"elapsed": time.perf_counter() - start}
+
+
+async def bench_async(workload: list, logs_dir: str, open_files: int) -> dict:
+    writer = ActivityLogWriter(logs_dir, max_open_files=open_files)
+    writer.start()
+    start = time.perf_counter()
+    for user_id, entry in workload:
+        await writer.write(user_id, entry)
+    enqueued = time.perf_counter() - start
+    await writer.stop()
+    elapsed = time.perf_counter() - start
+    return {"elapsed": elapsed, "enqueue": enqueued, "metrics": writer.metrics()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--open-files", type=int, default=256)
+    args = parser.parse_args()
+
+    workload = make_workload(args.users, args.lines)
+    print(f"Пользователей: {args.users}, строк: {args.lines}, открытых файлов: {args.open_files}")
+
+    with tempfile.TemporaryDirectory() as logs_dir:
+        result = asyncio.run(bench_sync(workload, logs_dir))
+        print(f"open/append/close       {args.lines / result['elapsed']:>10,.0f} строк/с  ({result['elapsed']:.2f} с)")
+
+    with tempfile.TemporaryDirectory() as logs_dir:
+        result = asyncio.run(bench_async(workload, logs_dir, args.open_files))
+        metrics = result["metrics"]
+        print(
+            f"ActivityLogWriter       {args.lines / result['elapsed']:>10,.0f} строк/с  ({result['elapsed']:.2f} с, "
+            f"постановка в очередь {result['enqueue']:.2f} с)"
+        )
+        print(
+            f"  пачек {metrics['batches']}, в среднем {metrics['avg_batch_size']:.0f} строк, "
+            f"открытий файлов {metrics['opens']}, ожиданий очереди {metrics['blocked_writes']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Проверка рассылки на фейковом боте с ограничениями Telegram.
+
+Фейковый бот принимает не больше --limit сообщений в секунду (скользящее
+окно); при превышении отвечает RetryAfter и отклоняет все запросы до конца
+штрафной паузы, как Telegram. Часть пользователей «заблокировала» бота
+(Forbidden), часть запросов завершается таймаутом (TimedOut).
+
+В середине рассылки менеджер останавливается (имитация перезапуска бота),
+затем новый менеджер продолжает её из того же файла состояния. В конце
+проверяется, что каждый доступный пользователь получил сообщение, и
+выводятся количество дублей, ответов 429 и скорость. По умолчанию лимит
+рассылки выше лимита бота, чтобы проверить обработку 429. Если кто-то не
+получил сообщение или получил его дважды, код завершения 1.
+
+Запуск из корня проекта:
+    python -m tools.bench_broadcast --users 300
+    python -m tools.bench_broadcast --users 300 --rate 25
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, deque
+from types import SimpleNamespace
+
+from telegram.error import Forbidden, RetryAfter, TimedOut
+
+from services import storage
+from services.broadcast import BroadcastManager, BroadcastStore
+
+
+class FakeBot:
+    """
+    Бот, который применяет к send_message лимиты Telegram.
+    """
+
+    def __init__(self, limit: int, penalty: int, blocked: set, timeout_ratio: float):
+        self.limit = limit
+        self.penalty = penalty
+        self.blocked = blocked
+        self.timeout_ratio = timeout_ratio
+        self.received = Counter()
+        self.flood_errors = 0
+        self._window = deque()
+        self._banned_until = 0.0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(0.005)  # задержка запроса
+        now = time.monotonic()
+        if now < self._banned_until:
+            self.flood_errors += 1
+            raise RetryAfter(max(1, round(self._banned_until - now)))
+        while self._window and now - self._window[0] >= 1.0:
+            self._window.popleft()
+        if len(self._window) >= self.limit:
+            self.flood_errors += 1
+            self._banned_until = now + self.penalty
+            raise RetryAfter(self.penalty)
+        self._window.append(now)
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if random.random() < self.timeout_ratio:
+            raise TimedOut()
+        if chat_id > 0:
+            self.received[chat_id] += 1
+        # Сообщение уже доставлено: остановка во время ответа не должна приводить к дублю
+        await asyncio.sleep(0.005)
+        return SimpleNamespace(message_id=len(self._window))
+
+    async def edit_message_text(self, *args, **kwargs):
+        return None
+
+
+async def run(args) -> bool:
+    db_path = os.path.join(tempfile.mkdtemp(), "broadcasts.db")
+    users = list(range(1, args.users + 1))
+    blocked = set(random.sample(users, int(len(users) * args.blocked)))
+    bot = FakeBot(args.limit, args.penalty, blocked, args.timeouts)
+
+    manager = BroadcastManager(BroadcastStore(db_path), global_rate=args.rate, report_interval=3600)
+    await manager.resume(bot)
+    started = time.perf_counter()
+    broadcast_id = await manager.create("all", "Автобус отправляется в 9:00", users)
+
+    # Имитация перезапуска бота на середине рассылки
+    while sum(bot.received.values()) < len(users) // 2:
+        await asyncio.sleep(0.05)
+    await manager.stop()
+    manager.store.close()
+    print(f"Остановка после {sum(bot.received.values())} доставленных сообщений, продолжение...")
+
+    manager = BroadcastManager(BroadcastStore(db_path), global_rate=args.rate, report_interval=3600)
+    await manager.resume(bot)
+    while manager._tasks:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+
+    counts = manager.store.counts(broadcast_id)
+    manager.store.close()
+    storage.get_storage_pool().shutdown()
+
+    reachable = set(users) - blocked
+    missing = reachable - set(bot.received)
+    duplicates = sum(n - 1 for n in bot.received.values() if n > 1)
+    print(f"Статусы: {counts}")
+    print(
+        f"Доставлено {len(bot.received)}/{len(reachable)} доступным пользователям, "
+        f"не доставлено: {len(missing)}, дублей: {duplicates}"
+    )
+    print(
+        f"Ответов 429: {bot.flood_errors}, время {elapsed:.1f} с, "
+        f"{len(users) / elapsed:.1f} получателей/с (лимит фейкового бота {args.limit}/с)"
+    )
+    return not missing and not duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=300, help="Количество получателей")
+    parser.add_argument("--rate", type=float, default=40, help="Лимит рассылки, сообщений в секунду")
+    parser.add_argument("--limit", type=int, default=30, help="Лимит фейкового бота, сообщений в секунду")
+    parser.add_argument("--penalty", type=int, default=2, help="Пауза после превышения лимита, секунды")
+    parser.add_argument("--blocked", type=float, default=0.05, help="Доля пользователей, заблокировавших бота")
+    parser.add_argument("--timeouts", type=float, default=0.02, help="Доля запросов с таймаутом")
+    args = parser.parse_args()
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Пропускная способность обработки обновлений при разной степени параллельности.
+
+Пачка обновлений от --users пользователей (по --per-user от каждого)
+проходит через Application.process_update так же, как их подаёт PTB из
+update_queue. Обработчик отвечает через настоящий Bot API клиент PTB, а
+запросы обслуживает локальная заглушка: sendMessage занимает --fast секунд,
+sendDocument (доля --slow-ratio обновлений) — --slow секунд.
+
+Для каждого значения --levels (1 — последовательная обработка PTB по
+умолчанию) выводятся скорость, задержки p50/p99 и проверка порядка:
+обновления одного пользователя должны обрабатываться строго по очереди
+и никогда не пересекаться.
+
+Запуск из корня проекта:
+    python -m tools.bench_concurrency
+    python -m tools.bench_concurrency --levels 1 8 32 --users 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from telegram import Update
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+from telegram.request import BaseRequest
+
+from services.update_processor import OrderedUpdateProcessor
+
+TOKEN = "123456:FAKE"
+
+
+class LocalBotApi(BaseRequest):
+    """
+    Заглушка Bot API: отвечает без сети с заданной задержкой.
+    """
+
+    def __init__(self, fast: float, slow: float):
+        self.fast = fast
+        self.slow = slow
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        endpoint = url.rsplit("/", 1)[-1]
+        if endpoint == "getMe":
+            result = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        else:
+            await asyncio.sleep(self.slow if endpoint == "sendDocument" else self.fast)
+            chat_id = int(request_data.parameters["chat_id"])
+            result = {"message_id": 1, "date": 0, "chat": {"id": chat_id, "type": "private"}}
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+def make_updates(users: int, per_user: int, slow_ratio: float) -> list:
+    updates = []
+    for seq in range(per_user):
+        batch = []
+        for user_id in range(1, users + 1):
+            kind = "slow" if random.random() < slow_ratio else "fast"
+            batch.append(
+                {
+                    "message": {
+                        "message_id": seq + 1,
+                        "date": 0,
+                        "chat": {"id": user_id, "type": "private"},
+                        "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                        "text": f"{seq}:{kind}",
+                    }
+                }
+            )
+        # Пользователи перемешаны, но обновления одного пользователя идут по порядку
+        random.shuffle(batch)
+        updates.extend(batch)
+    for update_id, update in enumerate(updates, 1):
+        update["update_id"] = update_id
+    return updates
+
+
+async def run_level(level: int, updates: list, args) -> None:
+    processor = OrderedUpdateProcessor(level) if level > 1 else None
+    api = LocalBotApi(args.fast, args.slow)
+    application = (
+        ApplicationBuilder()
+        .token(TOKEN)
+        .request(api)
+        .get_updates_request(api)
+        .concurrent_updates(processor or 1)
+        .build()
+    )
+    last_seq = {}
+    in_flight = set()
+    violations = 0
+    latencies = []
+
+    async def handler(update, context):
+        nonlocal violations
+        user_id = update.effective_user.id
+        seq, kind = update.message.text.split(":")
+        if user_id in in_flight or last_seq.get(user_id, -1) >= int(seq):
+            violations += 1
+        in_flight.add(user_id)
+        last_seq[user_id] = int(seq)
+        if kind == "slow":
+            await context.bot.send_document(user_id, document=b"%PDF-1.4", filename="program.pdf")
+        else:
+            await update.message.reply_text("Меню")
+        in_flight.discard(user_id)
+        latencies.append(time.perf_counter() - started)
+
+    application.add_handler(MessageHandler(filters.TEXT, handler))
+    await application.initialize()
+
+    parsed = [Update.de_json(data, application.bot) for data in updates]
+    # Вся пачка поступает сразу: задержка считается от её поступления
+    started = time.perf_counter()
+    tasks = []
+    for update in parsed:
+        if processor:
+            # Так Application подаёт обновления из update_queue при concurrent_updates > 1
+            tasks.append(asyncio.create_task(processor.process_update(update, application.process_update(update))))
+        else:
+            await application.process_update(update)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await application.shutdown()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    extra = f", в очереди за своим обновлением: {processor.metrics()['queued_behind_user']}" if processor else ""
+    print(
+        f"параллельность {level:>3}: {len(updates) / elapsed:7.1f} обновл./с, {elapsed:6.2f} с, "
+        f"задержка p50 {p50:7.0f} мс, p99 {p99:7.0f} мс, нарушений порядка: {violations}{extra}"
+    )
+
+
+async def run(args) -> None:
+    random.seed(args.seed)
+    updates = make_updates(args.users, args.per_user, args.slow_ratio)
+    print(f"Обновлений: {len(updates)} от {args.users} пользователей, медленных: {args.slow_ratio:.0%}")
+    for level in args.levels:
+        await run_level(level, updates, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64], help="Степени параллельности")
+    parser.add_argument("--users", type=int, default=100, help="Количество пользователей")
+    parser.add_argument("--per-user", type=int, default=3, help="Обновлений от каждого пользователя")
+    parser.add_argument("--fast", type=float, default=0.02, help="Длительность обычного ответа, секунды")
+    parser.add_argument("--slow", type=float, default=0.3, help="Длительность отправки файла, секунды")
+    parser.add_argument("--slow-ratio", type=float, default=0.1, help="Доля медленных обновлений")
+    parser.add_argument("--seed", type=int, default=1, help="Начальное значение генератора случайных чисел")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
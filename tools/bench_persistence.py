@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Стоимость сохранения состояния пользователей в зависимости от их числа:
+SQLitePersistence (запись только изменившихся) против PicklePersistence
+(перезапись всего файла).
+
+Для каждого размера базы (--users) хранилища заполняются, затем несколько
+циклов сохранения имитируют работу бота: за интервал обращались --touched
+пользователей, из них у --dirty изменились данные (остальные только
+открыли меню). Выводятся среднее время цикла update_* + flush и размер файла.
+
+Запуск из корня проекта:
+    python -m tools.bench_persistence
+    python -m tools.bench_persistence --users 1000 10000 100000 --dirty 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from telegram import Bot
+from telegram.ext import PersistenceInput, PicklePersistence
+
+from services import storage
+from services.persistence import SQLitePersistence
+
+BASE_VERSION = 1792288621082
+
+
+def user_data(user_id: int, revision: int) -> dict:
+    data = {"events_version": BASE_VERSION + revision, "tours_version": BASE_VERSION + revision + 1}
+    if user_id % 3 == 0:
+        data["current_menu"] = "souvenirs"
+    return data
+
+
+async def fill(persistence, users: int) -> None:
+    for user_id in range(1, users + 1):
+        await persistence.update_user_data(user_id, user_data(user_id, 0))
+    await persistence.flush()
+
+
+async def cycle(persistence, users: int, touched: int, dirty: int, revision: int) -> float:
+    ids = random.sample(range(1, users + 1), touched)
+    started = time.perf_counter()
+    for i, user_id in enumerate(ids):
+        # Обновляем всех, к кому обращались: так делает Application.update_persistence
+        await persistence.update_user_data(user_id, user_data(user_id, revision if i < dirty else 0))
+    await persistence.flush()
+    return time.perf_counter() - started
+
+
+async def measure(name: str, persistence, path: str, args, users: int) -> None:
+    await fill(persistence, users)
+    elapsed = [await cycle(persistence, users, args.touched, args.dirty, r) for r in range(1, args.cycles + 1)]
+    if isinstance(persistence, SQLitePersistence):
+        persistence.close()  # при закрытии журнал WAL переносится в основной файл
+    size = os.path.getsize(path)
+    print(
+        f"{name:<7} {users:>7} польз.: цикл сохранения {sum(elapsed) / len(elapsed) * 1000:8.2f} мс "
+        f"(макс {max(elapsed) * 1000:8.2f} мс), файл {size / 1024:8.0f} КБ"
+    )
+
+
+async def run(args) -> None:
+    bot = Bot("0:bench")
+    for users in args.users:
+        directory = tempfile.mkdtemp()
+
+        db_path = os.path.join(directory, "persistence.db")
+        sqlite_persistence = SQLitePersistence(db_path)
+        await measure("sqlite", sqlite_persistence, db_path, args, users)
+
+        pickle_path = os.path.join(directory, "persistence.pickle")
+        pickle_persistence = PicklePersistence(
+            pickle_path, store_data=PersistenceInput(bot_data=False, callback_data=False), on_flush=True
+        )
+        pickle_persistence.set_bot(bot)
+        await measure("pickle", pickle_persistence, pickle_path, args, users)
+    storage.get_storage_pool().shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 10000, 50000], help="Размеры базы пользователей")
+    parser.add_argument("--touched", type=int, default=200, help="Пользователей, обращавшихся за интервал")
+    parser.add_argument("--dirty", type=int, default=50, help="Из них пользователей с изменёнными данными")
+    parser.add_argument("--cycles", type=int, default=10, help="Количество циклов сохранения")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
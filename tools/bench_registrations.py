@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Сравнение хранилищ записей на экскурсии: JSON-файлы против SQLite (WAL).
+
+Запуск из корня проекта:
+    python -m tools.bench_registrations --users 5000 --tours 20
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from services.registrations import FileRegistrationStore, SqliteRegistrationStore
+
+
+def bench(store, users: int, tours: list, toggles: int) -> dict:
+    """
+    Прогоняет типовую нагрузку на хранилище и замеряет время операций.
+
+    Args:
+        store (RegistrationStore): Проверяемое хранилище.
+        users (int): Количество пользователей.
+        tours (list): Список ID туров.
+        toggles (int): Количество переключений записи (чтение + запись).
+
+    Returns:
+        dict: Операций в секунду для каждой фазы.
+    """
+    rnd = random.Random(42)
+    results = {}
+
+    start = time.perf_counter()
+    for user_id in range(users):
+        store.save(user_id, set(rnd.sample(tours, 3)))
+    results["initial save/s"] = users / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(toggles):
+        user_id = rnd.randrange(users)
+        tour_id = rnd.choice(tours)
+        regs = store.get(user_id)
+        regs ^= {tour_id}
+        store.save(user_id, regs)
+    results["toggle/s"] = toggles / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for tour_id in tours:
+        store.users_for_tour(tour_id)
+    results["users_for_tour/s"] = len(tours) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for tour_id in tours:
+        store.count(tour_id)
+    results["count/s"] = len(tours) / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--tours", type=int, default=20)
+    parser.add_argument("--toggles", type=int, default=5000)
+    args = parser.parse_args()
+
+    tours = [f"tour_{i}" for i in range(args.tours)]
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "file": FileRegistrationStore(os.path.join(tmp, "json")),
+            "sqlite": SqliteRegistrationStore(os.path.join(tmp, "registrations.db")),
+        }
+        for name, store in stores.items():
+            results = bench(store, args.users, tours, args.toggles)
+            store.close()
+            print(f"{name:>7}: " + ", ".join(f"{k} {v:,.0f}" for k, v in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Стоимость выбора обработчика для callback_query: цепочка
+CallbackQueryHandler(pattern=...) против таблицы маршрутов core.router.
+
+Цепочка повторяет прежнюю регистрацию в bot.py: Application проверяет
+обработчики по очереди (check_update с регулярным выражением), пока один не
+подойдёт, последним стоит универсальный button_handler. Маршрутизатор —
+один CallbackQueryHandler без шаблона и поиск в таблице. --extra добавляет
+в обе схемы вымышленные маршруты, чтобы показать рост стоимости цепочки.
+
+Запуск из корня проекта:
+    python -m tools.bench_router
+    python -m tools.bench_router --extra 50
+"""
+
+import argparse
+import random
+import timeit
+
+from telegram import Update
+from telegram.ext import CallbackQueryHandler
+
+from core.router import Router
+
+
+async def handler(update, context):
+    pass
+
+
+# (шаблон прежней цепочки, маршрут таблицы, пример данных)
+ROUTES = [
+    (r"^(date|register|unregister|back_to_dates)\|?", [("prefix", "date|"), ("prefix", "register|"),
+                                                         ("prefix", "unregister|"), ("exact", "back_to_dates")],
+     ["date|2025-06-01", "register|tour_1", "unregister|tour_1", "back_to_dates"]),
+    (r"^(material[_|]|materials_page\|)", [("prefix", "material|"), ("prefix", "material_"),
+                                           ("prefix", "materials_page|")],
+     ["material|3fa2c1de", "materials_page|2"]),
+    (r"^event_date\|", [("prefix", "event_date|")], ["event_date|2025-06-01"]),
+    (r"^guide_cat\|", [("prefix", "guide_cat|")], ["guide_cat|Кафе"]),
+    (r"^guide_back$", [("exact", "guide_back")], ["guide_back"]),
+    (r"^contacts_cat\|", [("prefix", "contacts_cat|")], ["contacts_cat|Оргкомитет"]),
+    (r"^contacts_back$", [("exact", "contacts_back")], ["contacts_back"]),
+]
+# Попадают в универсальный обработчик
+DEFAULT_SAMPLES = ["myorder", "cancelorder", "event_back"]
+
+
+def build(extra: int) -> tuple:
+    chain = []
+    router = Router("bench", default=handler)
+    samples = list(DEFAULT_SAMPLES)
+    for i in range(extra):
+        # Вымышленные разделы регистрируются раньше существующих, как новые функции бота
+        chain.append(CallbackQueryHandler(handler, pattern=rf"^extra{i}\|"))
+        router.add_prefix(f"extra{i}|", handler)
+    for pattern, routes, examples in ROUTES:
+        chain.append(CallbackQueryHandler(handler, pattern=pattern))
+        for kind, key in routes:
+            (router.add_prefix if kind == "prefix" else router.add)(key, handler)
+        samples.extend(examples)
+    chain.append(CallbackQueryHandler(handler))
+    return chain, router, samples
+
+
+def make_update(data: str) -> Update:
+    return Update.de_json(
+        {
+            "update_id": 1,
+            "callback_query": {
+                "id": "1",
+                "chat_instance": "1",
+                "from": {"id": 1, "is_bot": False, "first_name": "user"},
+                "data": data,
+            },
+        },
+        None,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--extra", type=int, default=0, help="Дополнительных вымышленных маршрутов")
+    parser.add_argument("--updates", type=int, default=100000, help="Количество обновлений")
+    args = parser.parse_args()
+
+    chain, router, samples = build(args.extra)
+    random.seed(1)
+    updates = [make_update(random.choice(samples)) for _ in range(args.updates)]
+    single = CallbackQueryHandler(router.dispatch_callback)
+
+    def run_chain():
+        for update in updates:
+            for h in chain:
+                if h.check_update(update):
+                    break
+
+    def run_router():
+        for update in updates:
+            if single.check_update(update):
+                router.match(update.callback_query.data)
+
+    print(f"Обработчиков в цепочке: {len(chain)}, маршрутов: {len(router.routes())}, обновлений: {len(updates)}")
+    for name, func in (("цепочка", run_chain), ("таблица", run_router)):
+        elapsed = min(timeit.repeat(func, number=1, repeat=3))
+        print(f"{name:<8} {elapsed / len(updates) * 1e9:8.0f} нс на обновление")
+
+
+if __name__ == "__main__":
+    main()
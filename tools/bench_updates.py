@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Сравнение задержки доставки обновлений: polling и webhook.
+
+Поднимает локальный фейковый Bot API (getMe, getUpdates с long polling,
+setWebhook, getWebhookInfo и т.д.) и бота на python-telegram-bot, который
+получает обновления через services.webhook.UpdateSource. Для каждого
+обновления измеряется время от появления на «сервере Telegram» до вызова
+обработчика бота. В режиме webhook фейковый API сам отправляет обновление
+POST-запросом на встроенный aiohttp-сервер с секретным токеном.
+
+Сетевая задержка до настоящего Telegram здесь не учитывается: тест
+показывает накладные расходы самого механизма доставки.
+
+Запуск из корня проекта:
+    python -m tools.bench_updates --updates 500
+    python -m tools.bench_updates --updates 500 --burst 20
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+
+from services.webapp_server import WebAppServer
+from services.webhook import POLLING, SECRET_HEADER, WEBHOOK, UpdateSource, run_application
+
+TOKEN = "123456:FAKE"
+
+
+class FakeBotApi:
+    """
+    Минимальный Bot API для локальных измерений.
+    """
+
+    def __init__(self):
+        self.pending = []
+        self.next_update_id = 1
+        self.webhook_url = ""
+        self.webhook_secret = ""
+        self._new_update = asyncio.Condition()
+        self._session = None
+        self._runner = None
+        self.port = None
+        self.app = web.Application()
+        self.app.router.add_post(r"/bot{token}/{method}", self.dispatch)
+
+    async def start(self) -> None:
+        self._session = aiohttp.ClientSession()
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        await self._session.close()
+        await self._runner.cleanup()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/bot"
+
+    async def dispatch(self, request: web.Request) -> web.Response:
+        params = dict(await request.post()) if request.can_read_body else {}
+        method = request.match_info["method"].lower()
+        handler = getattr(self, f"api_{method}", None)
+        result = await handler(params) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    async def api_getme(self, params):
+        return {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+
+    async def api_setwebhook(self, params):
+        self.webhook_url = params.get("url", "")
+        self.webhook_secret = params.get("secret_token", "")
+        return True
+
+    async def api_deletewebhook(self, params):
+        self.webhook_url = ""
+        return True
+
+    async def api_getwebhookinfo(self, params):
+        return {"url": self.webhook_url, "has_custom_certificate": False, "pending_update_count": 0}
+
+    async def api_getupdates(self, params):
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        self.pending = [u for u in self.pending if u["update_id"] >= offset]
+        if not self.pending and timeout:
+            async with self._new_update:
+                try:
+                    await asyncio.wait_for(self._new_update.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        return self.pending[:100]
+
+    async def inject(self, text: str) -> None:
+        """
+        Добавляет новое сообщение от пользователя и доставляет его боту.
+        """
+        update = {
+            "update_id": self.next_update_id,
+            "message": {
+                "message_id": self.next_update_id,
+                "date": int(time.time()),
+                "chat": {"id": 1, "type": "private"},
+                "from": {"id": 1, "is_bot": False, "first_name": "User"},
+                "text": text,
+            },
+        }
+        self.next_update_id += 1
+        if self.webhook_url:
+            async with self._session.post(
+                self.webhook_url,
+                data=json.dumps(update),
+                headers={"Content-Type": "application/json", SECRET_HEADER: self.webhook_secret},
+            ) as response:
+                response.raise_for_status()
+            return
+        self.pending.append(update)
+        async with self._new_update:
+            self._new_update.notify_all()
+
+
+async def run_mode(mode: str, updates: int, burst: int, interval: float) -> dict:
+    api = FakeBotApi()
+    await api.start()
+
+    sent_at = {}
+    latencies = []
+    done = asyncio.Event()
+
+    async def on_message(update, context):
+        latencies.append(time.perf_counter() - sent_at[update.message.text])
+        if len(latencies) >= updates:
+            done.set()
+
+    application = ApplicationBuilder().token(TOKEN).base_url(api.base_url).build()
+    application.add_handler(MessageHandler(filters.TEXT, on_message))
+
+    server = WebAppServer("orders", port=0)
+    config = {"update_mode": mode, "webhook_check_interval": 0}
+    source = UpdateSource(application, config, server)
+
+    async def post_init(app):
+        await server.start()
+        config["webhook_url"] = f"http://127.0.0.1:{server.port}/telegram/webhook"
+
+    async def post_shutdown(app):
+        await server.stop()
+
+    application.post_init = post_init
+    application.post_shutdown = post_shutdown
+
+    stop = asyncio.Event()
+    runner = asyncio.create_task(run_application(application, source, stop_event=stop))
+    while not application.running:
+        await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    for index in range(updates):
+        text = str(index)
+        sent_at[text] = time.perf_counter()
+        await api.inject(text)
+        if (index + 1) % burst == 0:
+            await asyncio.sleep(interval)
+    await asyncio.wait_for(done.wait(), 60)
+    elapsed = time.perf_counter() - started
+
+    actual_mode = source.mode
+    stop.set()
+    await runner
+    await api.stop()
+
+    latencies.sort()
+    return {
+        "mode": actual_mode,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "rate": updates / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=300, help="Количество обновлений на режим")
+    parser.add_argument("--burst", type=int, default=1, help="Обновлений подряд без паузы")
+    parser.add_argument("--interval", type=float, default=0.005, help="Пауза между пачками, секунды")
+    args = parser.parse_args()
+
+    print(f"Обновлений: {args.updates}, пачка: {args.burst}, пауза: {args.interval * 1000:.0f} мс")
+    for mode in (POLLING, WEBHOOK):
+        result = asyncio.run(run_mode(mode, args.updates, args.burst, args.interval))
+        print(
+            f"{result['mode']:<8} p50 {result['p50_ms']:7.2f} мс  p99 {result['p99_ms']:7.2f} мс  "
+            f"max {result['max_ms']:7.2f} мс  {result['rate']:8.0f} обновл./с"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Сравнение памяти: копия расписания в user_data каждого пользователя
+и общий версионированный снимок с номером версии у пользователя.
+
+copies   — как раньше: каждый пользователь, открывший меню, получает свою
+           копию сгруппированных мероприятий и экскурсий в user_data.
+versions — user_data хранит только номера версий, данные лежат в общем
+           DataCache/TourCatalog (хранятся последние несколько версий).
+
+Расписание генерируется (--dates x --per-date) и за время теста меняется
+--changes раз, как при правке JSON во время мероприятия. Память считается
+через tracemalloc, дополнительно выводится размер user_data в pickle
+(столько же пришлось бы сохранять на диск при персистентности).
+
+Запуск из корня проекта:
+    python -m tools.bench_user_snapshots --users 10000
+    python -m tools.bench_user_snapshots --users 10000 --dates 14 --per-date 20
+"""
+
+import argparse
+import gc
+import json
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+from core.data_cache import DataCache, parse_json
+from services.tours import TourCatalog
+
+
+def make_schedule(dates: int, per_date: int, revision: int) -> tuple:
+    events, tours = {}, []
+    for d in range(dates):
+        date = f"2025-06-{d + 1:02d}"
+        events[date] = [
+            {
+                "id": f"event_{d}_{i}",
+                "title": f"Мероприятие {i} (ред. {revision})",
+                "time": f"{9 + i % 10:02d}:00",
+                "end_time": f"{10 + i % 10:02d}:30",
+                "description": "Описание мероприятия для участников конференции. " * 3,
+                "link": f"https://example.com/event/{d}/{i}",
+            }
+            for i in range(per_date)
+        ]
+        tours.extend(
+            {
+                "id": f"tour_{d}_{i}",
+                "date": date,
+                "time": f"{9 + i % 10:02d}:00",
+                "end_time": f"{11 + i % 10:02d}:00",
+                "name": f"Экскурсия {i} (ред. {revision})",
+                "description": "Обзорная экскурсия по городу с гидом. " * 3,
+                "price": 500 + i * 50,
+                "capacity": 20,
+            }
+            for i in range(per_date)
+        )
+    return json.dumps(events, ensure_ascii=False), json.dumps(tours, ensure_ascii=False)
+
+
+def group_by_date(items, key="date") -> dict:
+    grouped = defaultdict(list)
+    for item in items:
+        grouped[item[key]].append(item)
+    return dict(sorted(grouped.items()))
+
+
+def run_copies(users: int, revisions: list) -> tuple:
+    user_data = {}
+    per_revision = max(1, users // len(revisions))
+    for user_id in range(users):
+        events_raw, tours_raw = revisions[min(user_id // per_revision, len(revisions) - 1)]
+        # Прежний код: файл читался заново и группировался для каждого пользователя
+        events = dict(sorted(json.loads(events_raw).items()))
+        tours = group_by_date(json.loads(tours_raw))
+        user_data[user_id] = {
+            "events_grouped": events,
+            "events_dates": list(events),
+            "tours_grouped": tours,
+            "tours_dates": list(tours),
+        }
+    return user_data, None
+
+
+def run_versions(users: int, revisions: list, directory: str) -> tuple:
+    cache = DataCache(check_interval=0)
+    events_path = os.path.join(directory, "events.json")
+    tours_path = os.path.join(directory, "tours.json")
+    user_data = {}
+    catalogs = {}
+    per_revision = max(1, users // len(revisions))
+    current = -1
+    for user_id in range(users):
+        revision = min(user_id // per_revision, len(revisions) - 1)
+        if revision != current:
+            current = revision
+            for path, raw in zip((events_path, tours_path), revisions[revision]):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(raw)
+                os.utime(path, ns=(revision + 1, revision + 1))
+        events = cache.get(events_path, parse_json, {})
+        tours = cache.get(tours_path, parse_json, [])
+        if tours.version not in catalogs:
+            catalogs[tours.version] = TourCatalog(tours.data, tours.version)
+            while len(catalogs) > cache.keep_versions:
+                catalogs.pop(min(catalogs))
+        user_data[user_id] = {"events_version": events.version, "tours_version": tours.version}
+    return user_data, (cache, catalogs)
+
+
+def measure(name: str, func, *args) -> None:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    user_data, shared = func(*args)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pickled = sum(len(pickle.dumps(data)) for data in user_data.values())
+    print(
+        f"{name:<9} память {current / 2**20:8.1f} МБ (пик {peak / 2**20:8.1f} МБ), "
+        f"user_data в pickle {pickled / 2**20:8.2f} МБ, {elapsed:5.2f} с"
+    )
+    del user_data, shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="Количество пользователей")
+    parser.add_argument("--dates", type=int, default=7, help="Дней в расписании")
+    parser.add_argument("--per-date", type=int, default=10, help="Мероприятий и экскурсий в день")
+    parser.add_argument("--changes", type=int, default=3, help="Сколько раз расписание меняется за тест")
+    args = parser.parse_args()
+
+    revisions = [make_schedule(args.dates, args.per_date, r) for r in range(args.changes + 1)]
+    print(
+        f"Пользователей: {args.users}, расписание: {args.dates} дн. x {args.per_date}, "
+        f"JSON {sum(len(r.encode()) for r in revisions[0]) / 1024:.0f} КБ, версий: {len(revisions)}"
+    )
+    measure("copies", run_copies, args.users, revisions)
+    with tempfile.TemporaryDirectory() as directory:
+        measure("versions", run_versions, args.users, revisions, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Перенос логов активности из отдельных файлов logs/<user_id>.log
+в сегментированный журнал logs/activity.
+
+Строки всех пользователей сливаются в хронологическом порядке (по метке
+времени в начале строки). Одновременно открыто не больше --max-open-files
+файлов: если пользователей больше, файлы сначала сливаются группами во
+временные файлы рядом с логами. Исходные файлы удаляются только с --remove.
+Повторный запуск по тем же файлам продублирует записи.
+
+Запуск из корня проекта:
+    python -m tools.convert_activity_logs
+    python -m tools.convert_activity_logs --logs-dir logs --remove
+"""
+
+import argparse
+import heapq
+import os
+import tempfile
+import time
+from functools import partial
+
+from core.config import load_config
+from services.activity_log import SEGMENT_SIZE, SegmentedActivityLog
+from services.users import ACTIVITY_DIR
+
+BATCH_SIZE = 5000
+# Меньше типичного ulimit -n (1024) с запасом на сегменты журнала
+MAX_OPEN_FILES = 256
+
+
+def user_log_files(logs_dir: str) -> dict:
+    """
+    Находит файлы логов пользователей.
+
+    Returns:
+        dict: user_id -> путь к файлу.
+    """
+    files = {}
+    for name in os.listdir(logs_dir):
+        user_id, ext = os.path.splitext(name)
+        if ext == ".log" and user_id.lstrip("-").isdigit():
+            files[int(user_id)] = os.path.join(logs_dir, name)
+    return files
+
+
+def read_entries(user_id: int, path: str):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.strip():
+                yield line.split(" - ", 1)[0], user_id, line if line.endswith("\n") else line + "\n"
+
+
+def read_run(path: str):
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            user_id, line = raw.split("\t", 1)
+            yield line.split(" - ", 1)[0], int(user_id), line
+    os.remove(path)
+
+
+def write_run(entries, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for _, user_id, line in entries:
+            f.write(f"{user_id}\t{line}")
+
+
+def merged_entries(files: dict, tmp_dir: str, max_open: int = MAX_OPEN_FILES):
+    """
+    Сливает строки файлов пользователей в хронологическом порядке.
+
+    Если файлов больше max_open, они сливаются группами по max_open во
+    временные файлы в tmp_dir (при необходимости в несколько проходов).
+
+    Args:
+        files (dict): user_id -> путь к файлу.
+        tmp_dir (str): Директория для промежуточных файлов.
+        max_open (int): Максимальное количество одновременно открытых файлов.
+
+    Yields:
+        tuple: (метка времени, user_id, строка).
+    """
+    max_open = max(max_open, 2)
+    readers = [partial(read_entries, user_id, path) for user_id, path in files.items()]
+    level = 0
+    while len(readers) > max_open:
+        runs = []
+        for i in range(0, len(readers), max_open):
+            path = os.path.join(tmp_dir, f"run-{level}-{len(runs)}.txt")
+            write_run(heapq.merge(*(reader() for reader in readers[i : i + max_open])), path)
+            runs.append(partial(read_run, path))
+        readers = runs
+        level += 1
+    # Файлы пользователей уже упорядочены по времени, поэтому достаточно слияния
+    yield from heapq.merge(*(reader() for reader in readers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs-dir", default=None, help="Директория логов (по умолчанию logs_dir из config.yaml)")
+    parser.add_argument("--remove", action="store_true", help="Удалить исходные файлы после переноса")
+    parser.add_argument(
+        "--max-open-files", type=int, default=MAX_OPEN_FILES, help="Сколько файлов логов открывать одновременно"
+    )
+    args = parser.parse_args()
+
+    config = load_config()
+    logs_dir = args.logs_dir or config["logs_dir"]
+    files = user_log_files(logs_dir)
+    if not files:
+        print(f"В {logs_dir} нет файлов логов пользователей")
+        return
+
+    store = SegmentedActivityLog(
+        os.path.join(logs_dir, ACTIVITY_DIR),
+        segment_size=config.get("activity_log_segment_size", SEGMENT_SIZE),
+    )
+    start = time.perf_counter()
+    total = 0
+    batch = []
+    tmp_dir = tempfile.TemporaryDirectory(prefix="convert-", dir=logs_dir)
+    try:
+        for _, user_id, entry in merged_entries(files, tmp_dir.name, args.max_open_files):
+            batch.append((user_id, entry))
+            if len(batch) >= BATCH_SIZE:
+                store.append_many(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            store.append_many(batch)
+            total += len(batch)
+    finally:
+        stats = store.stats()
+        store.close()
+        tmp_dir.cleanup()
+
+    print(
+        f"Перенесено {total} строк из {len(files)} файлов за {time.perf_counter() - start:.2f} с; "
+        f"сегментов сжато: {stats['compressed_segments']}, активный: {stats['active_segment']}"
+    )
+    if args.remove:
+        for path in files.values():
+            os.remove(path)
+        print(f"Удалено исходных файлов: {len(files)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Выгрузка всех заказов сувениров в XLSX или CSV.
+
+Запуск из корня проекта:
+    python -m tools.export_orders                 # exports/orders_<дата>.xlsx
+    python -m tools.export_orders --format csv --out orders.csv
+"""
+
+import argparse
+
+from core.config import load_config
+from services.export import export_orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--out", default=None, help="Путь к файлу выгрузки")
+    args = parser.parse_args()
+
+    summary = export_orders(load_config(), args.out, args.format)
+    print(
+        f"✅ Выгружено заказов: {summary['orders']}, позиций: {summary['rows']}, "
+        f"сумма: {summary['total']:.2f} ₽ -> {summary['path']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест веб-сервера WebApp: запросы/с и задержки p50/p99.
+
+Каждый клиент держит одно keep-alive соединение и последовательно шлёт запросы.
+Без --url тест поднимает локальный сервер из start.py на свободном порту.
+
+Запуск из корня проекта:
+    python -m tools.loadtest_webapp --clients 50 --requests 200
+    python -m tools.loadtest_webapp --url http://localhost:8080 --user-id 123
+"""
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+import urllib.parse
+
+
+def run_scenario(host: str, port: int, path: str, clients: int, requests: int) -> dict:
+    """
+    Запускает clients потоков, каждый отправляет requests запросов к path.
+
+    Returns:
+        dict: Запросов в секунду, p50/p99 в миллисекундах, ошибки и коды ответов.
+    """
+    latencies = []
+    statuses = {}
+    errors = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients + 1)
+
+    def client():
+        nonlocal errors
+        local, local_statuses, local_errors = [], {}, 0
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        barrier.wait()
+        for _ in range(requests):
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+                if response.getheader("Connection", "").lower() == "close":
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+    return {
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": p99 * 1000,
+        "errors": errors,
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="Адрес сервера; по умолчанию — локальный сервер")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=100, help="Запросов на клиента")
+    parser.add_argument("--user-id", default="1", help="user_id для /get_order")
+    parser.add_argument("--paths", nargs="*", default=["/index.html", "/styles.css", "/products.json"])
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        parsed = urllib.parse.urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        from core.config import load_config
+        from start import start_web_server
+        from services.orders import configure_order_repository
+
+        configure_order_repository(load_config())
+        server = start_web_server(port=0, quiet=True)
+        host, port = "127.0.0.1", server.server_address[1]
+
+    scenarios = list(args.paths) + [f"/get_order?user_id={args.user_id}"]
+    print(f"Сервер {host}:{port}, клиентов {args.clients}, запросов на клиента {args.requests}")
+    try:
+        for path in scenarios:
+            result = run_scenario(host, port, path, args.clients, args.requests)
+            print(
+                f"{path:<32} {result['rps']:>9,.0f} req/s  p50 {result['p50_ms']:7.2f} мс  "
+                f"p99 {result['p99_ms']:7.2f} мс  ошибок {result['errors']}  коды {result['statuses']}"
+            )
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Перенос заказов сувениров между CSV-файлами и базой SQLite.
+
+Запуск из корня проекта:
+    python -m tools.orders_tool migrate            # orders/*.csv -> orders/orders.db
+    python -m tools.orders_tool export --out dump  # orders/orders.db -> dump/*.csv
+"""
+
+import argparse
+
+from core.config import load_config
+from services.orders import ORDERS_DB, SqliteOrderRepository, export_csv_dir
+
+
+def main():
+    config = load_config()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["migrate", "export"])
+    parser.add_argument("--db", default=config.get("orders_db", ORDERS_DB), help="Файл базы заказов")
+    parser.add_argument("--csv-dir", default=config.get("orders_dir", "orders"), help="Директория CSV для migrate")
+    parser.add_argument("--out", default="orders_export", help="Директория CSV для export")
+    args = parser.parse_args()
+
+    repository = SqliteOrderRepository(args.db)
+    try:
+        if args.command == "migrate":
+            count = repository.import_csv_dir(args.csv_dir, force=True)
+            print(f"✅ Перенесено заказов: {count} ({args.csv_dir} -> {args.db})")
+        else:
+            count = export_csv_dir(repository, args.out)
+            print(f"✅ Выгружено заказов: {count} ({args.db} -> {args.out})")
+    finally:
+        repository.close()
+
+
+if __name__ == "__main__":
+    main()
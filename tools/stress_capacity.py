@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Стресс-проверка движка записи: тысячи одновременных нажатий «записаться» на один тур.
+
+Запуск из корня проекта:
+    python -m tools.stress_capacity --taps 5000 --capacity 100
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from services.capacity import FULL, REGISTERED, TourCapacityEngine
+from services.registrations import SqliteRegistrationStore, WriteBehindRegistrationStore
+
+
+async def run(engine, tour: dict, taps: int, users: int) -> dict:
+    """
+    Одновременно отправляет taps нажатий от users разных пользователей.
+
+    Returns:
+        dict: Количество исходов каждого типа и время прогона.
+    """
+    rnd = random.Random(1)
+    user_ids = [rnd.randrange(users) for _ in range(taps)]
+
+    async def tap(user_id):
+        # Часть пользователей тут же передумывает — это тоже должно учитываться
+        result, _ = await engine.register(user_id, tour)
+        if result == REGISTERED and rnd.random() < 0.1:
+            await engine.unregister(user_id, tour["id"])
+            return "unregistered"
+        return result
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(tap(user_id) for user_id in user_ids))
+    elapsed = time.perf_counter() - start
+
+    summary = {key: results.count(key) for key in set(results)}
+    summary["elapsed"] = elapsed
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--taps", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=3000)
+    parser.add_argument("--capacity", type=int, default=100)
+    args = parser.parse_args()
+
+    tour = {"id": "stress_tour", "capacity": args.capacity}
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = SqliteRegistrationStore(os.path.join(tmp, "registrations.db"))
+        store = WriteBehindRegistrationStore(backend, interval=0.05)
+        engine = TourCapacityEngine(store)
+
+        async def scenario():
+            store.start()
+            summary = await run(engine, tour, args.taps, args.users)
+            await store.stop()
+            return summary
+
+        summary = asyncio.run(scenario())
+        stored = backend.count(tour["id"])
+        in_memory = engine.taken(tour["id"])
+        store.close()
+
+    print(f"Результаты: {summary}")
+    print(f"Занято мест: в памяти {in_memory}, в хранилище {stored}, лимит {args.capacity}")
+    if stored > args.capacity or stored != in_memory:
+        print("❌ Перебор мест или рассинхронизация счётчиков")
+        sys.exit(1)
+    if FULL not in summary:
+        print("⚠️ Лимит не был достигнут, увеличьте --taps")
+    print("✅ Перебора мест нет")
+
+
+if __name__ == "__main__":
+    main()